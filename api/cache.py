@@ -0,0 +1,283 @@
+"""
+api/cache.py
+Response cache backends for the API blueprint.
+
+Two backends share one interface:
+- MemoryCacheBackend: per-process LRU bounded by entry count.
+- SQLiteCacheBackend: file-backed store that several worker processes can share.
+
+Entries carry entity tags ("movie:3", "user:7", "movies", ...) so writes can
+invalidate exactly the responses that depend on the changed data.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+# (status_code, headers, body)
+CachedResponse = tuple[int, list[tuple[str, str]], bytes]
+
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction/invalidation counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Increase counter 'name' by amount."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self) -> dict:
+        """Return the counters as a plain dict."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU cache with per-entry expiry and a tag index.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, CachedResponse, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached response for key, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    self._remove(key)
+                self.stats.incr("misses")
+                return None
+            self._entries.move_to_end(key)
+        self.stats.incr("hits")
+        return entry[1]
+
+    def set(
+        self, key: str, value: CachedResponse, timeout: int, tags: Iterable[str] = ()
+    ) -> None:
+        """Store value under key for timeout seconds, evicting LRU entries."""
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + timeout, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            self.stats.incr("evictions", evicted)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop all entries carrying any of the given tags."""
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+        if removed:
+            self.stats.incr("invalidations", removed)
+        return removed
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+        if removed:
+            self.stats.incr("invalidations", removed)
+
+    def size(self) -> int:
+        """Return the number of stored entries."""
+        with self._lock:
+            return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        """Remove key and its tag references. Caller holds the lock."""
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SQLiteCacheBackend:
+    """
+    Cache stored in a SQLite file, shared by all processes using the same path.
+    Recency is tracked per entry so the least recently used rows are evicted
+    once max_entries is exceeded. Counters are per process.
+    """
+
+    name = "sqlite"
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS response_cache ("
+        " key TEXT PRIMARY KEY, status INTEGER NOT NULL, headers TEXT NOT NULL,"
+        " body BLOB NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_response_cache_accessed"
+        " ON response_cache (accessed_at)",
+        "CREATE TABLE IF NOT EXISTS response_cache_tags ("
+        " tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key)) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS ix_response_cache_tags_key"
+        " ON response_cache_tags (key)",
+    )
+
+    def __init__(self, path: str, max_entries: int = 4096):
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._local = threading.local()
+        with self._transaction() as conn:
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in one write transaction."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached response for key, or None if missing/expired."""
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT status, headers, body FROM response_cache"
+            " WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        if row is None:
+            self.stats.incr("misses")
+            return None
+        conn.execute(
+            "UPDATE response_cache SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+        self.stats.incr("hits")
+        status, headers, body = row
+        return status, [tuple(h) for h in json.loads(headers)], bytes(body)
+
+    def set(
+        self, key: str, value: CachedResponse, timeout: int, tags: Iterable[str] = ()
+    ) -> None:
+        """Store value under key for timeout seconds, evicting LRU entries."""
+        now = time.time()
+        status, headers, body = value
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache"
+                " (key, status, headers, body, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, status, json.dumps(headers), body, now + timeout, now),
+            )
+            conn.execute("DELETE FROM response_cache_tags WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO response_cache_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in tags],
+            )
+            conn.execute(
+                "DELETE FROM response_cache WHERE expires_at <= ?", (now,)
+            )
+            evicted = conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                " SELECT key FROM response_cache ORDER BY accessed_at DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            conn.execute(
+                "DELETE FROM response_cache_tags"
+                " WHERE key NOT IN (SELECT key FROM response_cache)"
+            )
+        if evicted:
+            self.stats.incr("evictions", evicted)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop all entries carrying any of the given tags, in every process."""
+        tags = list(tags)
+        if not tags:
+            return 0
+        marks = ",".join("?" * len(tags))
+        with self._transaction() as conn:
+            removed = conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                f" SELECT key FROM response_cache_tags WHERE tag IN ({marks}))",
+                tags,
+            ).rowcount
+            conn.execute(
+                "DELETE FROM response_cache_tags"
+                " WHERE key NOT IN (SELECT key FROM response_cache)"
+            )
+        if removed:
+            self.stats.incr("invalidations", removed)
+        return removed
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._transaction() as conn:
+            removed = conn.execute("DELETE FROM response_cache").rowcount
+            conn.execute("DELETE FROM response_cache_tags")
+        if removed:
+            self.stats.incr("invalidations", removed)
+
+    def size(self) -> int:
+        """Return the number of stored entries."""
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM response_cache"
+        ).fetchone()[0]
+
+
+def create_cache_backend(
+    backend: str, path: Optional[str] = None, max_entries: int = 512
+):
+    """Build the backend named 'memory' or 'sqlite'."""
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("SQLite response cache requires a path")
+        return SQLiteCacheBackend(path, max_entries=max_entries)
+    if backend == "memory":
+        return MemoryCacheBackend(max_entries=max_entries)
+    raise ValueError(f"Unknown response cache backend '{backend}'")
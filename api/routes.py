@@ -3,37 +3,155 @@ api/routes.py
 API routes for MovieWeb application.
 """
 
+import base64
+import hashlib
 import os
-import time
 import json
 import requests
-from flask import Blueprint, jsonify, request, current_app
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, Response, jsonify, request, current_app, g, stream_with_context
 from functools import wraps
+from typing import Optional
 from dotenv import load_dotenv
-from datamanager.sqlite_data_manager import SQLiteDataManager
+from api.cache import create_cache_backend
+from datamanager.signals import data_changed
+from datamanager import create_data_manager
+from datamanager.replicas import read_from_primary
+from services.metrics import registry
+from services.omdb import get_omdb_client
+from services.prefetch import plans_upstream_calls
 
 load_dotenv()
 OMDB_API_KEY = os.getenv("OMDB_API_KEY")
 
 api = Blueprint("api", __name__)
-data_manager = SQLiteDataManager()
+data_manager = create_data_manager()
+omdb_client = get_omdb_client()
 
-cache = {}
 CACHE_TIMEOUT = 300
+USERS_PER_PAGE = 50
+MOVIES_PER_PAGE = 100
+MAX_PER_PAGE = 200
+MAX_BATCH_ITEMS = 500
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_PATH = os.getenv(
+    "RESPONSE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "instance", "response_cache.db"),
+)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+cache = create_cache_backend(
+    RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES
+)
+registry.collector(
+    "movieweb_response_cache_events_total",
+    "counter",
+    "API response cache hits, misses, evictions and invalidations.",
+    lambda: [({"event": name}, value) for name, value in cache.stats.as_dict().items()],
+)
+
+
+@data_changed.connect
+def invalidate_cached_responses(sender, tags=None, **extra):
+    """Drop cached responses tagged with entities changed by a data manager write."""
+    if tags is None:
+        cache.clear()
+    else:
+        cache.invalidate_tags(tags)
+
+
+def add_cache_tags(*tags):
+    """Attach extra invalidation tags to the response being cached."""
+    g.setdefault("cache_tags", set()).update(tags)
+
+
+def cache_response(timeout=CACHE_TIMEOUT, tags=()):
+    """
+    Cache successful API responses for a given timeout (seconds).
+    'tags' are format strings filled from the view arguments,
+    e.g. "user:{user_id}"; writes touching those entities invalidate the entry.
+    Misses read from the primary so a lagging replica is never cached,
+    unless the key carries the ETag version read from the same replica.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            key = f"{f.__name__}:{request.full_path}"
+            versioned = "response_etag" in g
+            if versioned:
+                # Entries of older versions are never read again.
+                key += f"@{g.response_etag}"
+            hit = cache.get(key)
+            if hit is not None:
+                status, headers, body = hit
+                return current_app.response_class(body, status=status, headers=headers)
+            if not versioned:
+                read_from_primary()
+            resp = current_app.make_response(f(*args, **kwargs))
+            entry_tags = {t.format(**kwargs) for t in tags}
+            entry_tags.update(g.pop("cache_tags", ()))
+            if resp.status_code == 200 and not resp.is_streamed:
+                headers = [
+                    (k, v) for k, v in resp.headers.items() if k.lower() != "set-cookie"
+                ]
+                cache.set(
+                    key,
+                    (resp.status_code, headers, resp.get_data()),
+                    timeout,
+                    entry_tags,
+                )
+            return resp
+        return decorated
+    return decorator
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    """True if the client's cached copy (If-None-Match / If-Modified-Since) is current."""
+    if request.if_none_match:
+        return not request.if_none_match.star_tag and request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
 
 
-def cache_response(timeout=CACHE_TIMEOUT):
-    """Cache API responses for a given timeout (seconds)."""
+def conditional_response(tags=(), user_list=None):
+    """
+    Answer conditional GETs from entity versions before the view runs.
+    'tags' are format strings filled from the view arguments, as for
+    cache_response; 'user_list' (e.g. "{user_id}") also covers every movie
+    in that user's list. Successful responses get a strong ETag, must be
+    revalidated, and 304 is returned while the versions are unchanged.
+    """
     def decorator(f):
         @wraps(f)
         def decorated(*args, **kwargs):
-            key = f"{f.__name__}:{args}:{kwargs}"
-            if key in cache:
-                ts, resp = cache[key]
-                if time.time() - ts < timeout:
+            # Versions are read like the body (one replica per request), so
+            # an ETag never labels an older body.
+            list_id = int(user_list.format(**kwargs)) if user_list else None
+            found = data_manager.get_version([t.format(**kwargs) for t in tags], list_id)
+            if found is None:
+                return f(*args, **kwargs)
+            version, last_modified = found
+            g.response_etag = hashlib.sha256(
+                f"{f.__name__}:{request.full_path}:{version}".encode()
+            ).hexdigest()[:32]
+            if last_modified is not None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+                # Last-Modified has one-second resolution: only a time at least
+                # a second old is sure to cover every write made in that second.
+                if datetime.now(timezone.utc) - last_modified < timedelta(seconds=1):
+                    last_modified = None
+
+            if _not_modified(g.response_etag, last_modified):
+                resp = current_app.response_class(status=304)
+            else:
+                resp = current_app.make_response(f(*args, **kwargs))
+                if resp.status_code != 200:
                     return resp
-            resp = f(*args, **kwargs)
-            cache[key] = (time.time(), resp)
+            resp.set_etag(g.response_etag)
+            if last_modified is not None:
+                resp.last_modified = last_modified
+            resp.cache_control.no_cache = True
             return resp
         return decorated
     return decorator
@@ -58,32 +176,39 @@ def handle_api_error(f):
 
 @api.route("/users")
 @handle_api_error
-@cache_response()
+@cache_response(tags=("users",))
 def get_users():
-    """Return list of users with movie counts."""
-    users = data_manager.get_all_users()
-    result = []
-    for u in users:
-        result.append({
-            "id": u.id,
-            "name": u.name,
-            "movie_count": len(u.movies)
-        })
-    current_app.logger.info(f"Retrieved {len(result)} users.")
-    return jsonify({"success": True, "users": result}), 200
+    """Return a page of users with movie counts (?page=, ?per_page=)."""
+    page = request.args.get("page", 1, type=int)
+    per_page = min(max(request.args.get("per_page", USERS_PER_PAGE, type=int), 1), MAX_PER_PAGE)
+    rows, total = data_manager.get_users_with_movie_counts(page=page, per_page=per_page)
+    result = [
+        {"id": u.id, "name": u.name, "movie_count": count}
+        for u, count in rows
+    ]
+    current_app.logger.info(f"Retrieved {len(result)} of {total} users (page {page}).")
+    return jsonify({
+        "success": True,
+        "users": result,
+        "page": page,
+        "per_page": per_page,
+        "total": total
+    }), 200
 
 
 @api.route("/users/<int:user_id>")
 @handle_api_error
-@cache_response()
+@conditional_response(tags=("user:{user_id}",), user_list="{user_id}")
+@cache_response(tags=("user:{user_id}",))
 def get_user(user_id):
     """Return details of a specific user and their movies."""
     u = data_manager.get_user_by_id(user_id)
     if not u:
         return jsonify({"success": False, "message": "User not found"}), 404
     movies = []
-    for rel in u.movies:
+    for rel in data_manager.get_user_movie_relations(user_id):
         m = rel.movie
+        add_cache_tags(f"movie:{m.id}")
         movies.append({
             "id": m.id,
             "title": m.title,
@@ -102,7 +227,8 @@ def get_user(user_id):
 
 @api.route("/users/<int:user_id>/movies")
 @handle_api_error
-@cache_response()
+@conditional_response(tags=("user:{user_id}",), user_list="{user_id}")
+@cache_response(tags=("user:{user_id}",))
 def get_user_movies(user_id):
     """Return all movies of a user with personal ratings."""
     u = data_manager.get_user_by_id(user_id)
@@ -112,6 +238,7 @@ def get_user_movies(user_id):
     movies = []
     for r in rels:
         m = r.movie
+        add_cache_tags(f"movie:{m.id}")
         movies.append({
             "id": m.id,
             "title": m.title,
@@ -130,29 +257,90 @@ def get_user_movies(user_id):
     }), 200
 
 
+def _movie_summary(m):
+    """Serialize the list-view fields of a movie."""
+    return {
+        "id": m.id,
+        "title": m.title,
+        "director": m.director,
+        "year": m.year,
+        "community_rating": m.community_rating,
+        "community_rating_count": m.community_rating_count,
+        "poster_url": m.poster_url
+    }
+
+
+def _encode_movie_cursor(m):
+    """Encode a (title, id) keyset position as an opaque cursor string."""
+    raw = json.dumps([m.title, m.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_movie_cursor(cursor):
+    """Decode a cursor from _encode_movie_cursor; raise ValueError if invalid."""
+    try:
+        title, movie_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+    if not isinstance(title, str) or not isinstance(movie_id, int):
+        raise ValueError("Invalid cursor contents")
+    return title, movie_id
+
+
 @api.route("/movies")
 @handle_api_error
-@cache_response()
+@conditional_response(tags=("movies",))
+@cache_response(tags=("movies",))
 def get_movies():
-    """Return list of all movies."""
-    movies = data_manager.get_all_movies()
-    result = []
-    for m in movies:
-        result.append({
-            "id": m.id,
-            "title": m.title,
-            "director": m.director,
-            "year": m.year,
-            "community_rating": m.community_rating,
-            "community_rating_count": m.community_rating_count,
-            "poster_url": m.poster_url
-        })
-    return jsonify({"success": True, "movies": result}), 200
+    """
+    Return movies ordered by title, one keyset page at a time.
+    Query params: 'limit', 'after' (cursor from 'next_cursor'),
+    'stream=1' to export the whole catalog as NDJSON.
+    """
+    if request.args.get("stream") == "1":
+        def generate():
+            for m in data_manager.iter_all_movies():
+                yield json.dumps(_movie_summary(m)) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    limit = min(max(request.args.get("limit", MOVIES_PER_PAGE, type=int), 1), MAX_PER_PAGE)
+    after = None
+    if request.args.get("after"):
+        try:
+            after = _decode_movie_cursor(request.args["after"])
+        except ValueError:
+            return jsonify({"success": False, "message": "Invalid cursor"}), 400
+
+    movies = data_manager.get_movies_page(limit=limit, after=after)
+    next_cursor = _encode_movie_cursor(movies[-1]) if len(movies) == limit else None
+    return jsonify({
+        "success": True,
+        "movies": [_movie_summary(m) for m in movies],
+        "next_cursor": next_cursor
+    }), 200
+
+
+@api.route("/search")
+@handle_api_error
+@cache_response(tags=("movies",))
+def search_movies():
+    """Full-text search over movies in the local catalog (?q=, ?limit=)."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"success": False, "message": "q required"}), 400
+    limit = min(max(request.args.get("limit", 10, type=int), 1), MAX_PER_PAGE)
+    movies = data_manager.search_movies(query, limit=limit)
+    return jsonify({
+        "success": True,
+        "query": query,
+        "movies": [_movie_summary(m) for m in movies]
+    }), 200
 
 
 @api.route("/movies/<int:movie_id>")
 @handle_api_error
-@cache_response()
+@conditional_response(tags=("movie:{movie_id}", "comments:{movie_id}"))
+@cache_response(tags=("movie:{movie_id}", "comments:{movie_id}"))
 def get_movie(movie_id):
     """Return details of a specific movie, including comments."""
     m = data_manager.get_movie_by_id(movie_id)
@@ -195,7 +383,8 @@ def get_movie(movie_id):
 
 @api.route("/movies/<int:movie_id>/comments")
 @handle_api_error
-@cache_response()
+@conditional_response(tags=("movie:{movie_id}", "comments:{movie_id}"))
+@cache_response(tags=("movie:{movie_id}", "comments:{movie_id}"))
 def get_movie_comments(movie_id):
     """Return all comments for a specific movie."""
     m = data_manager.get_movie_by_id(movie_id)
@@ -217,97 +406,196 @@ def get_movie_comments(movie_id):
     }), 200
 
 
-@api.route("/users/<int:user_id>/movies", methods=["POST"])
+@api.route("/cache/stats")
 @handle_api_error
-def add_movie_api(user_id):
+def get_cache_stats():
+    """Return response cache backend, size and hit/miss/eviction counters."""
+    return jsonify({
+        "success": True,
+        "cache": {
+            "backend": cache.name,
+            "size": cache.size(),
+            "max_entries": cache.max_entries,
+            **cache.stats.as_dict(),
+        }
+    }), 200
+
+
+def _parse_rating(value) -> tuple[Optional[float], Optional[str]]:
+    """Return (rating or None, None) or (None, error message)."""
+    if value is None:
+        return None, None
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return None, "Invalid rating format"
+    if not (0 <= rating <= 5):
+        return None, "Rating must be 0–5"
+    return rating, None
+
+
+def _parse_movie_payload(data: dict) -> tuple[Optional[dict], Optional[str]]:
     """
-    POST /api/users/<user_id>/movies
-    Add a new movie to a user's favorites via JSON payload.
+    Turn a movie JSON payload into add_movie() keyword arguments.
+    Returns (kwargs, None) or (None, error message).
     """
-    u = data_manager.get_user_by_id(user_id)
-    if not u:
-        current_app.logger.warning(f"User {user_id} not found for add_movie_api")
-        return jsonify({"success": False, "message": "User not found"}), 404
-
-    data = request.get_json() or {}
     title = data.get("title")
     if not title:
-        return jsonify({"success": False, "message": "Title required"}), 400
+        return None, "Title required"
+    if not isinstance(title, str):
+        return None, "Title must be a string"
+    if data.get("imdb_id") is not None and not isinstance(data["imdb_id"], str):
+        return None, "Invalid imdb_id"
 
-    director = data.get("director")
     year = None
     if data.get("year"):
         try:
             year = int(data["year"])
-        except ValueError:
-            return jsonify({"success": False, "message": "Invalid year format"}), 400
+        except (TypeError, ValueError):
+            return None, "Invalid year format"
+
+    rating, error = _parse_rating(data.get("rating"))
+    if error:
+        return None, error
 
-    rating = None
-    if data.get("rating") is not None:
-        try:
-            rating = float(data["rating"])
-            if not (0 <= rating <= 5):
-                return jsonify({"success": False, "message": "Rating must be 0–5"}), 400
-        except ValueError:
-            return jsonify({"success": False, "message": "Invalid rating format"}), 400
-
-    poster_url = data.get("poster_url")
-    imdb_id = data.get("imdb_id")
-    plot = data.get("plot")
-    runtime = data.get("runtime")
-    awards = data.get("awards")
-    languages = data.get("language")
-    genre = data.get("genre")
-    actors = data.get("actors")
-    writer = data.get("writer")
-    country = data.get("country")
-    metascore = data.get("metascore")
-    rated_omdb = data.get("rated")
     omdb_init = None
     if data.get("omdb_initial_rating_5_star"):
         try:
             tmp = float(data["omdb_initial_rating_5_star"])
             omdb_init = tmp if 0 <= tmp <= 5 else None
-        except ValueError:
+        except (TypeError, ValueError):
             omdb_init = None
 
-    link = data_manager.add_movie(
-        user_id=user_id,
-        title=title,
-        director=director,
-        year=year,
-        user_specific_rating=rating,
-        poster_url=poster_url,
-        imdb_id=imdb_id,
-        plot=plot,
-        runtime=runtime,
-        awards=awards,
-        languages=languages,
-        genre=genre,
-        actors=actors,
-        writer=writer,
-        country=country,
-        metascore=metascore,
-        rated=rated_omdb,
-        omdb_rating_for_community=omdb_init
-    )
-
-    if link and link.movie:
-        current_app.logger.info(f"Added movie {link.movie.id} to user {user_id}.")
+    return {
+        "title": title,
+        "director": data.get("director"),
+        "year": year,
+        "rating": rating,
+        "poster_url": data.get("poster_url"),
+        "imdb_id": data.get("imdb_id"),
+        "plot": data.get("plot"),
+        "runtime": data.get("runtime"),
+        "awards": data.get("awards"),
+        "languages": data.get("language"),
+        "genre": data.get("genre"),
+        "actors": data.get("actors"),
+        "writer": data.get("writer"),
+        "country": data.get("country"),
+        "metascore": data.get("metascore"),
+        "rated": data.get("rated"),
+        "omdb_rating_for_community": omdb_init,
+    }, None
+
+
+@api.route("/users/<int:user_id>/movies", methods=["POST"])
+@handle_api_error
+def add_movie_api(user_id):
+    """
+    POST /api/users/<user_id>/movies
+    Add a new movie to a user's favorites via JSON payload.
+    """
+    u = data_manager.get_user_by_id(user_id)
+    if not u:
+        current_app.logger.warning(f"User {user_id} not found for add_movie_api")
+        return jsonify({"success": False, "message": "User not found"}), 404
+
+    fields, error = _parse_movie_payload(request.get_json() or {})
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+
+    movie = data_manager.add_movie(user_id=user_id, **fields)
+
+    if movie:
+        link = data_manager.get_user_movie_link(user_id, movie.id)
+        current_app.logger.info(f"Added movie {movie.id} to user {user_id}.")
         return jsonify({
             "success": True,
             "message": "Movie added to user list",
-            "movie_id": link.movie.id,
-            "user_movie_id": link.id
+            "movie_id": movie.id,
+            "user_movie_id": link.id if link else None
         }), 201
 
-    current_app.logger.warning(f"Could not add movie '{title}' to user {user_id}.")
+    current_app.logger.warning(f"Could not add movie '{fields['title']}' to user {user_id}.")
     return jsonify({
         "success": False,
         "message": "Failed to add movie; might already exist or error occurred"
     }), 409
 
 
+@api.route("/users/<int:user_id>/movies:batch", methods=["POST"])
+@handle_api_error
+def add_movies_batch_api(user_id):
+    """
+    POST /api/users/<user_id>/movies:batch
+    Add or rate many movies in one transaction. Body: a JSON array (or
+    {"movies": [...]}) of add_movie_api payloads or {"movie_id", "rating"}
+    items. Returns a status per item.
+    """
+    u = data_manager.get_user_by_id(user_id)
+    if not u:
+        current_app.logger.warning(f"User {user_id} not found for add_movies_batch_api")
+        return jsonify({"success": False, "message": "User not found"}), 404
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get("movies")
+    if not isinstance(payload, list) or not payload:
+        return jsonify({"success": False, "message": "A non-empty array of movies is required"}), 400
+    if len(payload) > MAX_BATCH_ITEMS:
+        return jsonify({
+            "success": False,
+            "message": f"At most {MAX_BATCH_ITEMS} movies per batch"
+        }), 400
+
+    items, positions, results = [], [], [None] * len(payload)
+    for index, data in enumerate(payload):
+        if not isinstance(data, dict):
+            results[index] = {"index": index, "status": "invalid", "movie_id": None,
+                              "message": "Item must be an object"}
+            continue
+        if data.get("movie_id") is not None and not data.get("title"):
+            rating, error = _parse_rating(data.get("rating"))
+            try:
+                fields = {"movie_id": int(data["movie_id"]), "rating": rating}
+            except (TypeError, ValueError):
+                error = "Invalid movie_id"
+        else:
+            fields, error = _parse_movie_payload(data)
+        if error:
+            results[index] = {"index": index, "status": "invalid", "movie_id": None, "message": error}
+            continue
+        items.append(fields)
+        positions.append(index)
+
+    if items:
+        batch_results = data_manager.add_movies_to_user_list(user_id, items)
+        if batch_results is None:
+            return jsonify({"success": False, "message": "Failed to save movies"}), 500
+        for result, index in zip(batch_results, positions):
+            results[index] = {**result, "index": index}
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    current_app.logger.info(f"Batch add for user {user_id}: {counts}")
+    return jsonify({"success": True, "counts": counts, "results": results}), 200
+
+
+@plans_upstream_calls("api.omdb_proxy")
+def plan_omdb_proxy_upstream_calls():
+    """Return the OMDb lookup omdb_proxy will make, if any."""
+    title = request.args.get("title")
+    imdb_id = request.args.get("imdb_id")
+    if not OMDB_API_KEY or not (title or imdb_id):
+        return []
+    return [omdb_client.upstream_call(
+        title=title,
+        imdb_id=imdb_id,
+        year=request.args.get("year"),
+        plot=request.args.get("plot", "short"),
+    )]
+
+
 @api.route("/omdb_proxy")
 @handle_api_error
 def omdb_proxy():
@@ -326,19 +614,11 @@ def omdb_proxy():
 
     year = request.args.get("year")
     plot = request.args.get("plot", "short")
-    params = {"apikey": OMDB_API_KEY, "plot": plot}
-    if title:
-        params["t"] = title
-    if imdb_id:
-        params["i"] = imdb_id
-    if year:
-        params["y"] = year
-
-    current_app.logger.info(f"OMDb proxy params: {params}")
+    lookup = {"title": title, "imdb_id": imdb_id, "year": year, "plot": plot}
+
+    current_app.logger.info(f"OMDb proxy lookup: {lookup}")
     try:
-        resp = requests.get("http://www.omdbapi.com/", params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        data = omdb_client.lookup(**lookup)
         if data.get("Response") == "True":
             current_app.logger.info("OMDb proxy success")
             return jsonify({"success": True, "data": data})
@@ -347,23 +627,25 @@ def omdb_proxy():
         return jsonify({"success": False, "message": err, "data": data}), 200
 
     except requests.exceptions.Timeout:
-        current_app.logger.warning(f"OMDb proxy timeout for params: {params}")
+        current_app.logger.warning(f"OMDb proxy timeout for lookup: {lookup}")
         return jsonify({"success": False, "message": "OMDb request timed out"}), 504
     except requests.exceptions.HTTPError as http_err:
+        resp = http_err.response
         current_app.logger.error(f"OMDb HTTP error: {http_err}. Response: {resp.text}")
         err_msg = f"OMDb HTTP error: {http_err}"
+        err_data = None
         try:
             err_data = resp.json()
             if "Error" in err_data:
                 err_msg = err_data["Error"]
         except ValueError:
             pass
-        return jsonify({"success": False, "message": err_msg, "omdb_error_data": err_data if "err_data" in locals() else None}), resp.status_code
+        return jsonify({"success": False, "message": err_msg, "omdb_error_data": err_data}), resp.status_code
     except requests.exceptions.RequestException as req_err:
         current_app.logger.error(f"OMDb proxy request failed: {req_err}")
         return jsonify({"success": False, "message": f"Failed to connect to OMDb: {req_err}"}), 502
     except ValueError as json_err:
-        current_app.logger.error(f"OMDb JSON decode error: {json_err}. Response: {resp.text if 'resp' in locals() else 'N/A'}")
+        current_app.logger.error(f"OMDb JSON decode error: {json_err}")
         return jsonify({"success": False, "message": "Failed to decode OMDb response"}), 500
 
 
@@ -3,10 +3,13 @@ app.py
 Main module for MovieWeb application.
 """
 
+import difflib
 import json
 import os
 import re
+import threading
 from datetime import datetime
+from typing import Optional
 
 import requests
 from dotenv import load_dotenv
@@ -23,26 +26,101 @@ from flask import (
     g,
 )
 from flask_wtf.csrf import CSRFProtect
+from sqlalchemy.orm.attributes import set_committed_value
 
-from api.routes import api as api_blueprint
-from datamanager.sqlite_data_manager import SQLiteDataManager
+from api.routes import api as api_blueprint, conditional_response
+from datamanager.signals import data_changed, rating_changed
+from datamanager import create_data_manager
+from datamanager.replicas import pin_client_to_primary, replica_binds_from_env
+from datamanager.sqlite_tuning import describe_engine, engine_options, install_sqlite_pragmas
 from models import Comment, db, Movie, User, UserMovie
+from services.cooccurrence import CooccurrenceIndexer
+from services import metrics
+from services.http_client import get_http_client
+from services.memo import MemoCache
+from services.omdb import get_omdb_client, normalize_title
+from services.prefetch import MISSING, UpstreamCall, planned, plans_upstream_calls, take_prefetched
+from services.rating_queue import RatingWriteQueue, replay_orphaned_logs
+from services.recommender import ItemSimilarityEngine
 
 load_dotenv()
 OMDB_API_KEY = os.getenv("OMDB_API_KEY")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
 
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
     "DATABASE_URI", "sqlite:///moviewebapp.db"
 )
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+app.config["SQLALCHEMY_BINDS"] = replica_binds_from_env()
+app.config["DATABASE_REPLICA_STICKY_SECONDS"] = float(
+    os.getenv("DATABASE_REPLICA_STICKY_SECONDS", "5")
+)
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev_secret")
 
 csrf = CSRFProtect(app)
 db.init_app(app)
+metrics.init_app(app, slow_request_seconds=float(os.getenv("SLOW_REQUEST_SECONDS", "1.0")))
+with app.app_context():
+    for bind_key, engine in db.engines.items():
+        install_sqlite_pragmas(engine)
+        metrics.install_sql_hooks(engine, bind=bind_key or "primary")
+        app.logger.info(f"Database settings ({bind_key or 'primary'}): {describe_engine(engine)}")
 app.register_blueprint(api_blueprint, url_prefix="/api")
-data_manager = SQLiteDataManager()
+data_manager = create_data_manager(app.config["SQLALCHEMY_DATABASE_URI"])
+http_client = get_http_client()
+omdb_client = get_omdb_client()
+ai_title_cache = MemoCache(
+    max_entries=int(os.getenv("AI_TITLE_CACHE_MAX_ENTRIES", "1024")),
+    ttl=int(os.getenv("AI_TITLE_CACHE_TTL", "86400")),
+)
+recommender = ItemSimilarityEngine(
+    top_k=int(os.getenv("RECOMMENDER_TOP_K", "20")),
+    shrinkage=float(os.getenv("RECOMMENDER_SHRINKAGE", "5")),
+    rebuild_interval=int(os.getenv("RECOMMENDER_REBUILD_INTERVAL", "300")),
+    max_items_per_user=int(os.getenv("RECOMMENDER_MAX_ITEMS_PER_USER", "500")),
+)
+cooccurrence_indexer = CooccurrenceIndexer(
+    refresh=data_manager.refresh_cooccurrence,
+    max_queue=int(os.getenv("COOCCURRENCE_QUEUE_SIZE", "10000")),
+    window=float(os.getenv("COOCCURRENCE_COALESCE_WINDOW", "2")),
+)
+# Write-behind mode: rating changes are logged locally and applied in batches
+# by a background writer. Logs left by stopped processes are replayed at
+# startup, with write-behind on or off.
+RATING_QUEUE_DIR = os.getenv("RATING_QUEUE_DIR", os.path.join(app.instance_path, "rating_queue"))
+rating_queue = None
+if os.getenv("RATING_WRITE_BEHIND", "off").lower() in ("1", "on", "true", "yes"):
+    rating_queue = RatingWriteQueue(
+        apply=data_manager.apply_rating_updates,
+        directory=RATING_QUEUE_DIR,
+        window=float(os.getenv("RATING_QUEUE_WINDOW", "0.05")),
+        max_pending=int(os.getenv("RATING_QUEUE_MAX_PENDING", "10000")),
+        max_batch=int(os.getenv("RATING_QUEUE_MAX_BATCH", "500")),
+        fsync=os.getenv("RATING_QUEUE_FSYNC", "true").lower() == "true",
+        max_attempts=int(os.getenv("RATING_QUEUE_MAX_ATTEMPTS", "5")),
+    )
+    metrics.registry.collector(
+        "movieweb_rating_queue_events_total",
+        "counter",
+        "Write-behind rating changes submitted, applied, rejected, replayed and dropped, batches and failures.",
+        lambda: [
+            ({"event": name}, value)
+            for name, value in rating_queue.stats().items()
+            if name != "pending"
+        ],
+    )
+    metrics.registry.collector(
+        "movieweb_rating_queue_pending",
+        "gauge",
+        "Write-behind rating changes not yet applied.",
+        lambda: [({}, rating_queue.stats()["pending"])],
+    )
+    rating_queue.start(app)
+else:
+    replay_orphaned_logs(RATING_QUEUE_DIR, data_manager.apply_rating_updates, app)
 
 AI_MOVIE_IDENTIFICATION_PROMPT_TEMPLATE = (
     "User input: '{user_input}'. Identify the single correct movie title or return "
@@ -56,6 +134,8 @@ EXCLUSION_CLAUSE_TEMPLATE = (
     "\n\nExclude these titles:\n{movies_to_exclude_list_format}"
 )
 AI_RECOMMENDATION_HISTORY_SESSION_KEY = "ai_recommendation_history"
+# Session key of the logged-in user's {"id", "name"}, so requests need no user query.
+USER_SNAPSHOT_SESSION_KEY = "user"
 AI_RECOMMENDATION_HISTORY_LENGTH = 20
 DEFAULT_AI_TEMPERATURE_RECOMMEND = 0.7
 DEFAULT_AI_TEMPERATURE_INTERPRET = 0.3
@@ -68,6 +148,13 @@ AI_MSG_CONNECTION_ERROR_GENERIC = "Error connecting to AI."
 AI_MSG_API_ERROR_DETAILED_TEMPLATE = "AI API Error: {error_message}."
 AI_MSG_UNEXPECTED_ERROR_TEMPLATE = "Unexpected AI error: {error_message}."
 AI_MSG_NO_SUGGESTIONS_LIST = "AI returned no suggestions."
+USERS_PER_PAGE = 50
+LOCAL_SEARCH_LIMIT = 5
+LOCAL_TITLE_FUZZY_THRESHOLD = 0.9
+RECOMMENDATIONS_PER_REQUEST = 5
+SAVED_TOGETHER_LIMIT = 5
+# Window of the "Trending" leaderboard on the home page; 0 hides it.
+HOME_TRENDING_DAYS = int(os.getenv("HOME_TRENDING_DAYS", "7"))
 
 
 def get_ai_interpreted_movie_title(
@@ -75,10 +162,42 @@ def get_ai_interpreted_movie_title(
 ) -> str:
     """
     Return AI-interpreted movie title or NO_CLEAR_MOVIE_TITLE_MARKER.
+    AI answers are memoized per normalized input, and identical concurrent
+    lookups share one upstream request. Callers look for the title in our
+    catalog first (see _add_movie_lookup).
     """
     if not user_input:
         return NO_CLEAR_MOVIE_TITLE_MARKER
 
+    key = _ai_title_cache_key(user_input, temperature)
+    title, _ = ai_title_cache.get_or_compute(
+        key,
+        lambda: _interpret_movie_title_with_ai(user_input, temperature),
+        cache_if=lambda result: result[1],
+    )
+    return title
+
+
+def _ai_title_cache_key(user_input: str, temperature: float) -> tuple:
+    """Memo key of an AI title interpretation."""
+    return normalize_title(user_input), temperature
+
+
+def _ai_title_upstream_call(user_input: str, temperature: float) -> UpstreamCall:
+    """
+    Describe the OpenRouter call of an AI title interpretation, sharing
+    ai_title_cache's single flight, for prefetching under ASGI.
+    """
+    prompt = AI_MOVIE_IDENTIFICATION_PROMPT_TEMPLATE.format(user_input=user_input)
+    return openrouter_upstream_call(prompt, temperature, expected_responses=1, memo=ai_title_cache)
+
+
+def _interpret_movie_title_with_ai(user_input: str, temperature: float) -> tuple[str, bool]:
+    """
+    Ask the AI for the movie title meant by user_input.
+    Returns (title or NO_CLEAR_MOVIE_TITLE_MARKER, cacheable); error answers
+    are not cacheable.
+    """
     prompt = AI_MOVIE_IDENTIFICATION_PROMPT_TEMPLATE.format(user_input=user_input)
     current_app.logger.debug(f"AI prompt:\n{prompt}")
 
@@ -87,27 +206,43 @@ def get_ai_interpreted_movie_title(
     )
     if not ai_list:
         current_app.logger.warning(f"No AI response for '{user_input}'")
-        return NO_CLEAR_MOVIE_TITLE_MARKER
+        return NO_CLEAR_MOVIE_TITLE_MARKER, False
 
     title = ai_list[0]
     if title == "NO_CLEAR_MOVIE_TITLE_FOUND":
         current_app.logger.info(f"AI found no title for '{user_input}'")
-        return NO_CLEAR_MOVIE_TITLE_MARKER
+        return NO_CLEAR_MOVIE_TITLE_MARKER, True
+    if title == NO_CLEAR_MOVIE_TITLE_MARKER:
+        return NO_CLEAR_MOVIE_TITLE_MARKER, False
 
     low = title.lower()
     if "error" in low or "not configured" in low or "timed out" in low:
         current_app.logger.warning(f"AI returned error phrase: {title}")
-        return NO_CLEAR_MOVIE_TITLE_MARKER
+        return NO_CLEAR_MOVIE_TITLE_MARKER, False
 
     current_app.logger.info(f"AI interpreted '{user_input}' as '{title}'")
-    return title
+    return title, True
+
+
+def _log_in(user: User) -> None:
+    """Remember the user, with a snapshot for load_logged_in_user, in the session."""
+    session["user_id"] = user.id
+    session[USER_SNAPSHOT_SESSION_KEY] = {"id": user.id, "name": user.name}
 
 
 @app.before_request
 def load_logged_in_user():
-    """Load logged-in user into g.user."""
+    """Load logged-in user into g.user, from the session snapshot when possible."""
     uid = session.get("user_id")
-    g.user = data_manager.get_user_by_id(uid) if uid else None
+    if not uid:
+        g.user = None
+        return
+    g.user = data_manager.get_user_from_snapshot(session.get(USER_SNAPSHOT_SESSION_KEY))
+    if g.user is None or g.user.id != uid:
+        # Sessions from before snapshots: look the user up once.
+        g.user = data_manager.get_user_by_id(uid)
+        if g.user:
+            _log_in(g.user)
 
 
 @app.context_processor
@@ -120,7 +255,17 @@ def inject_user_status():
 def home():
     """Show home page with top movies."""
     top_movies = data_manager.get_top_movies()
-    return render_template("home.html", top_movies=top_movies)
+    trending_movies = (
+        data_manager.get_trending_movies(days=HOME_TRENDING_DAYS)
+        if HOME_TRENDING_DAYS > 0
+        else []
+    )
+    return render_template(
+        "home.html",
+        top_movies=top_movies,
+        trending_movies=trending_movies,
+        trending_days=HOME_TRENDING_DAYS,
+    )
 
 
 @app.route("/login", methods=["POST"])
@@ -129,7 +274,7 @@ def login():
     username = request.form.get("username", "").strip()
     user = data_manager.get_user_by_name(username)
     if user:
-        session["user_id"] = user.id
+        _log_in(user)
         current_app.logger.info(f"User '{username}' (ID: {user.id}) logged in.")
         return (
             jsonify(
@@ -174,7 +319,7 @@ def register():
             409,
         )
 
-    session["user_id"] = new_user.id
+    _log_in(new_user)
     current_app.logger.info(f"User '{new_user.name}' (ID: {new_user.id}) registered.")
     return (
         jsonify(
@@ -192,6 +337,7 @@ def register():
 def logout():
     """Log out current user and redirect to home."""
     session.pop("user_id", None)
+    session.pop(USER_SNAPSHOT_SESSION_KEY, None)
     g.user = None
     flash("You have been logged out.", "success")
     return redirect(url_for("home"))
@@ -199,9 +345,15 @@ def logout():
 
 @app.route("/users")
 def list_users():
-    """Show list of all users."""
-    users = data_manager.get_all_users()
-    return render_template("users.html", users=users)
+    """Show one page of users with their movie counts."""
+    page = max(request.args.get("page", 1, type=int), 1)
+    users, total = data_manager.get_users_with_movie_counts(page=page, per_page=USERS_PER_PAGE)
+    return render_template(
+        "users.html",
+        users=users,
+        page=page,
+        has_next=page * USERS_PER_PAGE < total,
+    )
 
 
 @app.route("/users/<int:user_id>")
@@ -212,11 +364,18 @@ def list_user_movies(user_id):
         if not user:
             flash("User not found.", "warning")
             return redirect(url_for("list_users"))
+        # Read before the list: a queued rating leaves it only once committed.
+        queued = rating_queue.pending_for(user_id) if rating_queue is not None else {}
         relations = data_manager.get_user_movie_relations(user_id)
     except Exception as err:
         current_app.logger.error(f"Error listing movies for user {user_id}: {err}")
         return render_template("500.html"), 500
 
+    for relation in relations:
+        if relation.movie_id in queued:
+            # Shown, not written: the queue commits it.
+            set_committed_value(relation, "user_rating", queued[relation.movie_id])
+
     return render_template(
         "movies.html",
         user_movie_relations=relations,
@@ -288,11 +447,8 @@ def _fetch_movie_details_from_omdb_for_add_template(title: str) -> dict:
     Query OMDb for title; build context for 'add_movie' template.
     """
     ctx = {"omdb": None, "omdb_details": None, "rating5": None, "ai_message": None, "flash_message": None}
-    params = {"apikey": OMDB_API_KEY, "t": title}
     try:
-        resp = requests.get("http://www.omdbapi.com/", params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        data = omdb_client.lookup(title=title)
         ctx["omdb"] = data
     except requests.exceptions.RequestException as err:
         current_app.logger.error(f"OMDb request failed for '{title}': {err}")
@@ -329,11 +485,40 @@ def _fetch_movie_details_from_omdb_for_add_template(title: str) -> dict:
     return ctx
 
 
-def _get_ai_suggestion_for_add_movie_template(user_search_input: str) -> dict:
+def _find_local_movie_by_title(title: str, fuzzy: bool = False):
+    """
+    Return a movie from the local catalog whose title equals 'title'
+    after normalization, or None. With fuzzy=True a close match
+    (similarity >= LOCAL_TITLE_FUZZY_THRESHOLD) also counts.
+    """
+    wanted = normalize_title(title)
+    if not wanted:
+        return None
+    candidates = data_manager.search_movies(title, limit=LOCAL_SEARCH_LIMIT, match_any=fuzzy)
+    best, best_ratio = None, 0.0
+    for movie in candidates:
+        candidate = normalize_title(movie.title)
+        if candidate == wanted:
+            return movie
+        if fuzzy:
+            ratio = difflib.SequenceMatcher(None, wanted, candidate).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = movie, ratio
+    return best if best_ratio >= LOCAL_TITLE_FUZZY_THRESHOLD else None
+
+
+def _get_ai_suggestion_for_add_movie_template(
+    user_search_input: str, local_title: Optional[str] = None
+) -> dict:
     """
     Return AI-suggested title and message for 'add_movie' flow.
+    A close catalog match (local_title) is suggested without asking the AI.
     """
     ctx = {"ai_suggested_title": None, "ai_message": None}
+    if local_title:
+        current_app.logger.info(f"'{user_search_input}' matches local movie '{local_title}'; AI skipped")
+        ctx["ai_suggested_title"] = local_title
+        return ctx
     current_app.logger.info(f"AI search for '{user_search_input}'")
     result = get_ai_interpreted_movie_title(user_search_input)
     if result == NO_CLEAR_MOVIE_TITLE_MARKER or result is None:
@@ -439,6 +624,59 @@ def _process_add_movie_form(
     )
 
 
+def _add_movie_lookup() -> tuple:
+    """
+    Decide, from the query string, what a GET of add_movie looks up:
+
+    * ("movie", movie_id): a catalog movie picked by ID;
+    * ("local", movie_id): the catalog movie with the searched title;
+    * ("omdb", title): an OMDb search for a title not in the catalog;
+    * ("matches", [movie dicts]): catalog movies matching the search input;
+    * ("ai", local_title): the AI interpretation of the search input, or
+      the title of a close catalog match (None if there is none);
+    * ("form", None): nothing, just the search form.
+
+    Made once per request through planned(), by the view or its planner.
+    """
+    mid = request.args.get("movie_to_add_id", type=int)
+    if mid:
+        return "movie", mid
+
+    title_search = request.args.get("title_for_omdb_search", "").strip()
+    if title_search:
+        local = _find_local_movie_by_title(title_search)
+        return ("local", local.id) if local else ("omdb", title_search)
+
+    user_input = request.args.get("user_search_input", "")
+    if not user_input:
+        return "form", None
+    if not request.args.get("skip_local"):
+        matches = data_manager.search_movies(user_input, limit=LOCAL_SEARCH_LIMIT)
+        if matches:
+            return "matches", [
+                {"id": m.id, "title": m.title, "year": m.year, "director": m.director}
+                for m in matches
+            ]
+    local = _find_local_movie_by_title(user_input, fuzzy=True)
+    return "ai", local.title if local else None
+
+
+@plans_upstream_calls("add_movie")
+def plan_add_movie_upstream_calls(user_id) -> list[UpstreamCall]:
+    """Return the OMDb/OpenRouter calls add_movie will make for this GET."""
+    if request.method != "GET":
+        return []
+    kind, value = planned("add_movie", _add_movie_lookup)
+    if kind == "omdb":
+        return [omdb_client.upstream_call(title=value)]
+    user_input = request.args.get("user_search_input", "")
+    temperature = DEFAULT_AI_TEMPERATURE_INTERPRET
+    if kind == "ai" and value is None and user_input \
+            and ai_title_cache.peek(_ai_title_cache_key(user_input, temperature)) is None:
+        return [_ai_title_upstream_call(user_input, temperature)]
+    return []
+
+
 @app.route("/users/<int:user_id>/add_movie", methods=["GET", "POST"])
 def add_movie(user_id):
     """
@@ -463,19 +701,19 @@ def add_movie(user_id):
         "show_details_form": False,
         "hide_initial_search_form": False,
         "source_movie_id_for_template": request.args.get("source_movie_id", type=int),
+        "local_matches": [],
     }
 
     if request.method == "GET":
-        mid = request.args.get("movie_to_add_id", type=int)
+        kind, value = planned("add_movie", _add_movie_lookup)
         title_search = request.args.get("title_for_omdb_search", "").strip()
-        orig_input = request.args.get("user_search_input", "")
 
-        if mid or title_search:
+        if kind in ("movie", "local", "omdb"):
             ctx["hide_initial_search_form"] = True
 
-        if mid:
-            current_app.logger.info(f"User {user_id} adding movie ID {mid}")
-            db_ctx = _prepare_movie_details_from_db_for_add_template(mid, user_id)
+        if kind == "movie":
+            current_app.logger.info(f"User {user_id} adding movie ID {value}")
+            db_ctx = _prepare_movie_details_from_db_for_add_template(value, user_id)
             ctx.update(db_ctx)
             if db_ctx.get("flash_message"):
                 flash(db_ctx["flash_message"][0], db_ctx["flash_message"][1])
@@ -486,18 +724,29 @@ def add_movie(user_id):
             if db_ctx.get("user_search_input"):
                 ctx["user_search_input_value"] = db_ctx["user_search_input"]
 
-        elif title_search:
-            current_app.logger.info(f"User {user_id} OMDb search '{title_search}'")
-            ctx["user_search_input_value"] = orig_input
-            omdb_ctx = _fetch_movie_details_from_omdb_for_add_template(title_search)
+        elif kind == "local":
+            current_app.logger.info(f"User {user_id} title '{title_search}' found locally ({value})")
+            ctx.update(_prepare_movie_details_from_db_for_add_template(value, user_id))
+            ctx["show_details_form"] = True
+
+        elif kind == "omdb":
+            current_app.logger.info(f"User {user_id} OMDb search '{value}'")
+            omdb_ctx = _fetch_movie_details_from_omdb_for_add_template(value)
             ctx.update(omdb_ctx)
             if omdb_ctx.get("flash_message"):
                 flash(omdb_ctx["flash_message"][0], omdb_ctx["flash_message"][1])
             if omdb_ctx.get("omdb", {}).get("Response") == "True":
                 ctx["show_details_form"] = True
 
-        elif ctx["user_search_input_value"]:
-            ai_ctx = _get_ai_suggestion_for_add_movie_template(ctx["user_search_input_value"])
+        elif kind == "matches":
+            current_app.logger.info(
+                f"User {user_id} search '{ctx['user_search_input_value']}' "
+                f"matched {len(value)} local movies"
+            )
+            ctx["local_matches"] = value
+
+        elif kind == "ai":
+            ai_ctx = _get_ai_suggestion_for_add_movie_template(ctx["user_search_input_value"], value)
             ctx.update(ai_ctx)
 
         return render_template("add_movie.html", **ctx)
@@ -549,14 +798,22 @@ def update_movie_rating(user_id, movie_id):
                 flash("Rating must be a number.", "warning")
                 return redirect(url_for("movie_page", movie_id=movie.id))
 
-        success = data_manager.update_user_rating_for_movie(
-            user_id=g.user.id, movie_id=movie.id, new_rating=new_rating
-        )
+        # The write expires loaded objects; keep what the redirect needs.
+        title = movie.title
+        if rating_queue is not None and rating_queue.submit(user_id, movie_id, new_rating):
+            # Acknowledged once logged. The redirect shows the queued rating
+            # (pending_for) and, once committed, reads it from the primary.
+            pin_client_to_primary(None)
+            success = True
+        else:
+            success = data_manager.update_user_rating_for_movie(
+                user_id=user_id, movie_id=movie_id, new_rating=new_rating
+            )
         if success:
-            flash(f"Your rating for '{movie.title}' updated.", "success")
-            return redirect(url_for("list_user_movies", user_id=g.user.id))
+            flash(f"Your rating for '{title}' updated.", "success")
+            return redirect(url_for("list_user_movies", user_id=user_id))
         flash("Could not update rating.", "error")
-        return redirect(url_for("movie_page", movie_id=movie.id))
+        return redirect(url_for("movie_page", movie_id=movie_id))
 
     return render_template(
         "update_movie_rating.html",
@@ -586,6 +843,7 @@ def delete_movie(user_id, movie_id):
 
 
 @app.route("/movie/<int:movie_id>")
+@conditional_response(tags=("movie:{movie_id}", "comments:{movie_id}"))
 def movie_details(movie_id):
     """
     JSON endpoint: return movie details and comments.
@@ -708,6 +966,8 @@ def movie_page(movie_id):
         return render_template(
             "movie_detail_page.html",
             movie=movie,
+            comments=data_manager.get_comments_for_movie(movie.id),
+            saved_together=data_manager.get_saved_together(movie.id, limit=SAVED_TOGETHER_LIMIT),
             user=g.user,
             is_movie_in_user_list=in_list,
             current_user_rating_for_movie=rating,
@@ -769,12 +1029,12 @@ def add_movie_to_list(movie_id):
         flash("Login required to add movies.", "warning")
         return redirect(url_for("movie_page", movie_id=movie_id))
 
+    movie = data_manager.get_movie_by_id(movie_id)
+    title = movie.title if movie else f"ID {movie_id}"
     success = data_manager.add_existing_movie_to_user_list(
         user_id=g.user.id, movie_id=movie_id
     )
     if success:
-        m = data_manager.get_movie_by_id(movie_id)
-        title = m.title if m else f"ID {movie_id}"
         flash(f"'{title}' added to your list.", "success")
     else:
         flash("Could not add movie.", "danger")
@@ -800,34 +1060,140 @@ def remove_movie_from_list(movie_id):
     return redirect(url_for("movie_page", movie_id=movie_id))
 
 
-@app.route("/movie/<int:movie_id>/ai_recommendations")
-def get_ai_movie_recommendations_route(movie_id):
+def _lists_version() -> Optional[str]:
+    """Version of every user's list, shared by all workers (None on error)."""
+    found = data_manager.get_version(["users"])
+    return found[0] if found else None
+
+
+@data_changed.connect
+def mark_recommender_stale(sender, tags=None, **extra):
+    """Rebuild similarities after list or rating changes (tagged per user)."""
+    if tags is None or any(tag.startswith("user:") for tag in tags):
+        recommender.mark_stale()
+
+
+@rating_changed.connect
+def queue_cooccurrence_update(sender, user_id=None, movie_id=None, action=None, **extra):
     """
-    Return JSON list of AI-based recommendations for a movie.
+    Update saved-together pairs for movies added to or removed from a list.
+    Deleted movies take their pairs with them in delete_movie.
     """
-    movie = data_manager.get_movie_by_id(movie_id)
-    if not movie:
-        current_app.logger.warning(f"AI recs requested for invalid movie {movie_id}.")
-        return jsonify({"success": False, "message": "Movie not found."}), 404
+    if action in ("saved", "removed"):
+        cooccurrence_indexer.submit(user_id, movie_id)
 
-    uid = session.get("user_id", "Guest")
-    history = session.get(AI_RECOMMENDATION_HISTORY_SESSION_KEY, [])
+
+def _run_in_app_thread(func) -> None:
+    """Run func in a daemon thread inside this app's context."""
+    def run():
+        with app.app_context():
+            try:
+                func()
+            except Exception as e:
+                app.logger.error(f"Background task failed: {e}")
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _update_recommendation_history(history: list[str], titles: list[str]) -> list[str]:
+    """Append new titles to the session history, keeping the last N."""
+    updated = list(history)
+    for title_str in titles:
+        if title_str.lower().strip() not in [h.lower().strip() for h in updated]:
+            updated.append(title_str)
+    if len(updated) > AI_RECOMMENDATION_HISTORY_LENGTH:
+        updated = updated[-AI_RECOMMENDATION_HISTORY_LENGTH:]
+    session[AI_RECOMMENDATION_HISTORY_SESSION_KEY] = updated
+    return updated
+
+
+def _get_local_recommendations(movie: Movie, history: list[str]) -> list[dict]:
+    """
+    Return movies most similar to this one, from the item-similarity index.
+    While the index is still being built, the movies most often saved
+    together with it are used instead. Titles already shown this session
+    are skipped unless nothing else is left. Empty for movies without
+    neighbours. Made once per request through planned(), by the view or
+    its planner.
+    """
+    if recommender.is_built:
+        neighbour_ids = [mid for mid, _ in recommender.neighbours(movie.id, limit=recommender.top_k)]
+        movies = data_manager.get_movies_by_ids(neighbour_ids) if neighbour_ids else []
+    else:
+        movies = [m for m, _ in data_manager.get_saved_together(movie.id, limit=recommender.top_k)]
+    if not movies:
+        return []
+
+    seen = {h.lower().strip() for h in history}
+    fresh = [m for m in movies if m.title.lower().strip() not in seen]
+    picks = (fresh or movies)[:RECOMMENDATIONS_PER_REQUEST]
+    return [{"title": m.title, "year": m.year, "movie_id": m.id} for m in picks]
+
+
+def _ai_recommendation_prompt(movie: Movie, history: list[str]) -> str:
+    """Build the AI recommendation prompt, excluding titles already shown."""
     exclusion_text = ""
     if history:
         exclude_list = "\n".join([f"- \"{t}\"" for t in history])
         exclusion_text = EXCLUSION_CLAUSE_TEMPLATE.format(movies_to_exclude_list_format=exclude_list)
-
-    prompt = MOVIE_RECOMMENDATION_PROMPT_TEMPLATE.format(
+    return MOVIE_RECOMMENDATION_PROMPT_TEMPLATE.format(
         movie_title=movie.title, exclusion_clause=exclusion_text
     )
-    current_app.logger.debug(f"AI prompt for recs (user {uid}, movie '{movie.title}'):\n{prompt}")
 
+
+def _ai_recommendation_temperature() -> float:
+    """Return the 'temp' query parameter if valid (0-2), else the default."""
     try:
         temp_str = request.args.get("temp", str(DEFAULT_AI_TEMPERATURE_RECOMMEND))
-        temp = float(temp_str) if 0.0 <= float(temp_str) <= 2.0 else DEFAULT_AI_TEMPERATURE_RECOMMEND
+        return float(temp_str) if 0.0 <= float(temp_str) <= 2.0 else DEFAULT_AI_TEMPERATURE_RECOMMEND
     except ValueError:
         current_app.logger.warning(f"Invalid temp '{request.args.get('temp')}', using default.")
-        temp = DEFAULT_AI_TEMPERATURE_RECOMMEND
+        return DEFAULT_AI_TEMPERATURE_RECOMMEND
+
+
+@plans_upstream_calls("get_ai_movie_recommendations_route")
+def plan_ai_recommendation_upstream_calls(movie_id) -> list[UpstreamCall]:
+    """
+    Return the OpenRouter call get_ai_movie_recommendations_route will make,
+    i.e. none when the movie is unknown or has local recommendations.
+    """
+    movie = data_manager.get_movie_by_id(movie_id)
+    if not movie:
+        return []
+    history = session.get(AI_RECOMMENDATION_HISTORY_SESSION_KEY, [])
+    if planned("local_recommendations", lambda: _get_local_recommendations(movie, history)):
+        return []
+    prompt = _ai_recommendation_prompt(movie, history)
+    return [openrouter_upstream_call(prompt, _ai_recommendation_temperature(), expected_responses=5)]
+
+
+@app.route("/movie/<int:movie_id>/ai_recommendations")
+def get_ai_movie_recommendations_route(movie_id):
+    """
+    Return JSON list of recommendations for a movie: similar movies from
+    CineCrowd lists, or AI suggestions for movies nobody has saved alongside others.
+    """
+    movie = data_manager.get_movie_by_id(movie_id)
+    if not movie:
+        current_app.logger.warning(f"AI recs requested for invalid movie {movie_id}.")
+        return jsonify({"success": False, "message": "Movie not found."}), 404
+
+    uid = session.get("user_id", "Guest")
+    history = session.get(AI_RECOMMENDATION_HISTORY_SESSION_KEY, [])
+
+    recommender.refresh(data_manager.iter_user_movie_ratings, _run_in_app_thread, _lists_version)
+    local_recs = planned("local_recommendations", lambda: _get_local_recommendations(movie, history))
+    if local_recs:
+        _update_recommendation_history(history, [rec["title"] for rec in local_recs])
+        current_app.logger.info(f"Local recs for '{movie.title}': {[rec['title'] for rec in local_recs]}")
+        return (
+            jsonify({"success": True, "recommendations": local_recs, "source": "local", "message": "Loaded."}),
+            200,
+        )
+
+    prompt = _ai_recommendation_prompt(movie, history)
+    current_app.logger.debug(f"AI prompt for recs (user {uid}, movie '{movie.title}'):\n{prompt}")
+    temp = _ai_recommendation_temperature()
 
     ai_responses = ask_openrouter_for_movies(prompt_content=prompt, temperature=temp, expected_responses=5)
     if not ai_responses:
@@ -871,18 +1237,11 @@ def get_ai_movie_recommendations_route(movie_id):
     recs_structured = [{"title": t, "year": None} for t in unique[:5] if isinstance(t, str) and t]
 
     if recs_structured:
-        updated = list(history)
-        for rec in recs_structured:
-            title_str = rec["title"]
-            if title_str.lower().strip() not in [h.lower().strip() for h in updated]:
-                updated.append(title_str)
-        if len(updated) > AI_RECOMMENDATION_HISTORY_LENGTH:
-            updated = updated[-AI_RECOMMENDATION_HISTORY_LENGTH:]
-        session[AI_RECOMMENDATION_HISTORY_SESSION_KEY] = updated
+        updated = _update_recommendation_history(history, [rec["title"] for rec in recs_structured])
         current_app.logger.info(f"Updated AI history for user {uid}: {updated}")
 
         return (
-            jsonify({"success": True, "recommendations": recs_structured, "message": "Loaded."}),
+            jsonify({"success": True, "recommendations": recs_structured, "source": "ai", "message": "Loaded."}),
             200,
         )
 
@@ -899,6 +1258,12 @@ def ask_openrouter_for_movies(
     """
     Send prompt to OpenRouter API; return list of titles or error messages.
     """
+    prefetched = take_prefetched(
+        openrouter_upstream_call(prompt_content, temperature, expected_responses).key
+    )
+    if prefetched is not MISSING:
+        return prefetched
+
     if not OPENROUTER_API_KEY:
         current_app.logger.error("OpenRouter API key missing.")
         return [AI_MSG_OPENROUTER_KEY_MISSING]
@@ -907,56 +1272,84 @@ def ask_openrouter_for_movies(
         f"Sending prompt to AI (model={AI_MODEL_FOR_REQUESTS}, temp={temperature}):\n{prompt_content[:200]}..."
     )
     try:
-        resp = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
+        resp = http_client.post(
+            url=OPENROUTER_URL,
             headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
-            data=json.dumps(
-                {
-                    "model": AI_MODEL_FOR_REQUESTS,
-                    "messages": [{"role": "user", "content": prompt_content}],
-                    "temperature": temperature,
-                    "max_tokens": 150 if expected_responses > 1 else 50,
-                }
-            ),
+            data=json.dumps(_openrouter_request_body(prompt_content, temperature, expected_responses)),
             timeout=20,
+            upstream="openrouter",
         )
         resp.raise_for_status()
-        data = resp.json()
-        raw = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-
-        if raw:
-            if expected_responses == 1:
-                if raw == "NO_CLEAR_MOVIE_TITLE_FOUND":
-                    return ["NO_CLEAR_MOVIE_TITLE_FOUND"]
-                cleaned = _clean_ai_single_movie_title_response(raw)
-                current_app.logger.debug(f"AI single response: '{raw}' -> '{cleaned}'")
-                return [cleaned] if cleaned else []
-            titles = _clean_ai_movie_list_response(raw)
-            current_app.logger.debug(f"AI list response: '{raw}' -> {titles}")
-            return titles
-
-        current_app.logger.warning("No content from AI.")
-        return ([AI_MSG_NO_SUGGESTIONS_LIST] if expected_responses > 1 else [NO_CLEAR_MOVIE_TITLE_MARKER])
+        return _titles_from_openrouter_response(resp.json(), expected_responses)
 
     except requests.exceptions.Timeout:
         current_app.logger.error("AI request timed out.")
         return [AI_MSG_REQUEST_TIMEOUT]
     except requests.exceptions.RequestException as err:
         current_app.logger.error(f"AI request exception: {err}.")
-        user_err = AI_MSG_CONNECTION_ERROR_GENERIC
         if err.response is not None:
-            try:
-                detail = err.response.json().get("error", {}).get("message", str(err))
-                user_err = AI_MSG_API_ERROR_DETAILED_TEMPLATE.format(error_message=detail)
-            except ValueError:
-                detail = f"{err.response.status_code} - {err.response.text[:100]}"
-                user_err = AI_MSG_API_ERROR_DETAILED_TEMPLATE.format(error_message=detail)
-        return [user_err]
+            return [_openrouter_api_error_message(err.response, err)]
+        return [AI_MSG_CONNECTION_ERROR_GENERIC]
     except Exception as err:
         current_app.logger.error(f"Generic AI error: {err}")
         return [AI_MSG_UNEXPECTED_ERROR_TEMPLATE.format(error_message=str(err))]
 
 
+def openrouter_upstream_call(
+    prompt_content: str,
+    temperature: float,
+    expected_responses: int = 5,
+    memo: Optional[MemoCache] = None,
+) -> UpstreamCall:
+    """Describe an ask_openrouter_for_movies() call, for prefetching under ASGI."""
+    return UpstreamCall(
+        "openrouter",
+        ("openrouter", prompt_content, temperature, expected_responses),
+        memo=memo,
+        prompt_content=prompt_content,
+        temperature=temperature,
+        expected_responses=expected_responses,
+    )
+
+
+def _openrouter_request_body(prompt_content: str, temperature: float, expected_responses: int) -> dict:
+    """Return the chat completion request body for a prompt."""
+    return {
+        "model": AI_MODEL_FOR_REQUESTS,
+        "messages": [{"role": "user", "content": prompt_content}],
+        "temperature": temperature,
+        "max_tokens": 150 if expected_responses > 1 else 50,
+    }
+
+
+def _titles_from_openrouter_response(data: dict, expected_responses: int) -> list[str]:
+    """Extract cleaned titles (or a no-result marker) from a chat completion."""
+    raw = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+    if raw:
+        if expected_responses == 1:
+            if raw == "NO_CLEAR_MOVIE_TITLE_FOUND":
+                return ["NO_CLEAR_MOVIE_TITLE_FOUND"]
+            cleaned = _clean_ai_single_movie_title_response(raw)
+            current_app.logger.debug(f"AI single response: '{raw}' -> '{cleaned}'")
+            return [cleaned] if cleaned else []
+        titles = _clean_ai_movie_list_response(raw)
+        current_app.logger.debug(f"AI list response: '{raw}' -> {titles}")
+        return titles
+
+    current_app.logger.warning("No content from AI.")
+    return ([AI_MSG_NO_SUGGESTIONS_LIST] if expected_responses > 1 else [NO_CLEAR_MOVIE_TITLE_MARKER])
+
+
+def _openrouter_api_error_message(response, err: Exception) -> str:
+    """Return the user-facing message for an OpenRouter error response."""
+    try:
+        detail = response.json().get("error", {}).get("message", str(err))
+    except ValueError:
+        detail = f"{response.status_code} - {response.text[:100]}"
+    return AI_MSG_API_ERROR_DETAILED_TEMPLATE.format(error_message=detail)
+
+
 def _clean_ai_single_movie_title_response(raw_content: str) -> str:
     """
     Clean a single movie title from AI output.
@@ -1004,5 +1397,32 @@ def _clean_ai_movie_list_response(raw_content: str) -> list[str]:
     return titles
 
 
+@app.cli.command("recompute-ratings")
+def recompute_ratings_command():
+    """Rebuild all community rating aggregates in one bulk pass."""
+    if data_manager.recompute_all_community_ratings():
+        print("Community ratings recomputed.")
+    else:
+        print("Recomputing community ratings failed; see log.")
+
+
+@app.cli.command("rebuild-cooccurrence")
+def rebuild_cooccurrence_command():
+    """Rebuild the saved-together index from all user lists."""
+    if data_manager.rebuild_cooccurrence():
+        print("Co-occurrence index rebuilt.")
+    else:
+        print("Rebuilding co-occurrence index failed; see log.")
+
+
+@app.cli.command("db-settings")
+def db_settings_command():
+    """Print the effective settings of the primary and replica engines."""
+    for bind_key, engine in db.engines.items():
+        print(f"[{bind_key or 'primary'}]")
+        for name, value in describe_engine(engine).items():
+            print(f"{name}: {value}")
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,225 @@
+"""
+asgi.py
+
+ASGI entry point for CineCrowd:
+
+    uvicorn asgi:application
+
+Views that wait on OMDb or OpenRouter (add_movie, the movie recommendations
+endpoint and /api/omdb_proxy) register a planner that says which upstream
+calls the request will make. Those calls are awaited here on the event loop
+with a pooled aiohttp client, so a single worker can hold hundreds of them in
+flight. The Flask view then runs in a worker thread with the results in its
+environ, along with the branch decisions the planner made, and returns
+without touching the network or repeating the planner's queries.
+Everything else is passed straight to the Flask app in the same thread pool.
+"""
+
+import asyncio
+import functools
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from flask import Flask
+from werkzeug.exceptions import HTTPException
+
+from app import (
+    AI_MSG_CONNECTION_ERROR_GENERIC,
+    AI_MSG_OPENROUTER_KEY_MISSING,
+    AI_MSG_REQUEST_TIMEOUT,
+    AI_MSG_UNEXPECTED_ERROR_TEMPLATE,
+    OPENROUTER_API_KEY,
+    OPENROUTER_URL,
+    _openrouter_api_error_message,
+    _openrouter_request_body,
+    _titles_from_openrouter_response,
+    app,
+    omdb_client,
+)
+from services.async_http_client import AsyncHttpClient, create_async_http_client
+from services.prefetch import (
+    PLANNED_ENVIRON_KEY, PREFETCH_ENVIRON_KEY, UPSTREAM_PLANNERS, UpstreamCall,
+)
+
+# Threads for Flask views, planners and DB work; upstream waits use none.
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", "16"))
+
+
+async def ask_openrouter_for_movies_async(
+    flask_app: Flask,
+    http_client: AsyncHttpClient,
+    prompt_content: str,
+    temperature: float,
+    expected_responses: int = 5,
+) -> list[str]:
+    """
+    ask_openrouter_for_movies() on the event loop; returns the same list of
+    titles or error messages.
+    """
+    if not OPENROUTER_API_KEY:
+        flask_app.logger.error("OpenRouter API key missing.")
+        return [AI_MSG_OPENROUTER_KEY_MISSING]
+    try:
+        resp = await http_client.post(
+            OPENROUTER_URL,
+            headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
+            data=json.dumps(_openrouter_request_body(prompt_content, temperature, expected_responses)),
+            timeout=20,
+            upstream="openrouter",
+        )
+        resp.raise_for_status()
+        with flask_app.app_context():
+            return _titles_from_openrouter_response(resp.json(), expected_responses)
+    except requests.exceptions.Timeout:
+        flask_app.logger.error("AI request timed out.")
+        return [AI_MSG_REQUEST_TIMEOUT]
+    except requests.exceptions.RequestException as err:
+        flask_app.logger.error(f"AI request exception: {err}.")
+        if err.response is not None:
+            return [_openrouter_api_error_message(err.response, err)]
+        return [AI_MSG_CONNECTION_ERROR_GENERIC]
+    except Exception as err:
+        flask_app.logger.error(f"Generic AI error: {err}")
+        return [AI_MSG_UNEXPECTED_ERROR_TEMPLATE.format(error_message=str(err))]
+
+
+class _WsgiInstance(WsgiToAsgiInstance):
+    """
+    Runs the WSGI app for one request on the given executor, with prefetched
+    upstream results and planner decisions added to the environ.
+    """
+
+    def __init__(self, wsgi_application, executor: ThreadPoolExecutor, extra_environ: Optional[dict] = None):
+        super().__init__(wsgi_application)
+        self.executor = executor
+        self.extra_environ = extra_environ
+
+    def build_environ(self, scope, body):
+        environ = super().build_environ(scope, body)
+        if self.extra_environ:
+            environ.update(self.extra_environ)
+        return environ
+
+    async def run_wsgi_app(self, body):
+        # The base class pins every request to one shared thread.
+        run = WsgiToAsgiInstance.__dict__["run_wsgi_app"].func
+        await sync_to_async(run, thread_sensitive=False, executor=self.executor)(self, body)
+
+
+class AsyncUpstreamApp:
+    """
+    ASGI application wrapping the Flask app.
+
+    Args:
+        flask_app: The Flask application.
+        threads: Size of the thread pool for views and DB work.
+    """
+
+    def __init__(self, flask_app: Flask, threads: int = ASGI_THREADS):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="asgi")
+        self.http_client: Optional[AsyncHttpClient] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        extra_environ = await self._prefetch(scope) if scope["type"] == "http" else None
+        await _WsgiInstance(self.flask_app, self.executor, extra_environ)(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.http_client = create_async_http_client()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.http_client is not None:
+                    await self.http_client.aclose()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def run_sync(self, func, *args):
+        """Run func(*args) in the thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def run_in_app_context(self, func, *args):
+        """Run func(*args) in the thread pool inside an app context."""
+        def call():
+            with self.flask_app.app_context():
+                return func(*args)
+        return await self.run_sync(call)
+
+    async def _prefetch(self, scope) -> Optional[dict]:
+        """
+        Await the upstream calls the matched view will make. Returns the
+        environ entries for the view: results by key and planner decisions.
+        """
+        if scope["method"] != "GET":
+            return None
+        builder = WsgiToAsgiInstance(self.flask_app)
+        builder.scope = scope
+        environ = builder.build_environ(scope, io.BytesIO())
+        try:
+            endpoint, view_args = self.flask_app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return None
+        planner = UPSTREAM_PLANNERS.get(endpoint)
+        if planner is None:
+            return None
+
+        calls = await self.run_sync(self._plan, planner, environ, view_args)
+        results = await asyncio.gather(*(self._perform(call) for call in calls))
+        return {
+            PREFETCH_ENVIRON_KEY: {call.key: result for call, result in zip(calls, results)},
+            PLANNED_ENVIRON_KEY: environ.get(PLANNED_ENVIRON_KEY, {}),
+        }
+
+    def _plan(self, planner, environ: dict, view_args: dict) -> list[UpstreamCall]:
+        with self.flask_app.request_context(environ):
+            try:
+                return planner(**view_args)
+            except Exception as e:
+                # The view will make its own decisions and upstream calls.
+                self.flask_app.logger.error(f"Upstream planner {planner.__name__} failed: {e}")
+                environ.pop(PLANNED_ENVIRON_KEY, None)
+                return []
+
+    async def _perform(self, call: UpstreamCall):
+        """
+        Make one upstream call, shared with identical concurrent calls
+        through call.memo if set. Failures are returned as the exception the
+        sync client would have raised, so the view handles them unchanged.
+        """
+        if self.http_client is None:
+            # Servers without lifespan support.
+            self.http_client = create_async_http_client()
+        async def fetch():
+            if call.kind == "omdb":
+                return await omdb_client.lookup_async(
+                    self.http_client, self.run_in_app_context, **call.kwargs
+                )
+            return await ask_openrouter_for_movies_async(
+                self.flask_app, self.http_client, **call.kwargs
+            )
+
+        try:
+            if call.memo is not None:
+                # The view memoizes the answer itself; only the request is shared.
+                return await call.memo.get_or_compute_async(
+                    call.key, fetch, cache_if=lambda result: False
+                )
+            return await fetch()
+        except Exception as err:
+            return err
+
+
+application = AsyncUpstreamApp(app)
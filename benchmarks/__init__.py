@@ -0,0 +1,5 @@
+"""
+benchmarks package: load benchmarks for MovieWeb, run as modules, e.g.
+
+    python -m benchmarks.async_vs_sync
+"""
@@ -0,0 +1,211 @@
+"""
+benchmarks/async_vs_sync.py
+
+Compares throughput of the upstream-bound routes served by sync Flask
+workers and by the ASGI entry point (asgi.py), against a local fake
+OMDb/OpenRouter server with fixed latency.
+
+    python -m benchmarks.async_vs_sync --requests 400 --concurrency 200 --threads 16
+
+Sync mode models a WSGI server with 'threads' worker threads: each thread
+drives the Flask test client. Async mode sends 'concurrency' requests at a
+time through the ASGI app, whose thread pool also has 'threads' threads.
+Every request looks up a different title, so nothing is served from cache.
+Both modes run in-process, so no HTTP server overhead is included.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _FakeUpstreamHandler(BaseHTTPRequestHandler):
+    """Answers GET like OMDb and POST like OpenRouter after a fixed delay."""
+
+    protocol_version = "HTTP/1.1"
+    latency = 0.2
+
+    def _reply(self, payload: dict):
+        time.sleep(self.latency)
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply({"Response": "True", "Title": "Heat", "Year": "1995", "imdbID": "tt0113277"})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply({"choices": [{"message": {"content": "Heat\nRonin\nThief"}}]})
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve_fake_upstream(latency: float, ports) -> None:
+    _FakeUpstreamHandler.latency = latency
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeUpstreamHandler)
+    server.daemon_threads = True
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_fake_upstream(latency: float) -> tuple[multiprocessing.Process, int]:
+    """
+    Start the fake upstream on a free local port in a separate process, so
+    its threads do not compete with the app for the GIL. Returns (process, port).
+    """
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_serve_fake_upstream, args=(latency, ports), daemon=True
+    )
+    process.start()
+    return process, ports.get(timeout=10)
+
+
+def summarize(mode: str, latencies: list[float], elapsed: float, statuses: list[int]) -> dict:
+    """Return throughput and latency percentiles for one run."""
+    ordered = sorted(latencies)
+    quantiles = statistics.quantiles(ordered, n=100)
+    return {
+        "mode": mode,
+        "requests": len(ordered),
+        "errors": sum(1 for status in statuses if status != 200),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 1),
+        "p95_ms": round(quantiles[94] * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def run_sync(flask_app, urls: list[str], threads: int) -> dict:
+    """Serve urls with a pool of sync worker threads."""
+    def fetch(url):
+        started = time.perf_counter()
+        status = flask_app.test_client().get(url).status_code
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+    return summarize("sync", [r[0] for r in results], elapsed, [r[1] for r in results])
+
+
+async def call_asgi(asgi_app, url: str) -> int:
+    """Send one GET for url straight into an ASGI app; return the status."""
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await asgi_app(scope, receive, send)
+    return status[0]
+
+
+def run_async(asgi_app, urls: list[str], concurrency: int) -> dict:
+    """Serve urls through the ASGI app with at most 'concurrency' in flight."""
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with limit:
+                started = time.perf_counter()
+                status = await call_asgi(asgi_app, url)
+                return time.perf_counter() - started, status
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(fetch(url) for url in urls))
+        elapsed = time.perf_counter() - started
+        if asgi_app.http_client is not None:
+            await asgi_app.http_client.aclose()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(main())
+    return summarize("async", [r[0] for r in results], elapsed, [r[1] for r in results])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake upstream delay (s)")
+    parser.add_argument("--route", choices=["omdb_proxy", "ai_recommendations"], default="omdb_proxy")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    upstream_process, port = start_fake_upstream(args.latency)
+    upstream = f"http://127.0.0.1:{port}"
+    workdir = tempfile.mkdtemp(prefix="movieweb-bench-")
+    os.environ.update(
+        DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        OMDB_API_KEY="bench",
+        OPENROUTER_API_KEY="bench",
+        OMDB_URL=f"{upstream}/",
+        OPENROUTER_URL=f"{upstream}/chat",
+        HTTP_POOL_MAXSIZE=str(args.threads),
+        HTTP_ASYNC_MAX_CONNECTIONS=str(args.concurrency),
+        AI_TITLE_CACHE_TTL="0",
+    )
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import app, data_manager
+    from asgi import AsyncUpstreamApp
+    from models import db
+
+    with app.app_context():
+        db.create_all()
+        movie_ids = [
+            data_manager.add_movie_globally({"imdbID": f"tt{i:07d}", "Title": f"Bench {i}", "Year": "2000"}).id
+            for i in range(2)
+        ]
+
+    def urls(mode):
+        if args.route == "omdb_proxy":
+            return [f"/api/omdb_proxy?title={mode}-{i}" for i in range(args.requests)]
+        # Cold-start movies without neighbours always go to OpenRouter.
+        return [f"/movie/{movie_ids[i % 2]}/ai_recommendations?temp={i % 20 / 10}" for i in range(args.requests)]
+
+    results = [
+        run_sync(app, urls("sync"), args.threads),
+        run_async(AsyncUpstreamApp(app, threads=args.threads), urls("async"), args.concurrency),
+    ]
+    upstream_process.terminate()
+
+    if args.json:
+        print(json.dumps({"args": vars(args), "results": results}, indent=2))
+    else:
+        print(f"route={args.route} requests={args.requests} threads={args.threads} "
+              f"concurrency={args.concurrency} upstream latency={args.latency}s")
+        for r in results:
+            print(f"{r['mode']:>6}: {r['throughput_rps']:8.1f} req/s  p50 {r['p50_ms']:7.1f} ms  "
+                  f"p95 {r['p95_ms']:7.1f} ms  max {r['max_ms']:7.1f} ms  errors {r['errors']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
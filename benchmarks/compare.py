@@ -0,0 +1,68 @@
+"""
+benchmarks/compare.py
+
+Compares two JSON reports of benchmarks/suite.py, e.g. from two commits.
+
+    python -m benchmarks.compare base.json new.json --threshold 0.10
+
+Prints p50/p95/p99 latency and queries per request of every scenario in
+both reports with the relative change, and exits with status 1 if any of
+them got worse by more than --threshold (a fraction).
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries")
+
+
+def _value(result: dict, metric: str) -> float:
+    if metric == "queries":
+        return result["queries_per_request"]["mean"]
+    return result[metric]
+
+
+def compare(base: dict, new: dict, threshold: float) -> tuple[list[str], list[str]]:
+    """Return (report lines, regressions) for the scenarios in both reports."""
+    lines, regressions = [], []
+    for name, new_result in new["scenarios"].items():
+        base_result = base["scenarios"].get(name)
+        if base_result is None:
+            lines.append(f"{name}: not in base report")
+            continue
+        cells = []
+        for metric in METRICS:
+            before, after = _value(base_result, metric), _value(new_result, metric)
+            change = (after - before) / before if before else (1.0 if after else 0.0)
+            cells.append(f"{metric} {before:g} -> {after:g} ({change:+.0%})")
+            if change > threshold:
+                regressions.append(f"{name} {metric} {change:+.0%}")
+        lines.append(f"{name}: " + ", ".join(cells))
+    return lines, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"base {base['meta']['commit']} -> new {new['meta']['commit']}")
+    if base["meta"]["dataset"] != new["meta"]["dataset"]:
+        print("warning: the reports used different datasets")
+    lines, regressions = compare(base, new, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"regressions over {args.threshold:.0%}: " + "; ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+benchmarks/datagen.py
+
+Deterministic synthetic dataset for the benchmark suite: users, movies,
+user_movies links (with ratings), comments, list-save history and the
+derived aggregates and indexes, at a configurable scale.
+
+    python -m benchmarks.datagen --scale 100k --db /tmp/movieweb-100k.db
+
+The same --scale and --seed always produce the same rows; only the
+list-save days are anchored at the generation date, so the "Trending"
+window is populated. Movie popularity is skewed (low movie ids are saved
+most), and movie 1 additionally gets --hot-comments comments, for the
+movie page scenario. The saved-together index grows fastest (about 17M
+pairs at 1m links); skip it with --no-cooccurrence at 10m.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+# name: (users, movies, links, comments)
+SCALES = {
+    "1k": (50, 200, 1_000, 1_000),
+    "10k": (500, 2_000, 10_000, 5_000),
+    "100k": (5_000, 10_000, 100_000, 20_000),
+    "1m": (50_000, 50_000, 1_000_000, 100_000),
+    "10m": (500_000, 200_000, 10_000_000, 500_000),
+}
+DEFAULT_HOT_COMMENTS = 10_000
+HOT_MOVIE_ID = 1
+CHUNK_SIZE = 20_000
+# Share of saved movies that carry a rating.
+RATED_SHARE = 0.7
+# Days over which list saves are spread (the trending window looks back from today).
+SAVE_HISTORY_DAYS = 30
+COMMENTS_START = datetime(2024, 1, 1)
+
+WORDS = (
+    "night", "city", "river", "last", "silent", "red", "storm", "garden", "ghost",
+    "summer", "iron", "lost", "golden", "dark", "wild", "blue", "broken", "secret",
+    "long", "road", "heart", "king", "winter", "fire", "glass", "stone", "paper",
+    "star", "ocean", "shadow", "empire", "dream", "echo", "hunter", "machine",
+)
+GENRES = (
+    "Drama", "Comedy", "Thriller", "Action", "Crime", "Romance", "Sci-Fi",
+    "Horror", "Animation", "Documentary", "Adventure", "Mystery",
+)
+FIRST_NAMES = (
+    "Ana", "Ben", "Chen", "Dara", "Eli", "Farah", "Gus", "Hana", "Ivan", "Jin",
+    "Kofi", "Lena", "Mateo", "Noor", "Omar", "Priya", "Rosa", "Sam", "Tomas", "Yuki",
+)
+LAST_NAMES = (
+    "Abe", "Brandt", "Costa", "Diaz", "Eriksen", "Fischer", "Garcia", "Haddad",
+    "Ito", "Jensen", "Kowalski", "Lopez", "Mensah", "Novak", "Okafor", "Petrov",
+)
+
+
+def user_name(user_id: int) -> str:
+    """Name of the generated user with this id."""
+    return f"user{user_id:07d}"
+
+
+def _person(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _movie_records(movies: int, rng: random.Random) -> Iterator[dict]:
+    """OMDb-shaped records, as the bulk importer receives them."""
+    for i in range(1, movies + 1):
+        words = rng.sample(WORDS, rng.randint(1, 3))
+        yield {
+            "imdbID": f"tt{i:07d}",
+            "Title": " ".join(words).title(),
+            "Year": str(rng.randint(1950, 2024)),
+            "Director": _person(rng),
+            "Actors": ", ".join(_person(rng) for _ in range(3)),
+            "Genre": ", ".join(rng.sample(GENRES, 2)),
+            "Plot": f"A {rng.choice(WORDS)} story about the {rng.choice(WORDS)} {rng.choice(WORDS)}.",
+            "Runtime": f"{rng.randint(75, 180)} min",
+            "imdbRating": f"{rng.uniform(3, 9):.1f}",
+        }
+
+
+def _chunks(rows: Iterator[dict], size: int = CHUNK_SIZE) -> Iterator[list[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _popular_movie(movies: int, rng: random.Random) -> int:
+    """A movie id, skewed so low ids are picked far more often."""
+    return int(movies * rng.random() ** 3) + 1
+
+
+def _links(users: int, movies: int, links: int, rng: random.Random) -> Iterator[dict]:
+    """'links' distinct (user, movie) pairs, spread evenly over users."""
+    per_user, extra = divmod(links, users)
+    for user_id in range(1, users + 1):
+        count = min(per_user + (user_id <= extra), movies)
+        chosen = set()
+        while len(chosen) < count:
+            chosen.add(_popular_movie(movies, rng))
+        for movie_id in sorted(chosen):
+            rating = rng.randint(1, 5) if rng.random() < RATED_SHARE else None
+            yield {"user_id": user_id, "movie_id": movie_id, "user_rating": rating}
+
+
+def _comments(users: int, movies: int, comments: int, hot_comments: int,
+              rng: random.Random) -> Iterator[dict]:
+    """'comments' comments on popular movies, then 'hot_comments' on HOT_MOVIE_ID."""
+    for n in range(comments + hot_comments):
+        movie_id = _popular_movie(movies, rng) if n < comments else HOT_MOVIE_ID
+        yield {
+            "user_id": rng.randint(1, users),
+            "movie_id": movie_id,
+            "text": " ".join(rng.choices(WORDS, k=rng.randint(4, 20))).capitalize() + ".",
+            "created_at": COMMENTS_START + timedelta(minutes=n),
+            "likes_count": int(rng.random() ** 4 * 50),
+        }
+
+
+def generate(path: str, scale: str = "10k", seed: int = 42,
+             hot_comments: int = DEFAULT_HOT_COMMENTS, cooccurrence: bool = True,
+             log=print) -> dict:
+    """
+    Create the SQLite database at path (which must not exist) filled with
+    the dataset of 'scale'. Returns the row counts.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    users, movies, links, comments = SCALES[scale]
+    os.environ["DATABASE_URI"] = f"sqlite:///{os.path.abspath(path)}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from sqlalchemy import func, insert, literal, select
+
+    import init_db
+    from datamanager import create_data_manager
+    from models import Comment, MovieDailySaves, User, UserMovie, db
+
+    app = init_db.create_app()
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        data_manager = create_data_manager(app.config["SQLALCHEMY_DATABASE_URI"])
+
+        log(f"movies: {movies}")
+        for chunk in _chunks(_movie_records(movies, rng), 5_000):
+            data_manager.bulk_add_movies_globally(chunk)
+
+        log(f"users: {users}")
+        for chunk in _chunks({"id": n, "name": user_name(n)} for n in range(1, users + 1)):
+            db.session.execute(insert(User), chunk)
+
+        log(f"links: {links}")
+        for chunk in _chunks(_links(users, movies, links, rng)):
+            db.session.execute(insert(UserMovie), chunk)
+
+        log(f"comments: {comments} + {hot_comments} on movie {HOT_MOVIE_ID}")
+        for chunk in _chunks(_comments(users, movies, comments, hot_comments, rng)):
+            db.session.execute(insert(Comment), chunk)
+        db.session.commit()
+
+        log("list-save history, aggregates and indexes")
+        today = date.today()
+        for offset in range(SAVE_HISTORY_DAYS):
+            db.session.execute(
+                insert(MovieDailySaves).from_select(
+                    ["movie_id", "day", "saves"],
+                    select(UserMovie.movie_id, literal(today - timedelta(days=offset)), func.count())
+                    .where(UserMovie.id % SAVE_HISTORY_DAYS == offset)
+                    .group_by(UserMovie.movie_id),
+                )
+            )
+        db.session.commit()
+        init_db.create_movie_search_index()
+        data_manager.recompute_all_community_ratings()
+        if cooccurrence:
+            data_manager.rebuild_cooccurrence()
+        db.session.execute(db.text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        counts = {
+            "users": users,
+            "movies": movies,
+            "links": links,
+            "comments": comments + hot_comments,
+        }
+    log(f"generated {counts} in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--db", required=True, help="SQLite file to create")
+    parser.add_argument("--scale", choices=SCALES, default="10k", help="number of user_movies links")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--hot-comments", type=int, default=DEFAULT_HOT_COMMENTS)
+    parser.add_argument("--no-cooccurrence", action="store_true",
+                        help="skip the saved-together index (slow at 10m)")
+    args = parser.parse_args(argv)
+    generate(args.db, args.scale, args.seed, args.hot_comments, not args.no_cooccurrence)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
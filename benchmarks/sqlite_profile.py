@@ -0,0 +1,191 @@
+"""
+benchmarks/sqlite_profile.py
+
+Compares SQLite with default settings and with the tuned connection profile
+(datamanager/sqlite_tuning.py) under a mixed read/write load.
+
+    python -m benchmarks.sqlite_profile --threads 16 --seconds 10 --write-ratio 0.2
+
+Each profile gets a fresh database seeded with the same users, movies and
+lists. Worker threads then call data manager methods for a fixed time, one
+app context per call like a request: reads are get_top_movies,
+get_movie_by_id, get_comments_for_movie and get_user_movie_relations;
+writes are update_user_rating_for_movie and add_comment. Writes that fail
+(e.g. "database is locked") are counted as errors.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from flask import Flask
+
+READS = ("top_movies", "movie", "comments", "user_list")
+WRITES = ("rate", "comment")
+
+
+def create_bench_app(path: str, pragmas: dict, options: dict) -> Flask:
+    """Create an app with its own engine on the SQLite file at path."""
+    from datamanager.sqlite_tuning import install_sqlite_pragmas
+    from models import db
+
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SQLALCHEMY_ENGINE_OPTIONS=options,
+    )
+    app.logger.setLevel(logging.CRITICAL)
+    db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, pragmas)
+        db.create_all()
+    return app
+
+
+def seed(app: Flask, data_manager, users: int, movies: int, per_user: int, rng: random.Random) -> dict:
+    """Create users, movies and rated lists; return {user_id: [movie_id, ...]}."""
+    with app.app_context():
+        data_manager.bulk_add_movies_globally([
+            {"imdbID": f"tt{i:07d}", "Title": f"Movie {i}", "Year": str(1950 + i % 70),
+             "imdbRating": f"{rng.uniform(2, 9):.1f}"}
+            for i in range(movies)
+        ])
+        lists = {}
+        for n in range(users):
+            user = data_manager.add_user(f"bench-user-{n}")
+            movie_ids = rng.sample(range(1, movies + 1), per_user)
+            data_manager.add_movies_to_user_list(
+                user.id, [{"movie_id": m, "rating": rng.randint(1, 5)} for m in movie_ids]
+            )
+            lists[user.id] = movie_ids
+    return lists
+
+
+def run_load(app: Flask, data_manager, lists: dict, threads: int, seconds: float,
+             write_ratio: float, seed_value: int) -> dict:
+    """Run the mixed workload; return latencies per operation and write errors."""
+    latencies = {op: [] for op in READS + WRITES}
+    errors = {op: 0 for op in WRITES}
+    lock = threading.Lock()
+    user_ids = list(lists)
+    movie_count = max(max(ids) for ids in lists.values())
+    deadline = time.perf_counter() + seconds
+
+    def worker(n):
+        rng = random.Random(seed_value + n)
+        local = {op: [] for op in latencies}
+        local_errors = {op: 0 for op in errors}
+        while time.perf_counter() < deadline:
+            user_id = rng.choice(user_ids)
+            movie_id = rng.randint(1, movie_count)
+            op = rng.choice(WRITES) if rng.random() < write_ratio else rng.choice(READS)
+            started = time.perf_counter()
+            with app.app_context():
+                if op == "top_movies":
+                    data_manager.get_top_movies()
+                elif op == "movie":
+                    data_manager.get_movie_by_id(movie_id)
+                elif op == "comments":
+                    data_manager.get_comments_for_movie(movie_id)
+                elif op == "user_list":
+                    data_manager.get_user_movie_relations(user_id)
+                elif op == "rate":
+                    ok = data_manager.update_user_rating_for_movie(
+                        user_id, rng.choice(lists[user_id]), rng.randint(1, 5)
+                    )
+                    local_errors[op] += not ok
+                else:
+                    ok = data_manager.add_comment(movie_id, user_id, "benchmark comment")
+                    local_errors[op] += ok is None
+            local[op].append(time.perf_counter() - started)
+        with lock:
+            for op, values in local.items():
+                latencies[op].extend(values)
+            for op, count in local_errors.items():
+                errors[op] += count
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return {"latencies": latencies, "errors": errors, "elapsed": time.perf_counter() - started}
+
+
+def _percentiles(values: list[float]) -> dict:
+    if len(values) < 2:
+        values = values * 2 or [0.0, 0.0]
+    q = statistics.quantiles(values, n=100)
+    return {"p50_ms": round(q[49] * 1000, 2), "p95_ms": round(q[94] * 1000, 2),
+            "p99_ms": round(q[98] * 1000, 2)}
+
+
+def summarize(profile: str, run: dict) -> dict:
+    """Return throughput, read/write latency percentiles and error counts."""
+    reads = [v for op in READS for v in run["latencies"][op]]
+    writes = [v for op in WRITES for v in run["latencies"][op]]
+    elapsed = run["elapsed"]
+    return {
+        "profile": profile,
+        "ops_per_s": round((len(reads) + len(writes)) / elapsed, 1),
+        "reads_per_s": round(len(reads) / elapsed, 1),
+        "writes_per_s": round(len(writes) / elapsed, 1),
+        "write_errors": sum(run["errors"].values()),
+        "read": _percentiles(reads),
+        "write": _percentiles(writes),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--movies", type=int, default=2000)
+    parser.add_argument("--per-user", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from datamanager.sqlite_data_manager import SQLiteDataManager
+    from datamanager.sqlite_tuning import DEFAULT_SQLITE_PRAGMAS, engine_options
+
+    workdir = tempfile.mkdtemp(prefix="movieweb-sqlite-bench-")
+    profiles = {
+        "default": ({}, {}),
+        "tuned": (DEFAULT_SQLITE_PRAGMAS, engine_options(f"sqlite:///{workdir}/x.db")),
+    }
+    data_manager = SQLiteDataManager()
+    results = []
+    for name, (pragmas, options) in profiles.items():
+        app = create_bench_app(os.path.join(workdir, f"{name}.db"), pragmas, options)
+        lists = seed(app, data_manager, args.users, args.movies, args.per_user, random.Random(args.seed))
+        run = run_load(app, data_manager, lists, args.threads, args.seconds, args.write_ratio, args.seed)
+        results.append(summarize(name, run))
+
+    if args.json:
+        print(json.dumps({"args": vars(args), "results": results}, indent=2))
+    else:
+        print(f"threads={args.threads} seconds={args.seconds} write_ratio={args.write_ratio}")
+        for r in results:
+            print(f"{r['profile']:>8}: {r['ops_per_s']:8.1f} ops/s ({r['reads_per_s']:.1f} reads, "
+                  f"{r['writes_per_s']:.1f} writes)  read p50/p95/p99 {r['read']['p50_ms']}/"
+                  f"{r['read']['p95_ms']}/{r['read']['p99_ms']} ms  write p50/p95/p99 "
+                  f"{r['write']['p50_ms']}/{r['write']['p95_ms']}/{r['write']['p99_ms']} ms  "
+                  f"write errors {r['write_errors']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
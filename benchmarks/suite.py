@@ -0,0 +1,290 @@
+"""
+benchmarks/suite.py
+
+Scenario benchmarks through the Flask test client, on a synthetic dataset
+from benchmarks/datagen.py, with OMDb/OpenRouter served by a local stub.
+
+    python -m benchmarks.suite --scale 100k --out results.json
+    python -m benchmarks.compare base.json results.json
+
+Scenarios:
+- home: the home page (leaderboard and trending).
+- user_list: pages of the user list.
+- movie_page: the page of the movie with the most comments (10k by default).
+- rating_storm: logged-in users changing ratings of movies in their lists.
+- movies_dump: the whole catalog as NDJSON from /api/movies?stream=1.
+
+Each run works on a fresh copy of the dataset (generated on first use and
+kept at --dataset-dir), so writes of one run never leak into the next.
+Results (p50/p95/p99 latency, throughput, SQL queries per request) are
+printed, and written as JSON with --out for comparison between commits.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from benchmarks.datagen import DEFAULT_HOT_COMMENTS, HOT_MOVIE_ID, SCALES, generate, user_name
+
+if TYPE_CHECKING:
+    from datamanager.query_counter import QueryCounter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("home", "user_list", "movie_page", "rating_storm", "movies_dump")
+DEFAULT_DATASET_DIR = os.path.join(tempfile.gettempdir(), "movieweb-bench")
+
+
+def percentiles(values: list[float]) -> dict:
+    """Return p50/p95/p99/mean/max of values (seconds) in milliseconds."""
+    if len(values) < 2:
+        values = (values * 2) or [0.0, 0.0]
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50_ms": round(q[49] * 1000, 2),
+        "p95_ms": round(q[94] * 1000, 2),
+        "p99_ms": round(q[98] * 1000, 2),
+        "mean_ms": round(statistics.fmean(values) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2),
+    }
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, with '+dirty' for local changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        return commit + ("+dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def prepare_dataset(args) -> tuple[str, dict]:
+    """Return (path of a fresh working copy, row counts) of the dataset."""
+    os.makedirs(args.dataset_dir, exist_ok=True)
+    suffix = "-nocooc" if args.no_cooccurrence else ""
+    source = os.path.join(
+        args.dataset_dir,
+        f"movieweb-{args.scale}-seed{args.seed}-hot{args.hot_comments}{suffix}.db",
+    )
+    if not os.path.exists(source):
+        print(f"Generating dataset {source}", file=sys.stderr)
+        partial = source + ".partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        generate(partial, args.scale, args.seed, args.hot_comments,
+                 cooccurrence=not args.no_cooccurrence,
+                 log=lambda msg: print(f"  {msg}", file=sys.stderr))
+        os.replace(partial, source)
+    workdir = tempfile.mkdtemp(prefix="movieweb-bench-run-")
+    path = os.path.join(workdir, "movieweb.db")
+    shutil.copyfile(source, path)
+    users, movies, links, comments = SCALES[args.scale]
+    counts = {"users": users, "movies": movies, "links": links,
+              "comments": comments + args.hot_comments}
+    return path, counts
+
+
+def sample_links(path: str, count: int, rng: random.Random) -> list[tuple[int, int]]:
+    """Pick 'count' (user_id, movie_id) links of the dataset for rating updates."""
+    with sqlite3.connect(path) as conn:
+        total = conn.execute("SELECT max(id) FROM user_movies").fetchone()[0]
+        ids = [rng.randint(1, total) for _ in range(count)]
+        rows = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows += conn.execute(
+                f"SELECT user_id, movie_id FROM user_movies WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+    return rows
+
+
+def build_requests(name: str, n: int, counts: dict, links: list, rng: random.Random) -> list:
+    """Return n (method, url, form data, acting user id) requests for a scenario."""
+    if name == "home":
+        return [("GET", "/", None, None)] * n
+    if name == "user_list":
+        pages = max(counts["users"] // 50, 1)
+        return [("GET", f"/users?page={rng.randint(1, pages)}", None, None) for _ in range(n)]
+    if name == "movie_page":
+        return [("GET", f"/movie/{HOT_MOVIE_ID}/page", None, None)] * n
+    if name == "rating_storm":
+        return [
+            ("POST", f"/users/{user_id}/update_movie_rating/{movie_id}",
+             {"rating": str(rng.randint(1, 5))}, user_id)
+            for user_id, movie_id in (rng.choice(links) for _ in range(n))
+        ]
+    if name == "movies_dump":
+        return [("GET", "/api/movies?stream=1", None, None)] * n
+    raise ValueError(f"Unknown scenario {name}")
+
+
+def send(client, queries: "QueryCounter", request: tuple) -> tuple[float, int, int]:
+    """Send one request as its user; return (seconds, SQL queries, status code)."""
+    from app import USER_SNAPSHOT_SESSION_KEY
+
+    method, url, data, user_id = request
+    if user_id is not None:
+        with client.session_transaction() as session:
+            session["user_id"] = user_id
+            session[USER_SNAPSHOT_SESSION_KEY] = {"id": user_id, "name": user_name(user_id)}
+    queries.reset()
+    started = time.perf_counter()
+    resp = client.open(url, method=method, data=data)
+    resp.get_data()
+    return time.perf_counter() - started, queries.count, resp.status_code
+
+
+def run_scenario(app, queries: "QueryCounter", requests: list, warmup: int, threads: int) -> dict:
+    """
+    Send 'warmup' requests, then the rest from 'threads' test clients;
+    return latency and query stats of the latter.
+    """
+    client = app.test_client()
+    for request in requests[:warmup]:
+        send(client, queries, request)
+    requests = requests[warmup:]
+    results = []
+    lock = threading.Lock()
+
+    def worker(batch):
+        client = app.test_client()
+        local = [send(client, queries, request) for request in batch]
+        with lock:
+            results.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, [requests[t::threads] for t in range(threads)]))
+    elapsed = time.perf_counter() - started
+    latencies = [r[0] for r in results]
+    query_counts = [r[1] for r in results]
+    return {
+        "requests": len(results),
+        "errors": sum(1 for r in results if r[2] >= 400),
+        "requests_per_s": round(len(results) / elapsed, 1),
+        **percentiles(latencies),
+        "queries_per_request": {
+            "mean": round(statistics.fmean(query_counts), 2) if query_counts else 0,
+            "max": max(query_counts, default=0),
+        },
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--scale", choices=SCALES, default="10k", help="number of user_movies links")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--hot-comments", type=int, default=DEFAULT_HOT_COMMENTS)
+    parser.add_argument("--dataset-dir", default=DEFAULT_DATASET_DIR)
+    parser.add_argument("--no-cooccurrence", action="store_true",
+                        help="skip the saved-together index when generating (slow at 10m)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--dump-requests", type=int, default=10, help="requests for movies_dump")
+    parser.add_argument("--warmup", type=int, default=5, help="unrecorded requests per scenario")
+    parser.add_argument("--threads", type=int, default=1, help="concurrent test clients")
+    parser.add_argument("--upstream-latency", type=float, default=0.0)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    sys.path.insert(0, ROOT)
+    from benchmarks.async_vs_sync import start_fake_upstream
+
+    path, counts = prepare_dataset(args)
+    upstream, port = start_fake_upstream(args.upstream_latency)
+    os.environ.update(
+        DATABASE_URI=f"sqlite:///{path}",
+        OMDB_API_KEY="benchmark",
+        OPENROUTER_API_KEY="benchmark",
+        OMDB_URL=f"http://127.0.0.1:{port}/",
+        OPENROUTER_URL=f"http://127.0.0.1:{port}/chat",
+        RESPONSE_CACHE_BACKEND="memory",
+        RATING_QUEUE_DIR=os.path.join(os.path.dirname(path), "rating_queue"),
+        SLOW_REQUEST_SECONDS="3600",
+    )
+    from app import app, rating_queue
+    from datamanager.query_counter import QueryCounter
+    from models import db
+
+    from init_db import add_missing_columns
+
+    app.config["WTF_CSRF_ENABLED"] = False
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        # Cached datasets may predate schema changes of the commit under test.
+        db.create_all()
+        add_missing_columns()
+        engine = db.engine
+
+    rng = random.Random(args.seed)
+    links = sample_links(path, 1000, rng) if "rating_storm" in scenarios else []
+    results = {}
+    try:
+        with QueryCounter(engine, per_thread=True) as queries:
+            for name in scenarios:
+                n = args.dump_requests if name == "movies_dump" else args.requests
+                requests = build_requests(name, n + args.warmup, counts, links, rng)
+                results[name] = run_scenario(app, queries, requests, args.warmup, args.threads)
+                print(f"{name}: done", file=sys.stderr)
+        if rating_queue is not None and not rating_queue.drain(timeout=60):
+            print("warning: queued ratings not applied within 60s", file=sys.stderr)
+    finally:
+        upstream.terminate()
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "dataset": {"scale": args.scale, "seed": args.seed, **counts},
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "json", "dataset_dir")},
+        },
+        "scenarios": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"commit {report['meta']['commit']}, scale {args.scale} ({counts['links']} links), "
+              f"threads {args.threads}")
+        for name, r in results.items():
+            print(f"{name:>13}: {r['requests_per_s']:8.1f} req/s  p50/p95/p99 "
+                  f"{r['p50_ms']}/{r['p95_ms']}/{r['p99_ms']} ms  "
+                  f"queries/request {r['queries_per_request']['mean']} (max "
+                  f"{r['queries_per_request']['max']})  errors {r['errors']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,26 @@ datamanager package
 Contains DataManager implementations.
 """
 
+import os
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+
 from .data_manager_interface import DataManagerInterface
+from .postgres_data_manager import PostgresDataManager
 from .sqlite_data_manager import SQLiteDataManager
 
-__all__ = ['DataManagerInterface', 'SQLiteDataManager']
+__all__ = [
+    'DataManagerInterface', 'PostgresDataManager', 'SQLiteDataManager', 'create_data_manager',
+]
+
+
+def create_data_manager(uri: Optional[str] = None) -> DataManagerInterface:
+    """
+    Return the DataManager implementation for a database URI
+    (default: the DATABASE_URI env var).
+    """
+    uri = uri or os.getenv('DATABASE_URI', 'sqlite:///moviewebapp.db')
+    if make_url(uri).get_backend_name() == 'postgresql':
+        return PostgresDataManager()
+    return SQLiteDataManager()
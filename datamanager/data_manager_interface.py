@@ -2,8 +2,9 @@
 # Defines the interface for DataManager implementations.
 
 from abc import ABC, abstractmethod
+from datetime import datetime
 from models import Comment, Movie, User, UserMovie
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 
 class DataManagerInterface(ABC):
@@ -18,6 +19,15 @@ class DataManagerInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_users_with_movie_counts(
+        self, page: int = 1, per_page: int = 50
+    ) -> tuple[List[tuple[User, int]], int]:
+        """
+        Return a page of (User, movie_count) tuples and the total user count.
+        """
+        pass
+
     @abstractmethod
     def get_user_movies(self, user_id: int) -> List[Movie]:
         """
@@ -60,6 +70,40 @@ class DataManagerInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def apply_rating_updates(
+        self, updates: List[tuple[int, int, Optional[float], Optional[datetime]]]
+    ) -> bool:
+        """
+        Apply many (user_id, movie_id, rating, submitted_at) changes in one
+        transaction; the latest change per user and movie wins, and changes
+        older than the stored rating are skipped.
+        """
+        pass
+
+    @abstractmethod
+    def recompute_all_community_ratings(self) -> bool:
+        """
+        Rebuild all community rating aggregates from the stored user ratings.
+        """
+        pass
+
+    @abstractmethod
+    def bulk_add_movies_globally(self, records: List[dict]) -> Optional[dict]:
+        """
+        Add a chunk of OMDb-like records, skipping known imdb_ids; return counts.
+        """
+        pass
+
+    @abstractmethod
+    def add_movies_to_user_list(
+        self, user_id: int, items: List[dict]
+    ) -> Optional[List[dict]]:
+        """
+        Add or rate many movies for a user at once; return a result per item.
+        """
+        pass
+
     @abstractmethod
     def delete_movie(self, movie_id: int) -> bool:
         """
@@ -77,6 +121,15 @@ class DataManagerInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_trending_movies(
+        self, days: int = 7, limit: int = 10
+    ) -> List[tuple[Movie, int, Optional[float]]]:
+        """
+        Return movies with the most net list saves in the last 'days' days.
+        """
+        pass
+
     @abstractmethod
     def get_user_by_name(self, name: str) -> Optional[User]:
         """
@@ -91,6 +144,13 @@ class DataManagerInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_user_from_snapshot(self, snapshot: Optional[dict]) -> Optional[User]:
+        """
+        Return the User described by a session snapshot, without a query.
+        """
+        pass
+
     @abstractmethod
     def get_user_movie_relations(self, user_id: int) -> List[UserMovie]:
         """
@@ -119,6 +179,74 @@ class DataManagerInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_movies_page(
+        self, limit: int = 100, after: Optional[tuple[str, int]] = None
+    ) -> List[Movie]:
+        """
+        Return a page of movies ordered by (title, id) after a keyset cursor.
+        """
+        pass
+
+    @abstractmethod
+    def iter_all_movies(self, batch_size: int = 500) -> Iterator[Movie]:
+        """
+        Yield all movies ordered by (title, id) in constant memory.
+        """
+        pass
+
+    @abstractmethod
+    def iter_user_movie_ratings(
+        self, batch_size: int = 1000
+    ) -> Iterator[tuple[int, int, Optional[float]]]:
+        """
+        Yield (user_id, movie_id, user_rating) for every saved movie.
+        """
+        pass
+
+    @abstractmethod
+    def get_movies_by_ids(self, movie_ids: List[int]) -> List[Movie]:
+        """
+        Return the movies with the given IDs, in the given order.
+        """
+        pass
+
+    @abstractmethod
+    def refresh_cooccurrence(
+        self, entries: List[tuple[int, int]], user_ids: List[int] = ()
+    ) -> bool:
+        """
+        Update the co-occurrence pairs of changed (user_id, movie_id) list
+        entries and of the whole lists of user_ids.
+        """
+        pass
+
+    @abstractmethod
+    def rebuild_cooccurrence(self) -> bool:
+        """
+        Rebuild the whole co-occurrence index.
+        """
+        pass
+
+    @abstractmethod
+    def get_saved_together(
+        self, movie_id: int, limit: int = 5
+    ) -> List[tuple[Movie, int]]:
+        """
+        Return (Movie, together_count) for movies most often saved with movie_id.
+        """
+        pass
+
+    @abstractmethod
+    def search_movies(
+        self, query: str, limit: int = 10, match_any: bool = False
+    ) -> List[Movie]:
+        """
+        Return movies matching a free-text query, best match first.
+        match_any accepts movies matching any word instead of all words.
+        """
+        pass
+
     @abstractmethod
     def get_comments_for_movie(self, movie_id: int) -> List[Comment]:
         """
@@ -134,3 +262,13 @@ class DataManagerInterface(ABC):
         Return the UserMovie link between a user and a movie.
         """
         pass
+
+    @abstractmethod
+    def get_version(
+        self, tags: List[str], user_list_id: Optional[int] = None
+    ) -> Optional[tuple[str, Optional[datetime]]]:
+        """
+        Return (version, last modified time) of the data behind entity tags,
+        optionally including every movie in a user's list.
+        """
+        pass
@@ -0,0 +1,134 @@
+# postgres_data_manager.py
+# Implements DataManagerInterface on PostgreSQL.
+
+import re
+from typing import List
+
+from flask import current_app
+from sqlalchemy import Numeric, case, cast, func, literal_column, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.elements import ColumnElement
+
+from datamanager.replicas import read_only, read_write
+from datamanager.sqlite_data_manager import SQLiteDataManager
+from models import MOVIE_SEARCH_DOCUMENT, Movie, User, UserMovie, db
+
+# Weighted tsvector of a movie, matching the ix_movies_search GIN index.
+movie_search_document = literal_column(f"({MOVIE_SEARCH_DOCUMENT})")
+
+
+class PostgresDataManager(SQLiteDataManager):
+    """
+    DataManagerInterface on PostgreSQL. Shares the SQLAlchemy queries of
+    SQLiteDataManager and replaces the SQLite-specific parts: upserts use
+    PostgreSQL's INSERT ... ON CONFLICT, search uses a tsvector GIN index
+    instead of FTS5, bulk aggregates use COUNT ... FILTER, and users are
+    locked with FOR UPDATE instead of taking the database write lock.
+    """
+
+    _insert = staticmethod(pg_insert)
+
+    @staticmethod
+    def _round_rating(value: ColumnElement) -> ColumnElement:
+        """Round an average rating to two decimals (round() needs numeric)."""
+        return func.round(cast(value, Numeric), 2)
+
+    @staticmethod
+    def _lock_users(user_ids: List[int]) -> None:
+        """Lock the users' rows (FOR UPDATE, in id order) until the transaction ends."""
+        db.session.execute(
+            select(User.id).where(User.id.in_(user_ids)).order_by(User.id).with_for_update()
+        )
+
+    @read_write
+    def recompute_all_community_ratings(self) -> bool:
+        """
+        Rebuild every movie's rating sum, count, average and save count with
+        one pass over user_movies (grouped, COUNT ... FILTER) and one UPDATE.
+        """
+        per_movie = (
+            select(
+                UserMovie.movie_id,
+                func.count().label("saves"),
+                func.count().filter(UserMovie.user_rating.isnot(None)).label("rated"),
+                func.coalesce(func.sum(UserMovie.user_rating), 0.0).label("rating_sum"),
+            )
+            .group_by(UserMovie.movie_id)
+            .subquery()
+        )
+        has_initial = case((Movie.initial_omdb_rating.isnot(None), 1), else_=0)
+        initial = func.coalesce(Movie.initial_omdb_rating, 0.0)
+        try:
+            # Movies nobody saved keep only their initial OMDb rating.
+            db.session.execute(
+                update(Movie)
+                .where(~Movie.id.in_(select(per_movie.c.movie_id)))
+                .values(
+                    rating_sum=initial,
+                    community_rating_count=has_initial,
+                    save_count=0,
+                    community_rating=Movie.initial_omdb_rating,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            total = initial + per_movie.c.rating_sum
+            count = has_initial + per_movie.c.rated
+            result = db.session.execute(
+                update(Movie)
+                .where(Movie.id == per_movie.c.movie_id)
+                .values(
+                    rating_sum=total,
+                    community_rating_count=count,
+                    save_count=per_movie.c.saves,
+                    community_rating=case(
+                        (count > 0, self._round_rating(total / count)), else_=None
+                    ),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            self._notify_changed(None)
+            db.session.commit()
+            current_app.logger.info(
+                f"Recomputed community ratings for {result.rowcount} saved movies"
+            )
+            return True
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error recomputing community ratings: {e}")
+            return False
+
+    @staticmethod
+    def _tsquery_expression(query: str, match_any: bool = False) -> str:
+        """
+        Turn free text into a to_tsquery expression of prefix terms that must
+        all match (or any, with match_any). Words are quoted, so tsquery
+        operators in the input are inert.
+        """
+        words = re.findall(r"\w+", query)
+        return (" | " if match_any else " & ").join(f"'{w}':*" for w in words)
+
+    @read_only
+    def search_movies(
+        self, query: str, limit: int = 10, match_any: bool = False
+    ) -> List[Movie]:
+        """
+        Full-text search over title, original title, director, actors and genre.
+        Returns up to 'limit' movies ranked by ts_rank, best match first.
+        With match_any, movies matching any word qualify (for fuzzy lookups).
+        """
+        expression = self._tsquery_expression(query or "", match_any)
+        if not expression:
+            return []
+        tsquery = func.to_tsquery(text("'simple'"), expression)
+        try:
+            return (
+                Movie.query.filter(movie_search_document.op("@@")(tsquery))
+                .order_by(func.ts_rank(movie_search_document, tsquery).desc(), Movie.id)
+                .limit(limit)
+                .all()
+            )
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error searching movies for '{query}': {e}")
+            return []
@@ -0,0 +1,75 @@
+# query_counter.py
+# Counts SQL statements issued through an engine, for keeping query counts fixed.
+
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from models import db
+
+
+class QueryCounter:
+    """
+    Context manager recording every SQL statement executed on an engine.
+
+    Usage:
+        with QueryCounter() as counter:
+            data_manager.get_comments_for_movie(movie_id)
+        print(counter.count, counter.statements)
+
+    With per_thread=True, statements and count only cover the calling
+    thread, so one counter can measure concurrent requests.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, per_thread: bool = False):
+        self._engine = engine
+        self._per_thread = per_thread
+        self._statements: List[str] = []
+        self._local = threading.local()
+
+    @property
+    def statements(self) -> List[str]:
+        """Statements executed so far."""
+        if not self._per_thread:
+            return self._statements
+        if not hasattr(self._local, "statements"):
+            self._local.statements = []
+        return self._local.statements
+
+    @property
+    def count(self) -> int:
+        """Number of statements executed so far."""
+        return len(self.statements)
+
+    def reset(self) -> None:
+        """Forget the statements recorded so far."""
+        self.statements.clear()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        self._engine = self._engine or db.engine
+        event.listen(self._engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        event.remove(self._engine, "before_cursor_execute", self._on_execute)
+        return False
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine: Optional[Engine] = None):
+    """
+    Raise AssertionError if the enclosed block runs more than 'limit' statements.
+    """
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        executed = "\n".join(f"  {s}" for s in counter.statements)
+        raise AssertionError(
+            f"Expected at most {limit} queries, got {counter.count}:\n{executed}"
+        )
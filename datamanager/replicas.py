@@ -0,0 +1,151 @@
+# replicas.py
+# Read-replica routing for DataManager methods, with read-your-writes stickiness.
+
+import functools
+import inspect
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from flask import current_app, g, has_request_context, session
+from sqlalchemy.engine import Engine
+
+from datamanager.signals import data_changed
+from datamanager.sqlite_tuning import engine_options
+from models import READ_ENGINE_KEY, db
+
+# Bind keys of replica engines in SQLALCHEMY_BINDS: replica_0, replica_1, ...
+REPLICA_BIND_PREFIX = "replica_"
+# Seconds a client's reads stay on the primary after it wrote.
+DEFAULT_STICKY_SECONDS = 5.0
+# Flask session key holding the time of the client's last write.
+LAST_WRITE_SESSION_KEY = "db_last_write"
+
+# Session.info key set while a data manager call is routed; nested calls
+# (e.g. get_user_by_id inside add_comment) keep the outer call's engine.
+_ROUTED_KEY = "db_routed"
+
+
+def replica_binds_from_env() -> dict:
+    """
+    Return SQLALCHEMY_BINDS entries for the comma-separated replica URIs in
+    DATABASE_REPLICA_URIS, each with the same pool settings as the primary.
+    """
+    uris = [u.strip() for u in os.getenv("DATABASE_REPLICA_URIS", "").split(",") if u.strip()]
+    return {
+        f"{REPLICA_BIND_PREFIX}{n}": {"url": uri, **engine_options(uri)}
+        for n, uri in enumerate(uris)
+    }
+
+
+def replica_engines() -> List[Engine]:
+    """Return the replica engines of the current app (empty if none)."""
+    return [
+        engine
+        for key, engine in db.engines.items()
+        if key is not None and key.startswith(REPLICA_BIND_PREFIX)
+    ]
+
+
+def read_from_primary() -> None:
+    """
+    Serve the rest of this request's reads from the primary, e.g. when the
+    result is cached beyond the replication lag.
+    """
+    if has_request_context():
+        g.db_read_primary = True
+
+
+def _reads_pinned_to_primary() -> bool:
+    """True if this request reads from the primary, e.g. the client just wrote."""
+    if not has_request_context():
+        return False
+    if g.get("db_read_primary"):
+        return True
+    last_write = session.get(LAST_WRITE_SESSION_KEY)
+    sticky = current_app.config.get("DATABASE_REPLICA_STICKY_SECONDS", DEFAULT_STICKY_SECONDS)
+    return last_write is not None and time.time() - last_write < sticky
+
+
+def _choose_read_engine() -> Optional[Engine]:
+    """
+    Pick a replica for a read-only call, or None to read from the primary.
+    All calls of a request get the same replica, so what one call reads
+    (e.g. an ETag's version) is never newer than what the next one reads.
+    """
+    engines = replica_engines()
+    if not engines or _reads_pinned_to_primary():
+        return None
+    if not has_request_context():
+        return random.choice(engines)
+    if "db_read_replica" not in g:
+        g.db_read_replica = random.choice(engines)
+    return g.db_read_replica
+
+
+@contextmanager
+def _routed(engine: Optional[Engine]):
+    """Serve the reads of db.session from engine (None: primary) unless already routed."""
+    info = db.session.info
+    if info.get(_ROUTED_KEY):
+        yield
+        return
+    info[_ROUTED_KEY] = True
+    info[READ_ENGINE_KEY] = engine
+    try:
+        yield
+    finally:
+        info.pop(_ROUTED_KEY, None)
+        info.pop(READ_ENGINE_KEY, None)
+
+
+def _route(method, read_only: bool):
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def generator_wrapper(*args, **kwargs):
+            # Route each step, so the caller's own queries between items are
+            # not affected; streamed results stay on the engine they started on.
+            engine = _choose_read_engine() if read_only else None
+            items = method(*args, **kwargs)
+            while True:
+                with _routed(engine):
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        return
+                yield item
+
+        return generator_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with _routed(_choose_read_engine() if read_only else None):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def read_only(method):
+    """
+    Mark a DataManager method as read-only: its SELECTs run on a replica,
+    unless the client has just written (read-your-writes).
+    """
+    return _route(method, read_only=True)
+
+
+def read_write(method):
+    """
+    Mark a DataManager method as writing: all its queries, including the
+    lookups it makes through read-only methods, run on the primary.
+    """
+    return _route(method, read_only=False)
+
+
+@data_changed.connect
+def pin_client_to_primary(sender, **extra):
+    """After a write, keep the writing client's reads on the primary for a while."""
+    if has_request_context() and replica_engines():
+        read_from_primary()
+        session[LAST_WRITE_SESSION_KEY] = time.time()
@@ -0,0 +1,16 @@
+# signals.py
+# Blinker signals emitted by DataManager implementations after successful writes.
+
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Sent after a committed write. Receivers get the data manager as sender and
+# a 'tags' keyword: entity tags such as "movie:3", "user:7", "comments:3",
+# "movies" and "users", or None when every cached view of the data may be stale.
+data_changed = _signals.signal("data-changed")
+
+# Sent after a committed change to a user's list. Receivers get 'user_id'
+# (None when a movie was deleted for everyone), 'movie_id' and 'action':
+# "saved", "rated", "removed" or "deleted".
+rating_changed = _signals.signal("rating-changed")
@@ -1,15 +1,73 @@
 # sqlite_data_manager.py
 # Implements DataManagerInterface using SQLite/SQLAlchemy.
 
-from datetime import datetime
-from typing import List, Optional
+import re
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
 
 from flask import current_app
-from sqlalchemy import desc, func
+from sqlalchemy import (
+    String, case, cast, column, delete, desc, event, func, insert, literal, or_, select,
+    table, text, tuple_, update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased, contains_eager, joinedload, make_transient_to_detached
+from sqlalchemy.sql.elements import ColumnElement
 
 from datamanager.data_manager_interface import DataManagerInterface
-from models import Comment, Movie, User, UserMovie, db
+from datamanager.replicas import read_only, read_write
+from datamanager.signals import data_changed, rating_changed
+from models import (
+    Comment, EntityVersion, Movie, MovieCooccurrence, MovieCooccurrenceEntry, MovieDailySaves,
+    RoutingSession, User, UserMovie, db,
+)
+
+
+# FTS5 index over movies, see models.MOVIE_FTS_DDL.
+movies_fts = table("movies_fts", column("rowid"))
+# bm25 column weights: title, original_title, director, actors, genre.
+MOVIE_SEARCH_RANK = text("bm25(movies_fts, 10.0, 8.0, 3.0, 2.0, 1.0)")
+# add_movie() keyword arguments describing a movie, besides title and imdb_id.
+MOVIE_DETAIL_FIELDS = (
+    "director", "year", "poster_url", "plot", "runtime", "awards", "languages",
+    "genre", "actors", "writer", "country", "metascore", "rated",
+    "omdb_rating_for_community",
+)
+# Session.info key of the per-request memo of looked-up users, movies and
+# list links (misses included).
+REQUEST_MEMO_KEY = "request_memo"
+# Session.info key marking an open unit of work (see _unit_of_work).
+UNIT_OF_WORK_KEY = "unit_of_work"
+# Session.info key of the (signal, sender, kwargs) to send once the current
+# transaction commits.
+PENDING_SIGNALS_KEY = "pending_signals"
+# Collection tags and the prefix of their members' tags. A write to a
+# member also bumps its collection's EntityVersion, so a collection's
+# version is one row read.
+COLLECTION_TAG_PREFIXES = {"movies": "movie:", "users": "user:"}
+
+
+@event.listens_for(RoutingSession, "after_commit")
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_request_memo(session, *args):
+    """Writes may have created or deleted memoized rows; look them up again."""
+    session.info.pop(REQUEST_MEMO_KEY, None)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _send_pending_signals(session):
+    """Announce the writes of the transaction that just committed."""
+    for signal, sender, kwargs in session.info.pop(PENDING_SIGNALS_KEY, ()):
+        signal.send(sender, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _drop_pending_signals(session):
+    """Rolled back writes are not announced."""
+    session.info.pop(PENDING_SIGNALS_KEY, None)
 
 
 class SQLiteDataManager(DataManagerInterface):
@@ -18,6 +76,147 @@ class SQLiteDataManager(DataManagerInterface):
     Manages users, movies, ratings (UserMovie), and comments.
     """
 
+    # INSERT construct with on_conflict_do_update/do_nothing for this dialect.
+    _insert = staticmethod(sqlite_insert)
+
+    @staticmethod
+    def _round_rating(value: ColumnElement) -> ColumnElement:
+        """Round an average rating to two decimals in SQL."""
+        return func.round(value, 2)
+
+    @contextmanager
+    def _unit_of_work(self):
+        """
+        Run the block as one transaction: commit once when it ends, or roll
+        everything back if it raises. Nested blocks join the outer one.
+        """
+        info = db.session.info
+        if UNIT_OF_WORK_KEY in info:
+            yield
+            return
+        info[UNIT_OF_WORK_KEY] = True
+        try:
+            yield
+            db.session.commit()
+        except BaseException:
+            db.session.rollback()
+            raise
+        finally:
+            info.pop(UNIT_OF_WORK_KEY, None)
+
+    def _send_after_commit(self, signal, **kwargs) -> None:
+        """Send signal once the current transaction commits (never on rollback)."""
+        db.session.info.setdefault(PENDING_SIGNALS_KEY, []).append((signal, self, kwargs))
+
+    def _bump_versions(self, tags) -> None:
+        """
+        Count a write to each tag's EntityVersion, and to the collections
+        of member tags, in the current transaction. None (anything may have
+        changed) bumps every movie and collection.
+        """
+        now = datetime.utcnow()
+        if tags is None:
+            stmt = self._insert(EntityVersion).from_select(
+                ["tag", "version", "updated_at"],
+                select(
+                    literal("movie:", String) + cast(Movie.id, String),
+                    literal(1),
+                    literal(now),
+                ).order_by(Movie.id),
+            )
+            db.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[EntityVersion.tag],
+                    set_={"version": EntityVersion.version + 1, "updated_at": now},
+                )
+            )
+            tags = list(COLLECTION_TAG_PREFIXES)
+        tags = set(tags)
+        tags.update(
+            collection
+            for collection, prefix in COLLECTION_TAG_PREFIXES.items()
+            if any(tag.startswith(prefix) for tag in tags)
+        )
+        # Sorted, so concurrent writers lock the rows in the same order.
+        stmt = self._insert(EntityVersion).values(
+            [{"tag": tag, "version": 1, "updated_at": now} for tag in sorted(tags)]
+        )
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[EntityVersion.tag],
+                set_={
+                    "version": EntityVersion.version + 1,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+
+    def _notify_changed(self, *tags: Optional[str]) -> None:
+        """
+        Record a write to these entity tags; call before committing it.
+        Their versions are bumped in the same transaction, and data_changed
+        is sent once it commits so caches can drop affected entries.
+        Pass None to mark all cached data as stale.
+        """
+        tags = None if None in tags else tags
+        self._bump_versions(tags)
+        self._send_after_commit(data_changed, tags=tags)
+
+    @staticmethod
+    def _memoized(key: tuple, load):
+        """
+        Return load() once per request (db.session) and key; the memo is
+        dropped on commit and rollback.
+        """
+        memo = db.session.info.setdefault(REQUEST_MEMO_KEY, {})
+        if key not in memo:
+            memo[key] = load()
+        return memo[key]
+
+    def _find_user_movie_link(self, user_id: int, movie_id: int) -> Optional[UserMovie]:
+        """Return the UserMovie link of a user and movie, memoized per request."""
+        return self._memoized(
+            ("link", user_id, movie_id),
+            lambda: UserMovie.query.filter_by(user_id=user_id, movie_id=movie_id).first(),
+        )
+
+    @staticmethod
+    def _lock_user_movie_link(user_id: int, movie_id: int) -> Optional[UserMovie]:
+        """
+        Load the UserMovie link a write changes: locked, not memoized, and
+        refreshed even if an earlier read (e.g. from a replica) loaded it,
+        so rating deltas start from the stored rating.
+        """
+        return (
+            UserMovie.query.filter_by(user_id=user_id, movie_id=movie_id)
+            .populate_existing()
+            .with_for_update()
+            .first()
+        )
+
+    @staticmethod
+    def _lock_users(user_ids: List[int]) -> None:
+        """
+        Keep other writers away from these users' data until the transaction
+        ends; call before its first statement. SQLite ignores FOR UPDATE, so
+        the transaction takes the database write lock up front (BEGIN
+        IMMEDIATE): a concurrent writer waits (busy_timeout) instead of
+        reading rows this one is about to change.
+        """
+        db.session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+    def _notify_rating_changed(
+        self, user_id: Optional[int], movie_id: int, action: str
+    ) -> None:
+        """
+        Announce a change to a user's list ("saved", "rated", "removed") or a
+        movie deleted for everyone ("deleted") once the transaction commits.
+        """
+        self._send_after_commit(
+            rating_changed, user_id=user_id, movie_id=movie_id, action=action
+        )
+
+    @read_only
     def get_all_users(self) -> List[User]:
         """
         Return a list of all users.
@@ -28,6 +227,31 @@ class SQLiteDataManager(DataManagerInterface):
             current_app.logger.error(f"Error fetching all users: {e}")
             return []
 
+    @read_only
+    def get_users_with_movie_counts(
+        self, page: int = 1, per_page: int = 50
+    ) -> tuple[List[tuple[User, int]], int]:
+        """
+        Return one page of (User, movie_count) tuples ordered by ID,
+        plus the total number of users. Counts come from a single GROUP BY query.
+        """
+        page = max(page, 1)
+        try:
+            total = db.session.scalar(select(func.count(User.id)))
+            rows = db.session.execute(
+                select(User, func.count(UserMovie.id).label("movie_count"))
+                .outerjoin(UserMovie, UserMovie.user_id == User.id)
+                .group_by(User.id)
+                .order_by(User.id)
+                .limit(per_page)
+                .offset((page - 1) * per_page)
+            ).all()
+            return [(user, count) for user, count in rows], total
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error fetching users with movie counts: {e}")
+            return [], 0
+
+    @read_only
     def get_user_movies(self, user_id: int) -> List[Movie]:
         """
         Return all movies linked to the given user.
@@ -39,11 +263,12 @@ class SQLiteDataManager(DataManagerInterface):
                     f"User {user_id} not found when fetching movies"
                 )
                 return []
-            return [link.movie for link in user.movies]
+            return [link.movie for link in self.get_user_movie_relations(user_id)]
         except SQLAlchemyError as e:
             current_app.logger.error(f"Error fetching movies for user {user_id}: {e}")
             return []
 
+    @read_write
     def add_user(self, name: str) -> Optional[User]:
         """
         Add a new user. Returns the User or None on failure.
@@ -61,6 +286,8 @@ class SQLiteDataManager(DataManagerInterface):
 
             user = User(name=name_clean)
             db.session.add(user)
+            db.session.flush()
+            self._notify_changed("users", f"user:{user.id}")
             db.session.commit()
             current_app.logger.info(f"User '{user.name}' added (ID: {user.id})")
             return user
@@ -94,6 +321,51 @@ class SQLiteDataManager(DataManagerInterface):
 
         return True
 
+    def _omdb_payload(
+        self,
+        title: str,
+        imdb_id: str,
+        director: Optional[str] = None,
+        year: Optional[int] = None,
+        poster_url: Optional[str] = None,
+        plot: Optional[str] = None,
+        runtime: Optional[str] = None,
+        awards: Optional[str] = None,
+        languages: Optional[str] = None,
+        genre: Optional[str] = None,
+        actors: Optional[str] = None,
+        writer: Optional[str] = None,
+        country: Optional[str] = None,
+        metascore: Optional[str] = None,
+        rated: Optional[str] = None,
+        omdb_rating_for_community: Optional[float] = None,
+    ) -> dict:
+        """
+        Build an OMDb-like record from add_movie fields for add_movie_globally.
+        Missing fields are left out rather than set to None.
+        """
+        payload = {
+            "Title": title,
+            "Director": director,
+            "Year": str(year) if year else None,
+            "Poster": poster_url,
+            "Plot": plot,
+            "Runtime": runtime,
+            "Awards": awards,
+            "Language": languages,
+            "Genre": genre,
+            "Actors": actors,
+            "Writer": writer,
+            "Country": country,
+            "Metascore": metascore,
+            "Rated": rated,
+            "imdbID": imdb_id,
+            "imdbRating": str(omdb_rating_for_community * 2)
+            if omdb_rating_for_community is not None
+            else None,
+        }
+        return {key: value for key, value in payload.items() if value is not None}
+
     def _get_or_create_movie_internal(
         self,
         title: str,
@@ -115,89 +387,80 @@ class SQLiteDataManager(DataManagerInterface):
     ) -> Optional[tuple[Movie, bool]]:
         """
         Find a movie by imdb_id or by title/year, or create it via omdb_data.
-        Returns (Movie, was_created) or None.
+        Returns (Movie, was_created) or None. Runs in the caller's unit of
+        work; does not commit and lets SQL errors propagate.
         """
-        try:
-            if imdb_id:
-                movie = Movie.query.filter_by(imdb_id=imdb_id).first()
-                if movie:
-                    current_app.logger.info(
-                        f"Found movie by imdb_id '{imdb_id}' (ID: {movie.id})"
-                    )
-                    return movie, False
-
-            movie = None
-            if title and year is not None:
-                movie = (
-                    Movie.query.filter(
-                        func.lower(Movie.title) == func.lower(title),
-                        Movie.year == year,
-                    )
-                    .first()
-                )
-                if movie:
-                    current_app.logger.info(
-                        f"Found movie '{title}' ({year}) (ID: {movie.id})"
-                    )
-                    if imdb_id and not movie.imdb_id:
-                        movie.imdb_id = imdb_id
-                        db.session.commit()
-                        current_app.logger.info(
-                            f"Updated imdb_id for movie {movie.id} to '{imdb_id}'"
-                        )
-                    return movie, False
-
-            if omdb_data:
-                new_movie = self.add_movie_globally(omdb_data)
-                if new_movie:
-                    return new_movie, True
-                current_app.logger.error(
-                    f"Failed to create movie '{title}' via add_movie_globally"
+        if imdb_id:
+            movie = Movie.query.filter_by(imdb_id=imdb_id).first()
+            if movie:
+                current_app.logger.info(
+                    f"Found movie by imdb_id '{imdb_id}' (ID: {movie.id})"
                 )
-                return None
+                return movie, False
 
-            current_app.logger.warning(
-                f"Movie '{title}' not found and no OMDb data provided"
+        if title and year is not None:
+            movie = (
+                Movie.query.filter(
+                    func.lower(Movie.title) == func.lower(title),
+                    Movie.year == year,
+                )
+                .first()
             )
-            return None
+            if movie:
+                current_app.logger.info(
+                    f"Found movie '{title}' ({year}) (ID: {movie.id})"
+                )
+                if imdb_id and not movie.imdb_id:
+                    movie.imdb_id = imdb_id
+                    self._notify_changed("movies", f"movie:{movie.id}")
+                    current_app.logger.info(
+                        f"Set imdb_id for movie {movie.id} to '{imdb_id}'"
+                    )
+                return movie, False
 
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            current_app.logger.error(
-                f"SQLAlchemyError in _get_or_create_movie_internal for '{title}': {e}"
-            )
-            return None
-        except Exception as e:
-            db.session.rollback()
+        if omdb_data:
+            new_movie = self._create_movie_from_omdb(omdb_data)
+            if new_movie:
+                return new_movie, True
             current_app.logger.error(
-                f"Unexpected error in _get_or_create_movie_internal for '{title}': {e}"
+                f"Failed to create movie '{title}' from OMDb data"
             )
             return None
 
+        current_app.logger.warning(
+            f"Movie '{title}' not found and no OMDb data provided"
+        )
+        return None
+
     def _create_or_update_user_movie_link(
         self, user_id: int, movie_id: int, rating: Optional[float]
     ) -> Optional[UserMovie]:
         """
         Create or update the UserMovie link for a user and movie.
+        Uses INSERT ... ON CONFLICT on (user_id, movie_id) and applies the rating
+        change to the movie's community aggregate and, for a new link, its save
+        count; does not commit and lets SQL errors propagate.
         """
-        try:
-            link = UserMovie.query.filter_by(
-                user_id=user_id, movie_id=movie_id
-            ).first()
-            if not link:
-                link = UserMovie(user_id=user_id, movie_id=movie_id, user_rating=rating)
-                db.session.add(link)
-            else:
-                if link.user_rating != rating:
-                    link.user_rating = rating
-                    db.session.add(link)
-            return link
-        except SQLAlchemyError as e:
-            current_app.logger.error(
-                f"Error creating/updating UserMovie link for user {user_id}, movie {movie_id}: {e}"
-            )
-            return None
-
+        # Aggregates first: the subqueries still see the link's previous state.
+        existing = (
+            select(UserMovie.user_rating)
+            .where(UserMovie.user_id == user_id, UserMovie.movie_id == movie_id)
+        )
+        self._apply_community_rating_delta(movie_id, existing.scalar_subquery(), rating)
+        self._apply_save_delta(movie_id, case((existing.exists(), 0), else_=1))
+
+        stmt = self._insert(UserMovie).values(
+            user_id=user_id, movie_id=movie_id, user_rating=rating
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserMovie.user_id, UserMovie.movie_id],
+            set_={"user_rating": stmt.excluded.user_rating, "rated_at": stmt.excluded.rated_at},
+        ).returning(UserMovie)
+        return db.session.scalars(
+            stmt, execution_options={"populate_existing": True}
+        ).one()
+
+    @read_write
     def add_movie(
         self,
         user_id: int,
@@ -221,92 +484,72 @@ class SQLiteDataManager(DataManagerInterface):
     ) -> Optional[Movie]:
         """
         Add a movie to a user's list. Creates the movie globally if needed.
-        Returns the Movie or None on failure.
+        Finding or creating the movie, the list entry and the aggregate
+        updates commit as one transaction. Returns the Movie or None on failure.
         """
         title_clean = title.strip() if title else ""
         if not self._validate_movie_input(title_clean, year, rating):
             return None
 
-        try:
-            user = self.get_user_by_id(user_id)
-            if not user:
-                current_app.logger.warning(f"User {user_id} not found")
-                return None
+        user = self.get_user_by_id(user_id)
+        if not user:
+            current_app.logger.warning(f"User {user_id} not found")
+            return None
 
-            omdb_payload = None
-            if imdb_id:
-                omdb_payload = {
-                    "Title": title_clean,
-                    "Director": director,
-                    "Year": str(year) if year else None,
-                    "Poster": poster_url,
-                    "Plot": plot,
-                    "Runtime": runtime,
-                    "Awards": awards,
-                    "Language": languages,
-                    "Genre": genre,
-                    "Actors": actors,
-                    "Writer": writer,
-                    "Country": country,
-                    "Metascore": metascore,
-                    "Rated": rated,
-                    "imdbID": imdb_id,
-                    "imdbRating": str(omdb_rating_for_community * 2)
-                    if omdb_rating_for_community is not None
-                    else None,
-                }
-
-            result = self._get_or_create_movie_internal(
-                title_clean,
-                director,
-                year,
-                poster_url,
-                plot,
-                runtime,
-                awards,
-                languages,
-                genre,
-                actors,
-                writer,
-                country,
-                metascore,
-                rated,
-                imdb_id,
-                omdb_data=omdb_payload,
-            )
-            if not result:
-                raise SQLAlchemyError("Failed to get or create movie internally")
-
-            movie_obj, _ = result
-            link = self._create_or_update_user_movie_link(
-                user.id, movie_obj.id, rating
+        omdb_payload = None
+        if imdb_id:
+            omdb_payload = self._omdb_payload(
+                title=title_clean, director=director, year=year,
+                poster_url=poster_url, plot=plot, runtime=runtime,
+                awards=awards, languages=languages, genre=genre,
+                actors=actors, writer=writer, country=country,
+                metascore=metascore, rated=rated, imdb_id=imdb_id,
+                omdb_rating_for_community=omdb_rating_for_community,
             )
-            if not link:
-                raise SQLAlchemyError(
-                    f"Failed to link user {user.id} with movie {movie_obj.id}"
-                )
 
-            db.session.commit()
-            current_app.logger.info(
-                f"Committed changes for movie {movie_obj.id} and user {user_id}"
-            )
+        try:
+            with self._unit_of_work():
+                result = self._get_or_create_movie_internal(
+                    title_clean,
+                    director,
+                    year,
+                    poster_url,
+                    plot,
+                    runtime,
+                    awards,
+                    languages,
+                    genre,
+                    actors,
+                    writer,
+                    country,
+                    metascore,
+                    rated,
+                    imdb_id,
+                    omdb_data=omdb_payload,
+                )
+                if not result:
+                    raise SQLAlchemyError("Failed to get or create movie internally")
 
-            if self._update_community_rating(movie_obj.id):
-                return movie_obj
-            current_app.logger.error(
-                f"Community rating update failed for movie {movie_obj.id}"
-            )
-            return movie_obj
+                movie_obj, _ = result
+                self._create_or_update_user_movie_link(user.id, movie_obj.id, rating)
+                self._notify_changed(
+                    "users", "movies", f"user:{user.id}", f"movie:{movie_obj.id}"
+                )
+                self._notify_rating_changed(user.id, movie_obj.id, "saved")
 
         except SQLAlchemyError as e:
-            db.session.rollback()
             current_app.logger.error(f"Error in add_movie: {e}")
             return None
         except Exception as e:
-            db.session.rollback()
             current_app.logger.error(f"Unexpected error in add_movie: {e}")
             return None
 
+        current_app.logger.info(
+            f"Committed changes for movie {movie_obj.id} and user {user_id}"
+        )
+        return movie_obj
+
+    @read_write
     def update_user_rating_for_movie(
         self, user_id: int, movie_id: int, new_rating: Optional[float]
     ) -> bool:
@@ -314,9 +557,7 @@ class SQLiteDataManager(DataManagerInterface):
         Update a user's rating for a movie. Returns True on success.
         """
         try:
-            link = UserMovie.query.filter_by(
-                user_id=user_id, movie_id=movie_id
-            ).first()
+            link = self._lock_user_movie_link(user_id, movie_id)
             if not link:
                 current_app.logger.warning(
                     f"No UserMovie link for user {user_id}, movie {movie_id}"
@@ -329,13 +570,16 @@ class SQLiteDataManager(DataManagerInterface):
                 )
                 return False
 
+            old_rating = link.user_rating
             link.user_rating = new_rating
+            self._apply_community_rating_delta(movie_id, old_rating, new_rating)
+            self._notify_changed("movies", f"user:{user_id}", f"movie:{movie_id}")
+            self._notify_rating_changed(user_id, movie_id, "rated")
             db.session.commit()
             current_app.logger.info(
                 f"User {user_id} rating for movie {movie_id} set to {new_rating}"
             )
-
-            return self._update_community_rating(movie_id)
+            return True
 
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -344,6 +588,87 @@ class SQLiteDataManager(DataManagerInterface):
             )
             return False
 
+    @read_write
+    def apply_rating_updates(
+        self, updates: List[tuple[int, int, Optional[float], Optional[datetime]]]
+    ) -> bool:
+        """
+        Apply (user_id, movie_id, rating, submitted_at) changes in one
+        transaction, with a single community rating update per movie. The
+        latest change of a user and movie wins; changes older than the
+        rating's rated_at (e.g. replayed after a newer direct write) and
+        movies no longer in the user's list are skipped. submitted_at is
+        naive UTC, or None to apply regardless.
+        """
+        latest = {}
+        for user_id, movie_id, rating, submitted_at in updates:
+            if rating is not None and not (0 <= rating <= 5):
+                current_app.logger.warning(
+                    f"Invalid rating {rating} for user {user_id}, movie {movie_id}"
+                )
+                continue
+            previous = latest.get((user_id, movie_id))
+            if previous and previous[1] and submitted_at and submitted_at < previous[1]:
+                continue
+            latest[(user_id, movie_id)] = (rating, submitted_at)
+        if not latest:
+            return True
+        try:
+            links = (
+                UserMovie.query.filter(
+                    tuple_(UserMovie.user_id, UserMovie.movie_id).in_(list(latest))
+                )
+                .populate_existing()
+                .with_for_update()
+                .all()
+            )
+            if len(links) < len(latest):
+                current_app.logger.warning(
+                    f"Skipped {len(latest) - len(links)} rating updates for movies "
+                    f"no longer in the user's list"
+                )
+
+            deltas = {}
+            changed = []
+            stale = 0
+            for link in links:
+                old_rating = link.user_rating
+                new_rating, submitted_at = latest[(link.user_id, link.movie_id)]
+                if submitted_at and link.rated_at and submitted_at < link.rated_at:
+                    stale += 1
+                    continue
+                if old_rating == new_rating:
+                    continue
+                link.user_rating = new_rating
+                link.rated_at = submitted_at or datetime.utcnow()
+                delta = deltas.setdefault(link.movie_id, [0.0, 0])
+                delta[0] += (new_rating or 0.0) - (old_rating or 0.0)
+                delta[1] += int(new_rating is not None) - int(old_rating is not None)
+                changed.append((link.user_id, link.movie_id))
+            for movie_id, (delta_sum, delta_count) in deltas.items():
+                self._add_to_community_rating(movie_id, delta_sum, delta_count)
+            if changed:
+                self._notify_changed(
+                    "movies",
+                    *{f"user:{user_id}" for user_id, _ in changed},
+                    *(f"movie:{movie_id}" for movie_id in deltas),
+                )
+                for user_id, movie_id in changed:
+                    self._notify_rating_changed(user_id, movie_id, "rated")
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error applying {len(latest)} rating updates: {e}")
+            return False
+
+        if stale:
+            current_app.logger.info(f"Skipped {stale} rating updates older than the stored rating")
+        current_app.logger.info(
+            f"Applied {len(changed)} rating updates to {len(deltas)} movies"
+        )
+        return True
+
+    @read_write
     def delete_movie(self, movie_id: int) -> bool:
         """
         Delete a movie globally by its ID (cascades to UserMovie and Comment).
@@ -354,7 +679,21 @@ class SQLiteDataManager(DataManagerInterface):
                 current_app.logger.warning(f"Movie {movie_id} not found for deletion")
                 return False
 
+            db.session.execute(
+                delete(MovieDailySaves).where(MovieDailySaves.movie_id == movie_id)
+            )
+            db.session.execute(
+                delete(MovieCooccurrence).where(or_(
+                    MovieCooccurrence.movie_id == movie_id,
+                    MovieCooccurrence.other_movie_id == movie_id,
+                ))
+            )
+            db.session.execute(
+                delete(MovieCooccurrenceEntry).where(MovieCooccurrenceEntry.movie_id == movie_id)
+            )
             db.session.delete(movie)
+            self._notify_changed("users", "movies", f"movie:{movie_id}")
+            self._notify_rating_changed(None, movie_id, "deleted")
             db.session.commit()
             current_app.logger.info(f"Deleted movie {movie_id} globally")
             return True
@@ -364,38 +703,41 @@ class SQLiteDataManager(DataManagerInterface):
             current_app.logger.error(f"Error deleting movie {movie_id}: {e}")
             return False
 
+    @read_write
     def add_existing_movie_to_user_list(self, user_id: int, movie_id: int) -> bool:
         """
         Add an existing movie to a user's list (no initial rating).
         """
         try:
-            user = User.query.get(user_id)
-            if not user:
+            if not self.get_user_by_id(user_id):
                 current_app.logger.warning(f"User {user_id} not found")
                 return False
 
-            movie = Movie.query.get(movie_id)
-            if not movie:
+            if not self.get_movie_by_id(movie_id):
                 current_app.logger.warning(f"Movie {movie_id} not found")
                 return False
 
-            exists = UserMovie.query.filter_by(
-                user_id=user_id, movie_id=movie_id
-            ).first()
-            if exists:
+            result = db.session.execute(
+                self._insert(UserMovie)
+                .values(user_id=user_id, movie_id=movie_id, user_rating=None)
+                .on_conflict_do_nothing(
+                    index_elements=[UserMovie.user_id, UserMovie.movie_id]
+                )
+            )
+            if result.rowcount:
+                self._apply_save_delta(movie_id, 1)
+                self._notify_changed("users", f"user:{user_id}", f"movie:{movie_id}")
+                self._notify_rating_changed(user_id, movie_id, "saved")
+            db.session.commit()
+            if result.rowcount:
+                current_app.logger.info(
+                    f"Added movie {movie_id} to user {user_id} list"
+                )
+            else:
                 current_app.logger.info(
                     f"Movie {movie_id} already in user {user_id}'s list"
                 )
-                return True
-
-            link = UserMovie(user_id=user.id, movie_id=movie.id, user_rating=None)
-            db.session.add(link)
-            db.session.commit()
-            current_app.logger.info(
-                f"Added movie {movie_id} to user {user_id} list"
-            )
-
-            return self._update_community_rating(movie_id)
+            return True
 
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -404,82 +746,529 @@ class SQLiteDataManager(DataManagerInterface):
             )
             return False
 
-    def _update_community_rating(self, movie_id: int) -> bool:
+    @read_write
+    def add_movies_to_user_list(
+        self, user_id: int, items: List[dict]
+    ) -> Optional[List[dict]]:
         """
-        Recalculate and update a movie's community rating and rating count.
+        Add or rate many movies for a user in one transaction.
+        Each item holds add_movie() keyword arguments (title, year, rating,
+        imdb_id, ...) or the movie_id of a known movie. Movies are resolved
+        with one query per lookup key, missing movies with an imdb_id are
+        created in one bulk insert, links are upserted in one executemany and
+        each movie's aggregates are updated once. Returns one result dict
+        (index, status, movie_id, message) per item, with status "added",
+        "updated", "duplicate", "not_found" or "invalid"; None on failure.
         """
+        results = [{"index": i, "status": None, "movie_id": None} for i in range(len(items))]
         try:
-            movie = Movie.query.get(movie_id)
-            if not movie:
-                current_app.logger.warning(
-                    f"Movie {movie_id} not found for community update"
-                )
-                return False
+            user = User.query.get(user_id)
+            if not user:
+                current_app.logger.warning(f"User {user_id} not found")
+                return None
+
+            pending = []
+            for i, item in enumerate(items):
+                rating = item.get("rating")
+                title = item.get("title")
+                if item.get("movie_id") is not None:
+                    valid = rating is None or 0 <= rating <= 5
+                else:
+                    valid = isinstance(title, str) and self._validate_movie_input(
+                        title.strip(), item.get("year"), rating
+                    )
+                if valid:
+                    pending.append(i)
+                else:
+                    results[i].update(status="invalid", message="Invalid title, year or rating")
+
+            movie_ids, imdb_backfill, to_create = self._resolve_batch_movies(items, pending)
+            created, backfilled = self._create_batch_movies(to_create, imdb_backfill)
+
+            last_item_for_movie = {}
+            for i in pending:
+                movie_id = movie_ids.get(i)
+                if movie_id is None:
+                    imdb_id = items[i].get("imdb_id")
+                    movie_id = created.get(imdb_id) or backfilled.get(imdb_id)
+                if movie_id is None:
+                    results[i].update(status="not_found", message="Movie not found")
+                    continue
+                if movie_id in last_item_for_movie:
+                    results[last_item_for_movie[movie_id]].update(
+                        status="duplicate", movie_id=movie_id,
+                        message=f"Superseded by item {i}",
+                    )
+                last_item_for_movie[movie_id] = i
 
-            total = 0.0
-            count = 0
+            old_ratings = self._upsert_batch_links(user.id, items, last_item_for_movie, results)
 
-            if movie.initial_omdb_rating is not None:
-                total += movie.initial_omdb_rating
-                count += 1
-                current_app.logger.debug(
-                    f"Including initial OMDb rating {movie.initial_omdb_rating}"
+            changed = set(last_item_for_movie) | set(imdb_backfill)
+            if changed or created:
+                self._notify_changed(
+                    "users", "movies", f"user:{user.id}",
+                    *(f"movie:{movie_id}" for movie_id in changed),
+                )
+            for movie_id in last_item_for_movie:
+                self._notify_rating_changed(
+                    user.id, movie_id, "rated" if movie_id in old_ratings else "saved"
                 )
+            db.session.commit()
+            current_app.logger.info(
+                f"Batch for user {user_id}: {len(last_item_for_movie)} movies linked, "
+                f"{len(created)} created, {len(items) - len(last_item_for_movie)} skipped"
+            )
+            return results
 
-            ratings = (
-                db.session.query(UserMovie.user_rating)
-                .filter(
-                    UserMovie.movie_id == movie_id,
-                    UserMovie.user_rating.isnot(None),
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error in batch add for user {user_id}: {e}")
+            return None
+
+    def _resolve_batch_movies(
+        self, items: List[dict], pending: List[int]
+    ) -> tuple[dict[int, int], dict[int, str], dict[str, dict]]:
+        """
+        Find the movies of valid batch items: by movie_id, imdb_id, or title
+        and year, one query each. Returns ({item index: movie id}, {movie id:
+        imdb_id to backfill}, {imdb_id: OMDb payload of a movie to create}).
+        """
+        by_movie_id = {items[i]["movie_id"] for i in pending if items[i].get("movie_id") is not None}
+        known_ids = set(db.session.scalars(
+            select(Movie.id).where(Movie.id.in_(by_movie_id))
+        )) if by_movie_id else set()
+        lookups = [i for i in pending if items[i].get("movie_id") is None]
+        imdb_ids = {items[i]["imdb_id"] for i in lookups if items[i].get("imdb_id")}
+        by_imdb_id = dict(db.session.execute(
+            select(Movie.imdb_id, Movie.id).where(Movie.imdb_id.in_(imdb_ids))
+        ).all()) if imdb_ids else {}
+        titles = sorted({items[i]["title"].strip() for i in lookups})
+        # Fold titles with the database's lower() so keys match the index.
+        folded = dict(zip(titles, db.session.execute(
+            select(*(func.lower(literal(t)) for t in titles))
+        ).one())) if titles else {}
+        title_keys = {
+            (folded[items[i]["title"].strip()], items[i]["year"])
+            for i in lookups
+            if items[i].get("year") is not None and items[i].get("imdb_id") not in by_imdb_id
+        }
+        by_title = {}
+        if title_keys:
+            for lower_title, year, movie_id, imdb_id in db.session.execute(
+                select(func.lower(Movie.title), Movie.year, Movie.id, Movie.imdb_id)
+                .where(tuple_(func.lower(Movie.title), Movie.year).in_(list(title_keys)))
+                .order_by(Movie.id)
+            ):
+                by_title.setdefault((lower_title, year), (movie_id, imdb_id))
+
+        movie_ids = {}
+        imdb_backfill = {}
+        to_create = {}
+        for i in pending:
+            item = items[i]
+            if item.get("movie_id") is not None:
+                if item["movie_id"] in known_ids:
+                    movie_ids[i] = item["movie_id"]
+                continue
+            imdb_id = item.get("imdb_id")
+            if imdb_id in by_imdb_id:
+                movie_ids[i] = by_imdb_id[imdb_id]
+                continue
+            title = item["title"].strip()
+            match = by_title.get((folded[title], item.get("year")))
+            if match:
+                movie_ids[i] = match[0]
+                if imdb_id and not match[1] and imdb_id not in imdb_backfill.values():
+                    imdb_backfill.setdefault(match[0], imdb_id)
+            elif imdb_id and imdb_id not in to_create:
+                to_create[imdb_id] = self._omdb_payload(
+                    title=title,
+                    imdb_id=imdb_id,
+                    **{field: item.get(field) for field in MOVIE_DETAIL_FIELDS},
                 )
-                .all()
+        return movie_ids, imdb_backfill, to_create
+
+    def _create_batch_movies(
+        self, to_create: dict[str, dict], imdb_backfill: dict[int, str]
+    ) -> tuple[dict[str, int], dict[str, int]]:
+        """
+        Insert the missing movies of a batch in one executemany and backfill
+        imdb_ids of movies matched by title. An imdb_id being backfilled is
+        not created again. Returns ({imdb_id: id} created, {imdb_id: id}
+        backfilled).
+        """
+        backfilled = {imdb_id: movie_id for movie_id, imdb_id in imdb_backfill.items()}
+        for imdb_id in backfilled:
+            to_create.pop(imdb_id, None)
+        created = {}
+        if to_create:
+            created = dict(db.session.execute(
+                insert(Movie).returning(Movie.imdb_id, Movie.id),
+                [self._movie_row_from_omdb(payload) for payload in to_create.values()],
+            ).all())
+        if imdb_backfill:
+            db.session.execute(
+                update(Movie),
+                [{"id": movie_id, "imdb_id": imdb_id} for movie_id, imdb_id in imdb_backfill.items()],
             )
-            user_values = [r[0] for r in ratings]
-            total += sum(user_values)
-            count += len(user_values)
+        return created, backfilled
 
-            if count > 0:
-                movie.community_rating = round(total / count, 2)
-                movie.community_rating_count = count
+    def _upsert_batch_links(
+        self,
+        user_id: int,
+        items: List[dict],
+        last_item_for_movie: dict[int, int],
+        results: List[dict],
+    ) -> dict[int, Optional[float]]:
+        """
+        Upsert the user's links to a batch's movies in one executemany,
+        update each movie's aggregates once and mark the items "added" or
+        "updated". Returns {movie id: previous rating} of movies already in
+        the list.
+        """
+        if not last_item_for_movie:
+            return {}
+        old_ratings = dict(db.session.execute(
+            select(UserMovie.movie_id, UserMovie.user_rating).where(
+                UserMovie.user_id == user_id,
+                UserMovie.movie_id.in_(list(last_item_for_movie)),
+            )
+        ).all())
+        stmt = self._insert(UserMovie)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserMovie.user_id, UserMovie.movie_id],
+                set_={
+                    "user_rating": stmt.excluded.user_rating,
+                    "rated_at": stmt.excluded.rated_at,
+                },
+            ),
+            [
+                {"user_id": user_id, "movie_id": movie_id, "user_rating": items[i].get("rating")}
+                for movie_id, i in last_item_for_movie.items()
+            ],
+        )
+        for movie_id, i in last_item_for_movie.items():
+            rating = items[i].get("rating")
+            if movie_id in old_ratings:
+                self._apply_community_rating_delta(movie_id, old_ratings[movie_id], rating)
+                results[i].update(status="updated", movie_id=movie_id)
             else:
-                movie.community_rating = None
-                movie.community_rating_count = 0
+                self._apply_community_rating_delta(movie_id, None, rating)
+                self._apply_save_delta(movie_id, 1)
+                results[i].update(status="added", movie_id=movie_id)
+        return old_ratings
 
+    def _apply_community_rating_delta(
+        self,
+        movie_id: int,
+        old_rating: Optional[float] | ColumnElement,
+        new_rating: Optional[float],
+    ) -> None:
+        """
+        Apply one user rating change to a movie's running rating sum and count.
+        old_rating may be a SQL expression evaluated inside the UPDATE.
+        Runs as a single UPDATE in the caller's transaction; does not commit.
+        """
+        if isinstance(old_rating, ColumnElement):
+            old_sum = func.coalesce(old_rating, 0.0)
+            old_count = case((old_rating.isnot(None), 1), else_=0)
+        else:
+            if old_rating == new_rating:
+                return
+            old_sum = old_rating or 0.0
+            old_count = int(old_rating is not None)
+        self._add_to_community_rating(
+            movie_id,
+            (new_rating or 0.0) - old_sum,
+            int(new_rating is not None) - old_count,
+        )
+        current_app.logger.debug(
+            f"Applied community rating change {old_rating} -> {new_rating} "
+            f"for movie {movie_id}"
+        )
+
+    def _add_to_community_rating(
+        self,
+        movie_id: int,
+        delta_sum: float | ColumnElement,
+        delta_count: int | ColumnElement,
+    ) -> None:
+        """
+        Add to a movie's rating sum and count and recompute its average in
+        one UPDATE. Does not commit.
+        """
+        new_sum = func.coalesce(Movie.rating_sum, 0.0) + delta_sum
+        new_count = func.coalesce(Movie.community_rating_count, 0) + delta_count
+        db.session.execute(
+            update(Movie)
+            .where(Movie.id == movie_id)
+            .values(
+                rating_sum=case((new_count > 0, new_sum), else_=0.0),
+                community_rating_count=new_count,
+                community_rating=case(
+                    (new_count > 0, self._round_rating(new_sum / new_count)),
+                    else_=None,
+                ),
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+
+    def _apply_save_delta(self, movie_id: int, delta: int | ColumnElement) -> None:
+        """
+        Add delta (+1 save, -1 removal, or a SQL expression) to the movie's
+        save_count and to today's trending bucket. Does not commit.
+        """
+        db.session.execute(
+            update(Movie)
+            .where(Movie.id == movie_id)
+            .values(save_count=func.coalesce(Movie.save_count, 0) + delta)
+            .execution_options(synchronize_session="fetch")
+        )
+        stmt = self._insert(MovieDailySaves).values(
+            movie_id=movie_id, day=datetime.utcnow().date(), saves=delta
+        )
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[MovieDailySaves.movie_id, MovieDailySaves.day],
+                set_={"saves": MovieDailySaves.saves + stmt.excluded.saves},
+            )
+        )
+
+    @read_write
+    def recompute_all_community_ratings(self) -> bool:
+        """
+        Rebuild every movie's rating sum, count, average and save count in one
+        bulk UPDATE.
+        Maintenance entry point for fixing drift in the running aggregates.
+        """
+        user_sum = (
+            select(func.coalesce(func.sum(UserMovie.user_rating), 0.0))
+            .where(UserMovie.movie_id == Movie.id)
+            .scalar_subquery()
+        )
+        user_count = (
+            select(func.count(UserMovie.user_rating))
+            .where(UserMovie.movie_id == Movie.id)
+            .scalar_subquery()
+        )
+        saves = (
+            select(func.count(UserMovie.id))
+            .where(UserMovie.movie_id == Movie.id)
+            .scalar_subquery()
+        )
+        total = func.coalesce(Movie.initial_omdb_rating, 0.0) + user_sum
+        count = case((Movie.initial_omdb_rating.isnot(None), 1), else_=0) + user_count
+
+        try:
+            result = db.session.execute(
+                update(Movie)
+                .values(
+                    rating_sum=total,
+                    community_rating_count=count,
+                    save_count=saves,
+                    community_rating=case(
+                        (count > 0, self._round_rating(total / count)), else_=None
+                    ),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            self._notify_changed(None)
             db.session.commit()
             current_app.logger.info(
-                f"Updated community rating for movie {movie_id} to "
-                f"{movie.community_rating} ({movie.community_rating_count} ratings)"
+                f"Recomputed community ratings for {result.rowcount} movies"
             )
             return True
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error recomputing community ratings: {e}")
+            return False
 
+    @read_write
+    def refresh_cooccurrence(
+        self, entries: List[tuple[int, int]], user_ids: List[int] = ()
+    ) -> bool:
+        """
+        Bring the co-occurrence index up to date with changed list entries
+        (user_id, movie_id) and with the whole lists of user_ids, in one
+        transaction. An entry saved since it was last counted adds 1 to its
+        pairs with the user's other counted movies, a removed one subtracts
+        1; entries that did not change cost nothing, so applying a change
+        twice is harmless. The users are locked first (_lock_users) so
+        concurrent refreshes of one list do not miss each other's pairs.
+        """
+        full = set(user_ids)
+        users = sorted({user_id for user_id, _ in entries} | full)
+        if not users:
+            return True
+        keys = {(user_id, movie_id) for user_id, movie_id in entries if user_id not in full}
+        try:
+            self._lock_users(users)
+            counted = defaultdict(set)
+            for user_id, movie_id in db.session.execute(
+                select(MovieCooccurrenceEntry.user_id, MovieCooccurrenceEntry.movie_id)
+                .where(MovieCooccurrenceEntry.user_id.in_(users))
+            ):
+                counted[user_id].add(movie_id)
+            wanted = []
+            if full:
+                wanted.append(UserMovie.user_id.in_(full))
+            if keys:
+                wanted.append(tuple_(UserMovie.user_id, UserMovie.movie_id).in_(list(keys)))
+            saved = set(db.session.execute(
+                select(UserMovie.user_id, UserMovie.movie_id).where(or_(*wanted))
+            ).tuples())
+
+            candidates = keys | saved
+            for user_id in full:
+                candidates.update((user_id, movie_id) for movie_id in counted[user_id])
+            added = sorted(e for e in candidates if e in saved and e[1] not in counted[e[0]])
+            removed = sorted(e for e in candidates if e not in saved and e[1] in counted[e[0]])
+
+            deltas = defaultdict(int)
+            for (user_id, movie_id), delta in [(e, -1) for e in removed] + [(e, 1) for e in added]:
+                others = counted[user_id]
+                others.discard(movie_id)
+                for other_id in others:
+                    deltas[(movie_id, other_id)] += delta
+                    deltas[(other_id, movie_id)] += delta
+                if delta > 0:
+                    others.add(movie_id)
+
+            if added:
+                db.session.execute(
+                    insert(MovieCooccurrenceEntry),
+                    [{"user_id": user_id, "movie_id": movie_id} for user_id, movie_id in added],
+                )
+            if removed:
+                db.session.execute(
+                    delete(MovieCooccurrenceEntry).where(
+                        tuple_(MovieCooccurrenceEntry.user_id, MovieCooccurrenceEntry.movie_id)
+                        .in_(removed)
+                    )
+                )
+            rows = [
+                {"movie_id": movie_id, "other_movie_id": other_id, "together_count": delta}
+                for (movie_id, other_id), delta in deltas.items()
+                if delta
+            ]
+            if rows:
+                stmt = self._insert(MovieCooccurrence)
+                db.session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[MovieCooccurrence.movie_id, MovieCooccurrence.other_movie_id],
+                        set_={"together_count": MovieCooccurrence.together_count
+                              + stmt.excluded.together_count},
+                    ),
+                    rows,
+                )
+            if removed:
+                removed_ids = sorted({movie_id for _, movie_id in removed})
+                db.session.execute(
+                    delete(MovieCooccurrence).where(
+                        MovieCooccurrence.together_count <= 0,
+                        or_(
+                            MovieCooccurrence.movie_id.in_(removed_ids),
+                            MovieCooccurrence.other_movie_id.in_(removed_ids),
+                        ),
+                    )
+                )
+            db.session.commit()
+            current_app.logger.debug(
+                f"Co-occurrence: {len(added)} entries added, {len(removed)} removed, "
+                f"{len(rows)} pairs updated"
+            )
+            return True
         except SQLAlchemyError as e:
             db.session.rollback()
             current_app.logger.error(
-                f"Error updating community rating for movie {movie_id}: {e}"
+                f"Error refreshing co-occurrence for {len(entries)} entries "
+                f"and users {sorted(full)}: {e}"
             )
             return False
 
+    @read_write
+    def rebuild_cooccurrence(self) -> bool:
+        """
+        Rebuild the whole co-occurrence index from user_movies.
+        """
+        own = aliased(UserMovie)
+        other = aliased(UserMovie)
+        pairs = (
+            select(own.movie_id, other.movie_id, func.count())
+            .join(other, (other.user_id == own.user_id) & (other.movie_id != own.movie_id))
+            .group_by(own.movie_id, other.movie_id)
+        )
+        try:
+            db.session.execute(delete(MovieCooccurrence))
+            db.session.execute(delete(MovieCooccurrenceEntry))
+            db.session.execute(
+                insert(MovieCooccurrence).from_select(
+                    ["movie_id", "other_movie_id", "together_count"], pairs
+                )
+            )
+            db.session.execute(
+                insert(MovieCooccurrenceEntry).from_select(
+                    ["user_id", "movie_id"], select(UserMovie.user_id, UserMovie.movie_id)
+                )
+            )
+            db.session.commit()
+            current_app.logger.info("Rebuilt movie co-occurrence index")
+            return True
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error rebuilding co-occurrence index: {e}")
+            return False
+
+    @read_only
+    def get_saved_together(
+        self, movie_id: int, limit: int = 5
+    ) -> List[tuple[Movie, int]]:
+        """
+        Return (Movie, together_count) for the movies most often saved
+        together with movie_id, most common first.
+        """
+        try:
+            rows = db.session.execute(
+                select(Movie, MovieCooccurrence.together_count)
+                .join(MovieCooccurrence, MovieCooccurrence.other_movie_id == Movie.id)
+                .where(MovieCooccurrence.movie_id == movie_id)
+                .order_by(desc(MovieCooccurrence.together_count), Movie.title)
+                .limit(limit)
+            ).all()
+            return [(movie, count) for movie, count in rows]
+        except SQLAlchemyError as e:
+            current_app.logger.error(
+                f"Error fetching saved-together movies for {movie_id}: {e}"
+            )
+            return []
+
+    @read_write
     def delete_movie_from_user_list(self, user_id: int, movie_id: int) -> bool:
         """
         Remove a movie from a user's list by deleting the UserMovie link.
         """
         try:
-            link = UserMovie.query.filter_by(
-                user_id=user_id, movie_id=movie_id
-            ).first()
+            link = self._lock_user_movie_link(user_id, movie_id)
             if not link:
                 current_app.logger.warning(
                     f"No UserMovie link to delete for user {user_id}, movie {movie_id}"
                 )
                 return False
 
+            old_rating = link.user_rating
             db.session.delete(link)
+            self._apply_community_rating_delta(movie_id, old_rating, None)
+            self._apply_save_delta(movie_id, -1)
+            self._notify_changed(
+                "users", "movies", f"user:{user_id}", f"movie:{movie_id}"
+            )
+            self._notify_rating_changed(user_id, movie_id, "removed")
             db.session.commit()
             current_app.logger.info(
                 f"Removed movie {movie_id} from user {user_id}'s list"
             )
-
-            return self._update_community_rating(movie_id)
+            return True
 
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -488,6 +1277,7 @@ class SQLiteDataManager(DataManagerInterface):
             )
             return False
 
+    @read_only
     def get_movie_by_imdb_id(self, imdb_id: str) -> Optional[Movie]:
         """
         Return a movie by its IMDb ID.
@@ -558,70 +1348,159 @@ class SQLiteDataManager(DataManagerInterface):
 
         return parsed
 
+    @read_write
     def add_movie_globally(self, movie_data: dict) -> Optional[Movie]:
         """
         Add a movie globally using OMDb data. Returns the Movie or None.
         """
+        try:
+            with self._unit_of_work():
+                return self._create_movie_from_omdb(movie_data)
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error in add_movie_globally: {e}")
+            return None
+
+    def _create_movie_from_omdb(self, movie_data: dict) -> Optional[Movie]:
+        """
+        Return the movie with the record's imdbID, creating it if needed.
+        Flushes into the caller's unit of work; SQL errors propagate.
+        """
         raw_id = movie_data.get("imdbID")
         if not raw_id:
             current_app.logger.warning("No imdbID in OMDb data")
             return None
 
-        try:
-            exist = Movie.query.filter_by(imdb_id=raw_id).first()
-            if exist:
-                current_app.logger.info(
-                    f"Movie with imdb_id {raw_id} exists (ID: {exist.id})"
-                )
-                return exist
-
-            fields = self._parse_omdb_data_for_movie_fields(movie_data)
-            if not fields.get("imdb_id"):
-                current_app.logger.error(
-                    f"imdbID missing after parsing for raw_id {raw_id}"
-                )
-                return None
-
-            new_movie = Movie(**fields)
-            db.session.add(new_movie)
-            db.session.flush()
-
-            if self._update_community_rating(new_movie.id):
-                return new_movie
+        exist = Movie.query.filter_by(imdb_id=raw_id).first()
+        if exist:
+            current_app.logger.info(
+                f"Movie with imdb_id {raw_id} exists (ID: {exist.id})"
+            )
+            return exist
 
-            db.session.rollback()
+        fields = self._parse_omdb_data_for_movie_fields(movie_data)
+        if not fields.get("imdb_id"):
             current_app.logger.error(
-                f"Community update failed for new movie {new_movie.id}"
+                f"imdbID missing after parsing for raw_id {raw_id}"
             )
             return None
 
+        initial = fields.get("initial_omdb_rating")
+        new_movie = Movie(
+            **fields,
+            rating_sum=initial or 0.0,
+            community_rating=initial,
+            community_rating_count=1 if initial is not None else 0,
+        )
+        db.session.add(new_movie)
+        db.session.flush()
+        self._notify_changed("movies", f"movie:{new_movie.id}")
+        current_app.logger.info(
+            f"Created movie {new_movie.id} for imdb_id {raw_id}"
+        )
+        return new_movie
+
+    def _movie_row_from_omdb(self, movie_data: dict) -> dict:
+        """
+        Return Movie column values for an OMDb-like record, with the initial
+        OMDb rating counted as the first community rating.
+        """
+        fields = self._parse_omdb_data_for_movie_fields(movie_data)
+        initial = fields["initial_omdb_rating"]
+        fields.update(
+            rating_sum=initial or 0.0,
+            community_rating=initial,
+            community_rating_count=1 if initial is not None else 0,
+            save_count=0,
+        )
+        return fields
+
+    @read_write
+    def bulk_add_movies_globally(self, records: List[dict]) -> Optional[dict]:
+        """
+        Add a chunk of OMDb-like records in one transaction.
+        Known imdb_ids are found with one query; new movies are inserted
+        with a single executemany. Returns counts of inserted, existing,
+        duplicate (repeated within the chunk) and invalid records, or None.
+        """
+        counts = {"inserted": 0, "existing": 0, "duplicate": 0, "invalid": 0}
+        by_imdb_id = {}
+        for record in records:
+            raw_id = record.get("imdbID")
+            if not raw_id or raw_id == "N/A":
+                counts["invalid"] += 1
+            elif raw_id in by_imdb_id:
+                counts["duplicate"] += 1
+            else:
+                by_imdb_id[raw_id] = record
+        if not by_imdb_id:
+            return counts
+
+        try:
+            existing = set(db.session.scalars(
+                select(Movie.imdb_id).where(Movie.imdb_id.in_(list(by_imdb_id)))
+            ))
+            counts["existing"] = len(existing)
+            rows = [
+                self._movie_row_from_omdb(record)
+                for raw_id, record in by_imdb_id.items()
+                if raw_id not in existing
+            ]
+            if rows:
+                new_ids = db.session.scalars(insert(Movie).returning(Movie.id), rows).all()
+                self._notify_changed("movies", *(f"movie:{movie_id}" for movie_id in new_ids))
+            db.session.commit()
+            counts["inserted"] = len(rows)
+            return counts
+
         except SQLAlchemyError as e:
             db.session.rollback()
-            current_app.logger.error(f"Error in add_movie_globally: {e}")
+            current_app.logger.error(f"Error in bulk_add_movies_globally: {e}")
             return None
 
+    @read_only
     def get_top_movies(self, limit: int = 10) -> List[tuple[Movie, int, Optional[float]]]:
         """
         Return top movies by user count and community rating.
+        Reads the first 'limit' entries of the leaderboard index on
+        (save_count, community_rating); no aggregation over user_movies.
         """
         try:
-            results = (
-                db.session.query(
-                    Movie,
-                    func.count(UserMovie.user_id).label("user_count"),
-                    Movie.community_rating,
-                )
-                .join(UserMovie, UserMovie.movie_id == Movie.id)
-                .group_by(Movie.id, Movie.community_rating)
-                .order_by(desc("user_count"), desc(Movie.community_rating))
+            return db.session.execute(
+                select(Movie, Movie.save_count.label("user_count"), Movie.community_rating)
+                .where(Movie.save_count > 0)
+                .order_by(Movie.save_count.desc(), Movie.community_rating.desc())
                 .limit(limit)
-                .all()
-            )
-            return results
+            ).all()
         except SQLAlchemyError as e:
             current_app.logger.error(f"Error fetching top movies: {e}")
             return []
 
+    @read_only
+    def get_trending_movies(
+        self, days: int = 7, limit: int = 10
+    ) -> List[tuple[Movie, int, Optional[float]]]:
+        """
+        Return movies with the most net list saves in the last 'days' days,
+        as (Movie, user_count, community_rating) like get_top_movies.
+        Sums the daily save buckets inside the window only.
+        """
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        net_saves = func.sum(MovieDailySaves.saves).label("user_count")
+        try:
+            return db.session.execute(
+                select(Movie, net_saves, Movie.community_rating)
+                .join(MovieDailySaves, MovieDailySaves.movie_id == Movie.id)
+                .where(MovieDailySaves.day >= since)
+                .group_by(Movie.id)
+                .having(net_saves > 0)
+                .order_by(desc("user_count"), Movie.community_rating.desc())
+                .limit(limit)
+            ).all()
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error fetching trending movies: {e}")
+            return []
+
+    @read_only
     def get_user_by_name(self, name: str) -> Optional[User]:
         """
         Return a user by name (case-insensitive).
@@ -636,6 +1515,7 @@ class SQLiteDataManager(DataManagerInterface):
             current_app.logger.error(f"Error fetching user by name '{search}': {e}")
             return None
 
+    @read_only
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         """
         Return a user by their ID.
@@ -644,14 +1524,31 @@ class SQLiteDataManager(DataManagerInterface):
             current_app.logger.warning(f"Non-integer user_id: {user_id}")
             return None
         try:
-            return User.query.get(user_id)
+            return self._memoized(("user", user_id), lambda: User.query.get(user_id))
         except SQLAlchemyError as e:
             current_app.logger.error(f"Error fetching user by ID {user_id}: {e}")
             return None
 
+    def get_user_from_snapshot(self, snapshot: Optional[dict]) -> Optional[User]:
+        """
+        Return the User described by a session snapshot ({"id": ..., "name": ...})
+        without querying. It joins db.session like a loaded user, so later
+        get_user_by_id calls in the request reuse it.
+        """
+        if not isinstance(snapshot, dict):
+            return None
+        user_id, name = snapshot.get("id"), snapshot.get("name")
+        if not isinstance(user_id, int) or not isinstance(name, str):
+            return None
+        user = User(id=user_id, name=name)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    @read_only
     def get_user_movie_relations(self, user_id: int) -> List[UserMovie]:
         """
-        Return all UserMovie links for the given user.
+        Return all UserMovie links for the given user, with .movie loaded
+        from the same JOIN (one query regardless of list length).
         """
         try:
             user = self.get_user_by_id(user_id)
@@ -664,6 +1561,7 @@ class SQLiteDataManager(DataManagerInterface):
             return (
                 UserMovie.query.filter_by(user_id=user_id)
                 .join(Movie)
+                .options(contains_eager(UserMovie.movie))
                 .order_by(Movie.id)
                 .all()
             )
@@ -673,6 +1571,7 @@ class SQLiteDataManager(DataManagerInterface):
             )
             return []
 
+    @read_only
     def get_movie_by_id(self, movie_id: int) -> Optional[Movie]:
         """
         Return a movie by its ID.
@@ -681,11 +1580,12 @@ class SQLiteDataManager(DataManagerInterface):
             current_app.logger.warning(f"Non-integer movie_id: {movie_id}")
             return None
         try:
-            return Movie.query.get(movie_id)
+            return self._memoized(("movie", movie_id), lambda: Movie.query.get(movie_id))
         except SQLAlchemyError as e:
             current_app.logger.error(f"Error fetching movie by ID {movie_id}: {e}")
             return None
 
+    @read_write
     def add_comment(self, movie_id: int, user_id: int, text: str) -> Optional[Comment]:
         """
         Add a comment to a movie by a user. Returns the Comment or None.
@@ -708,6 +1608,7 @@ class SQLiteDataManager(DataManagerInterface):
         try:
             comment = Comment(movie_id=movie.id, user_id=user.id, text=text_clean)
             db.session.add(comment)
+            self._notify_changed(f"comments:{movie.id}")
             db.session.commit()
             current_app.logger.info(
                 f"Added comment {comment.id} by user {user_id} to movie {movie_id}"
@@ -720,6 +1621,7 @@ class SQLiteDataManager(DataManagerInterface):
             )
             return None
 
+    @read_only
     def get_all_movies(self) -> List[Movie]:
         """
         Return all movies ordered by title.
@@ -730,9 +1632,108 @@ class SQLiteDataManager(DataManagerInterface):
             current_app.logger.error(f"Error fetching all movies: {e}")
             return []
 
+    @read_only
+    def get_movies_page(
+        self, limit: int = 100, after: Optional[tuple[str, int]] = None
+    ) -> List[Movie]:
+        """
+        Return up to 'limit' movies ordered by (title, id), starting after the
+        given (title, id) keyset cursor.
+        """
+        try:
+            query = Movie.query
+            if after is not None:
+                query = query.filter(tuple_(Movie.title, Movie.id) > tuple_(*after))
+            return query.order_by(Movie.title, Movie.id).limit(limit).all()
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error fetching movies page after {after}: {e}")
+            return []
+
+    @read_only
+    def iter_all_movies(self, batch_size: int = 500) -> Iterator[Movie]:
+        """
+        Yield all movies ordered by (title, id), fetching 'batch_size' rows at
+        a time from the cursor so memory stays constant for any catalog size.
+        """
+        stmt = (
+            select(Movie)
+            .order_by(Movie.title, Movie.id)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from db.session.scalars(stmt)
+
+    @read_only
+    def iter_user_movie_ratings(
+        self, batch_size: int = 1000
+    ) -> Iterator[tuple[int, int, Optional[float]]]:
+        """
+        Yield (user_id, movie_id, user_rating) for every saved movie, fetching
+        'batch_size' rows at a time. Rows are grouped by user.
+        """
+        stmt = (
+            select(UserMovie.user_id, UserMovie.movie_id, UserMovie.user_rating)
+            .order_by(UserMovie.user_id)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in db.session.execute(stmt):
+            yield row.user_id, row.movie_id, row.user_rating
+
+    @read_only
+    def get_movies_by_ids(self, movie_ids: List[int]) -> List[Movie]:
+        """
+        Return the movies with the given IDs in the same order.
+        Unknown IDs are skipped.
+        """
+        if not movie_ids:
+            return []
+        try:
+            movies = db.session.scalars(
+                select(Movie).where(Movie.id.in_(movie_ids))
+            ).all()
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error fetching movies {movie_ids}: {e}")
+            return []
+        by_id = {movie.id: movie for movie in movies}
+        return [by_id[mid] for mid in movie_ids if mid in by_id]
+
+    @staticmethod
+    def _fts_match_expression(query: str, match_any: bool = False) -> str:
+        """
+        Turn free text into an FTS5 MATCH expression of prefix terms that must
+        all match (or any, with match_any). Words are quoted, so FTS operators
+        in the input are inert.
+        """
+        words = re.findall(r"\w+", query)
+        return (" OR " if match_any else " ").join(f'"{w}"*' for w in words)
+
+    @read_only
+    def search_movies(
+        self, query: str, limit: int = 10, match_any: bool = False
+    ) -> List[Movie]:
+        """
+        Full-text search over title, original title, director, actors and genre.
+        Returns up to 'limit' movies ranked by bm25, best match first.
+        With match_any, movies matching any word qualify (for fuzzy lookups).
+        """
+        match = self._fts_match_expression(query or "", match_any)
+        if not match:
+            return []
+        try:
+            return (
+                Movie.query.join(movies_fts, movies_fts.c.rowid == Movie.id)
+                .filter(text("movies_fts MATCH :match").bindparams(match=match))
+                .order_by(MOVIE_SEARCH_RANK)
+                .limit(limit)
+                .all()
+            )
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error searching movies for '{query}': {e}")
+            return []
+
+    @read_only
     def get_comments_for_movie(self, movie_id: int) -> List[Comment]:
         """
-        Return all comments for a movie, newest first.
+        Return all comments for a movie, newest first, with authors eager-loaded.
         """
         movie = self.get_movie_by_id(movie_id)
         if not movie:
@@ -741,6 +1742,7 @@ class SQLiteDataManager(DataManagerInterface):
         try:
             return (
                 Comment.query.filter_by(movie_id=movie_id)
+                .options(joinedload(Comment.user))
                 .order_by(Comment.created_at.desc())
                 .all()
             )
@@ -750,6 +1752,7 @@ class SQLiteDataManager(DataManagerInterface):
             )
             return []
 
+    @read_only
     def get_user_movie_link(self, user_id: int, movie_id: int) -> Optional[UserMovie]:
         """
         Return the UserMovie link between a user and movie.
@@ -765,11 +1768,56 @@ class SQLiteDataManager(DataManagerInterface):
             return None
 
         try:
-            return UserMovie.query.filter_by(
-                user_id=user_id, movie_id=movie_id
-            ).first()
+            return self._find_user_movie_link(user_id, movie_id)
         except SQLAlchemyError as e:
             current_app.logger.error(
                 f"Error fetching UserMovie link for user {user_id}, movie {movie_id}: {e}"
             )
             return None
+
+    @read_only
+    def get_version(
+        self, tags: List[str], user_list_id: Optional[int] = None
+    ) -> Optional[tuple[str, Optional[datetime]]]:
+        """
+        Return (version, last modified) of the data behind entity tags: a
+        string that changes with every committed write to one of them, and
+        the UTC time of the latest such write (None if never written).
+        Collection tags ("movies", "users") change with every member.
+        With user_list_id, every movie in that user's list is covered too.
+        Returns None on error.
+        """
+        wanted = sorted(set(tags))
+        try:
+            rows = db.session.execute(
+                select(EntityVersion.tag, EntityVersion.version, EntityVersion.updated_at)
+                .where(EntityVersion.tag.in_(wanted))
+            ).all()
+            versions = dict.fromkeys(wanted, 0)
+            stamps = []
+            for tag, version, updated_at in rows:
+                versions[tag] = version
+                stamps.append(updated_at)
+            parts = [f"{tag}={version}" for tag, version in versions.items()]
+
+            if user_list_id is not None:
+                # Versions only grow and list changes bump "user:<id>", so
+                # (count, sum) changes whenever a listed movie does.
+                movie_tag = literal("movie:", String) + cast(UserMovie.movie_id, String)
+                count, total, latest = db.session.execute(
+                    select(
+                        func.count(UserMovie.id),
+                        func.coalesce(func.sum(EntityVersion.version), 0),
+                        func.max(EntityVersion.updated_at),
+                    )
+                    .select_from(UserMovie)
+                    .outerjoin(EntityVersion, EntityVersion.tag == movie_tag)
+                    .where(UserMovie.user_id == user_list_id)
+                ).one()
+                parts.append(f"list:{user_list_id}={count}/{total}")
+                if latest is not None:
+                    stamps.append(latest)
+            return ";".join(parts), max(stamps, default=None)
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error reading versions of {wanted}: {e}")
+            return None
@@ -0,0 +1,102 @@
+# sqlite_tuning.py
+# Connection profile for SQLite engines: PRAGMAs applied on connect and pool sizing.
+
+import os
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+# PRAGMAs set on every new connection, in this order. journal_mode=WAL lets
+# readers run while a writer commits; synchronous=NORMAL is durable across
+# application crashes in WAL mode (only an OS crash can lose the last commits).
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",       # ms to wait for a lock before "database is locked"
+    "cache_size": "-65536",       # negative: KiB, i.e. 64 MiB page cache per connection
+    "mmap_size": "268435456",     # 256 MiB memory-mapped I/O
+    "temp_store": "MEMORY",
+}
+DEFAULT_POOL_SIZE = 20
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_TIMEOUT = 30
+
+# Settings read back for the startup report.
+REPORTED_PRAGMAS = (
+    "journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store",
+)
+# PRAGMAs that read back as numbers.
+PRAGMA_VALUE_NAMES = {
+    "synchronous": {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"},
+    "temp_store": {0: "DEFAULT", 1: "FILE", 2: "MEMORY"},
+}
+
+
+def sqlite_pragmas_from_env() -> dict:
+    """
+    Return the PRAGMAs to apply, overridable per setting with SQLITE_<NAME>
+    (e.g. SQLITE_JOURNAL_MODE=DELETE). SQLITE_TUNING=off disables them all.
+    """
+    if os.getenv("SQLITE_TUNING", "on").lower() in ("0", "off", "false", "no"):
+        return {}
+    return {
+        name: os.getenv(f"SQLITE_{name.upper()}", default)
+        for name, default in DEFAULT_SQLITE_PRAGMAS.items()
+    }
+
+
+def _is_file_sqlite(uri: str) -> bool:
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def engine_options(uri: str) -> dict:
+    """
+    Return SQLALCHEMY_ENGINE_OPTIONS for uri. File databases get a connection
+    pool sized by DB_POOL_SIZE, DB_MAX_OVERFLOW and DB_POOL_TIMEOUT, large
+    enough for the app's worker and background threads.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite" and not _is_file_sqlite(uri):
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", DEFAULT_POOL_SIZE)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", DEFAULT_MAX_OVERFLOW)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)),
+    }
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: Optional[dict] = None) -> None:
+    """
+    Apply pragmas (default: sqlite_pragmas_from_env()) to every connection
+    the engine opens. Does nothing for non-SQLite engines.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas_from_env() if pragmas is None else pragmas
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def describe_engine(engine: Engine) -> dict:
+    """
+    Return the effective settings of an engine: backend, pool status and,
+    for SQLite, the PRAGMA values of a pooled connection.
+    """
+    settings = {"backend": engine.dialect.name, "pool": engine.pool.status()}
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            for name in REPORTED_PRAGMAS:
+                value = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                settings[name] = PRAGMA_VALUE_NAMES.get(name, {}).get(value, value)
+    return settings
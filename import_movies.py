@@ -0,0 +1,132 @@
+"""
+import_movies.py
+
+Bulk-imports OMDb-shaped movie records into the CineCrowd catalog:
+
+    python import_movies.py movies.ndjson
+    python import_movies.py omdb_dump.csv.gz --chunk-size 5000
+
+Records are streamed from a CSV file (one OMDb field per column, e.g.
+imdbID, Title, Year, Director, imdbRating) or an NDJSON file (one OMDb JSON
+object per line), optionally gzip-compressed. Each chunk is deduplicated
+against existing imdb_ids with one query and inserted with one executemany,
+so memory use does not grow with the file size.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sys
+import time
+from itertools import islice
+from typing import Iterator, Optional
+
+from flask import current_app
+
+from datamanager import create_data_manager
+from init_db import create_app
+
+DEFAULT_CHUNK_SIZE = 1000
+PROGRESS_INTERVAL = 2.0  # seconds between progress lines
+
+
+def _open_text(path: str):
+    """Open path for reading text, decompressing .gz files."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _normalize(record: dict) -> dict:
+    """Drop empty keys and None values; turn numbers into OMDb-style strings."""
+    return {
+        key: value if isinstance(value, str) else str(value)
+        for key, value in record.items()
+        if key is not None and value is not None
+    }
+
+
+def iter_records(path: str, file_format: Optional[str] = None) -> Iterator[dict]:
+    """Yield OMDb-like records from a CSV or NDJSON file, one at a time."""
+    if file_format is None:
+        name = path[:-3] if path.endswith(".gz") else path
+        file_format = "csv" if name.endswith(".csv") else "ndjson"
+    with _open_text(path) as f:
+        if file_format == "csv":
+            for row in csv.DictReader(f):
+                yield _normalize(row)
+            return
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"Skipping line {line_no}: invalid JSON", file=sys.stderr)
+                continue
+            if isinstance(record, dict):
+                yield _normalize(record)
+
+
+def iter_chunks(records: Iterator[dict], size: int) -> Iterator[list[dict]]:
+    """Group records into lists of at most size records."""
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_movies(
+    path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, file_format: Optional[str] = None
+) -> dict:
+    """Import all records of path in chunks; return totals and throughput."""
+    data_manager = create_data_manager(current_app.config['SQLALCHEMY_DATABASE_URI'])
+    totals = {"read": 0, "inserted": 0, "existing": 0, "duplicate": 0, "invalid": 0, "failed": 0}
+    started = last_report = time.perf_counter()
+    for chunk in iter_chunks(iter_records(path, file_format), chunk_size):
+        totals["read"] += len(chunk)
+        counts = data_manager.bulk_add_movies_globally(chunk)
+        if counts is None:
+            totals["failed"] += len(chunk)
+        else:
+            for key, value in counts.items():
+                totals[key] += value
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            print(
+                f"{totals['read']} read, {totals['inserted']} inserted "
+                f"({totals['read'] / (now - started):.0f} rows/s)",
+                file=sys.stderr,
+            )
+    elapsed = time.perf_counter() - started
+    totals["seconds"] = round(elapsed, 2)
+    totals["rows_per_second"] = round(totals["read"] / elapsed) if elapsed else 0
+    return totals
+
+
+def main(argv=None) -> int:
+    """Parse arguments and run the import."""
+    parser = argparse.ArgumentParser(description="Bulk-import OMDb-shaped movie records.")
+    parser.add_argument("path", help="CSV or NDJSON file (optionally .gz)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        totals = import_movies(args.path, args.chunk_size, args.format)
+    print(
+        f"Imported {totals['inserted']} of {totals['read']} records in {totals['seconds']}s "
+        f"({totals['rows_per_second']} rows/s): {totals['existing']} already present, "
+        f"{totals['duplicate']} duplicates, {totals['invalid']} without imdbID, "
+        f"{totals['failed']} failed."
+    )
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,8 +8,12 @@ import os
 
 from dotenv import load_dotenv
 from flask import Flask
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
 
-from models import db
+from datamanager import create_data_manager
+from datamanager.sqlite_tuning import describe_engine, engine_options, install_sqlite_pragmas
+from models import MOVIE_FTS_DDL, MOVIE_SEARCH_PG_DDL, db
 
 load_dotenv()
 
@@ -21,16 +25,88 @@ def create_app():
         'DATABASE_URI', 'sqlite:///moviewebapp.db'
     )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI']
+    )
     db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine)
     return app
 
 
+def add_missing_columns():
+    """Add model columns that are missing from already existing tables."""
+    inspector = inspect(db.engine)
+    existing_tables = inspector.get_table_names()
+    added = []
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                col_type = column.type.compile(dialect=db.engine.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'
+                ))
+                added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def remove_duplicate_user_movie_links():
+    """Keep only the oldest UserMovie link per (user_id, movie_id) pair."""
+    with db.engine.begin() as conn:
+        result = conn.execute(text(
+            'DELETE FROM user_movies WHERE id NOT IN '
+            '(SELECT MIN(id) FROM user_movies GROUP BY user_id, movie_id)'
+        ))
+    return result.rowcount
+
+
+def create_missing_indexes():
+    """Create model indexes that are missing from already existing tables."""
+    # IF NOT EXISTS rather than checkfirst: reflection skips expression indexes.
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def create_movie_search_index():
+    """Create the movies full-text index (and its SQLite triggers), then rebuild it."""
+    if db.engine.dialect.name == 'postgresql':
+        with db.engine.begin() as conn:
+            for statement in MOVIE_SEARCH_PG_DDL:
+                conn.execute(text(statement))
+        return
+    if db.engine.dialect.name != 'sqlite':
+        return
+    with db.engine.begin() as conn:
+        for statement in MOVIE_FTS_DDL:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')"))
+
+
 def main():
     """Initialize the database tables."""
     app = create_app()
     with app.app_context():
         db.create_all()
+        added = add_missing_columns()
+        if added:
+            print(f"Added missing columns: {', '.join(added)}")
+        removed = remove_duplicate_user_movie_links()
+        if removed:
+            print(f"Removed {removed} duplicate user movie links.")
+        create_missing_indexes()
+        create_movie_search_index()
+        data_manager = create_data_manager(app.config['SQLALCHEMY_DATABASE_URI'])
+        data_manager.recompute_all_community_ratings()
+        data_manager.rebuild_cooccurrence()
         print("Database and tables created successfully.")
+        print(f"Database settings: {describe_engine(db.engine)}")
 
 
 if __name__ == '__main__':
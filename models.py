@@ -6,13 +6,45 @@ Defines SQLAlchemy ORM models for CineCrowd:
 - Movie: movie metadata
 - UserMovie: many-to-many link with user-specific rating
 - Comment: user comments on movies
+- OmdbCacheEntry: cached OMDb API responses
+- MovieCooccurrence: movies saved together
+- MovieCooccurrenceEntry: list entries counted in MovieCooccurrence
+- MovieDailySaves: net list saves per movie and day, for trending
+- EntityVersion: write counters per entity, for HTTP ETags
+
+and the db instance, whose session can route reads to replicas.
 """
 
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import DDL, event
+
+# Session.info key holding the engine that serves reads of the current
+# data manager call (set by datamanager/replicas.py; None = primary).
+READ_ENGINE_KEY = "read_engine"
+
+
+class RoutingSession(Session):
+    """
+    Session that runs SELECTs on the read engine of the current data manager
+    call, if one is set. Flushes and all other statements use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = self.info.get(READ_ENGINE_KEY)
+        if (
+            engine is not None
+            and bind is None
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+        ):
+            return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
 # Global SQLAlchemy instance (initialized in app.py)
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class User(db.Model):
@@ -41,6 +73,10 @@ class User(db.Model):
         return f"<User {self.id} {self.name}>"
 
 
+# Case-insensitive login lookup (get_user_by_name, add_user duplicate check).
+db.Index("ix_users_name_lower", db.func.lower(User.name))
+
+
 class Movie(db.Model):
     """
     A film with metadata and community ratings.
@@ -62,6 +98,8 @@ class Movie(db.Model):
         poster_url (str | None): URL to poster image.
         community_rating (float | None): Average user rating.
         community_rating_count (int): Number of ratings.
+        rating_sum (float): Running sum of all ratings behind community_rating.
+        save_count (int): Number of users with this movie in their list.
         imdb_id (str | None): IMDb identifier.
         metascore (str | None): Metascore value.
         rated_omdb (str | None): MPAA rating from OMDb.
@@ -87,6 +125,8 @@ class Movie(db.Model):
     poster_url = db.Column(db.String(255))
     community_rating = db.Column(db.Float)
     community_rating_count = db.Column(db.Integer, default=0)
+    rating_sum = db.Column(db.Float, default=0.0)
+    save_count = db.Column(db.Integer, default=0)
     imdb_id = db.Column(db.String(20), unique=True)
     metascore = db.Column(db.String(10))
     rated_omdb = db.Column(db.String(20))
@@ -103,6 +143,59 @@ class Movie(db.Model):
         return f"<Movie {self.id} {self.title}>"
 
 
+# Case-insensitive title/year lookup used when matching existing movies.
+db.Index("ix_movies_title_lower_year", db.func.lower(Movie.title), Movie.year)
+# Keyset pagination over (title, id) for the movie catalog.
+db.Index("ix_movies_title_id", Movie.title, Movie.id)
+# Community leaderboard: top movies are the first rows of this index.
+db.Index("ix_movies_leaderboard", Movie.save_count.desc(), Movie.community_rating.desc())
+
+# Full-text index over movie metadata (SQLite FTS5, external content on
+# movies), kept in sync by triggers. Statements are idempotent so init_db
+# can also apply them to existing databases.
+MOVIE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5("
+    "title, original_title, director, actors, genre, "
+    "content='movies', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_ai AFTER INSERT ON movies BEGIN "
+    "INSERT INTO movies_fts(rowid, title, original_title, director, actors, genre) "
+    "VALUES (new.id, new.title, new.original_title, new.director, new.actors, new.genre); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_ad AFTER DELETE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, original_title, director, actors, genre) "
+    "VALUES ('delete', old.id, old.title, old.original_title, old.director, old.actors, old.genre); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_au AFTER UPDATE OF "
+    "title, original_title, director, actors, genre ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, original_title, director, actors, genre) "
+    "VALUES ('delete', old.id, old.title, old.original_title, old.director, old.actors, old.genre); "
+    "INSERT INTO movies_fts(rowid, title, original_title, director, actors, genre) "
+    "VALUES (new.id, new.title, new.original_title, new.director, new.actors, new.genre); "
+    "END",
+)
+for _statement in MOVIE_FTS_DDL:
+    event.listen(
+        Movie.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite")
+    )
+
+# PostgreSQL counterpart: a GIN expression index over a weighted tsvector of
+# the same columns. Queries must use MOVIE_SEARCH_DOCUMENT verbatim to use it.
+MOVIE_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(original_title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(director, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(actors, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(genre, '')), 'D')"
+)
+MOVIE_SEARCH_PG_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_movies_search ON movies USING gin (({MOVIE_SEARCH_DOCUMENT}))",
+)
+for _statement in MOVIE_SEARCH_PG_DDL:
+    event.listen(
+        Movie.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql")
+    )
+
+
 class UserMovie(db.Model):
     """
     Association between User and Movie with a personal rating.
@@ -112,15 +205,22 @@ class UserMovie(db.Model):
         user_id (int): ID of the user.
         movie_id (int): ID of the movie.
         user_rating (float | None): User's rating (0–5).
+        rated_at (datetime | None): When user_rating was last set (UTC);
+            queued rating changes older than this are stale.
         user (User): The associated user.
         movie (Movie): The associated movie.
     """
     __tablename__ = "user_movies"
+    __table_args__ = (
+        db.Index("ux_user_movies_user_movie", "user_id", "movie_id", unique=True),
+        db.Index("ix_user_movies_movie_id", "movie_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     movie_id = db.Column(db.Integer, db.ForeignKey("movies.id"), nullable=False)
     user_rating = db.Column(db.Float)
+    rated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = db.relationship("User", back_populates="movies")
     movie = db.relationship("Movie", back_populates="users")
@@ -144,6 +244,9 @@ class Comment(db.Model):
         movie (Movie): The movie commented on.
     """
     __tablename__ = "comments"
+    __table_args__ = (
+        db.Index("ix_comments_movie_created", "movie_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.Text, nullable=False)
@@ -158,3 +261,118 @@ class Comment(db.Model):
 
     def __repr__(self):
         return f"<Comment {self.id} user={self.user_id} movie={self.movie_id}>"
+
+
+class OmdbCacheEntry(db.Model):
+    """
+    A cached OMDb API response.
+
+    Attributes:
+        cache_key (str): Lookup key, "id:<imdbID>:<plot>" or
+            "t:<normalized title>:<year>:<plot>".
+        payload (str): Raw OMDb JSON response.
+        is_found (bool): False for cached "not found" answers.
+        fetched_at (datetime): When the response was fetched from OMDb.
+    """
+    __tablename__ = "omdb_cache"
+
+    cache_key = db.Column(db.String(400), primary_key=True)
+    payload = db.Column(db.Text, nullable=False)
+    is_found = db.Column(db.Boolean, nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<OmdbCacheEntry {self.cache_key} found={self.is_found}>"
+
+
+class MovieCooccurrence(db.Model):
+    """
+    How many users have both movies in their lists.
+    Each pair is stored in both directions, so the neighbours of a movie
+    are one index range scan on (movie_id, together_count).
+
+    Attributes:
+        movie_id (int): ID of the movie.
+        other_movie_id (int): ID of a movie saved together with it.
+        together_count (int): Number of users who saved both.
+    """
+    __tablename__ = "movie_cooccurrence"
+    __table_args__ = (
+        db.Index("ix_movie_cooccurrence_movie_count", "movie_id", "together_count"),
+        db.Index("ix_movie_cooccurrence_other", "other_movie_id"),
+    )
+
+    movie_id = db.Column(db.Integer, db.ForeignKey("movies.id"), primary_key=True)
+    other_movie_id = db.Column(db.Integer, db.ForeignKey("movies.id"), primary_key=True)
+    together_count = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<MovieCooccurrence {self.movie_id}-{self.other_movie_id} x{self.together_count}>"
+
+
+class MovieCooccurrenceEntry(db.Model):
+    """
+    A list entry counted in MovieCooccurrence. Updates compare these with
+    user_movies to find the entries saved or removed since, so each list
+    change is counted exactly once, however often it is applied.
+
+    Attributes:
+        user_id (int): ID of the user.
+        movie_id (int): ID of the movie in the user's list.
+    """
+    __tablename__ = "movie_cooccurrence_entries"
+    __table_args__ = (
+        db.Index("ix_movie_cooccurrence_entries_movie", "movie_id"),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    movie_id = db.Column(db.Integer, db.ForeignKey("movies.id"), primary_key=True)
+
+    def __repr__(self):
+        return f"<MovieCooccurrenceEntry user={self.user_id} movie={self.movie_id}>"
+
+
+class MovieDailySaves(db.Model):
+    """
+    Net number of list saves (saves minus removals) of a movie on one day.
+    Summed over recent days for the trending leaderboard.
+
+    Attributes:
+        movie_id (int): ID of the movie.
+        day (date): UTC day of the saves.
+        saves (int): Saves minus removals on that day.
+    """
+    __tablename__ = "movie_daily_saves"
+    __table_args__ = (
+        db.Index("ix_movie_daily_saves_day", "day"),
+    )
+
+    movie_id = db.Column(db.Integer, db.ForeignKey("movies.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    saves = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<MovieDailySaves {self.movie_id} {self.day} {self.saves:+d}>"
+
+
+class EntityVersion(db.Model):
+    """
+    Write counter of an entity, bumped in the same transaction as every
+    write to it; HTTP validators (ETag, Last-Modified) are derived from it.
+
+    Attributes:
+        tag (str): Entity tag as sent with data_changed: "movie:3",
+            "user:7" (the user's list), "comments:3" (a movie's comments),
+            or a collection, "movies" or "users", bumped with each of its
+            members.
+        version (int): Number of committed writes.
+        updated_at (datetime): Time of the latest write (UTC).
+    """
+    __tablename__ = "entity_versions"
+
+    tag = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<EntityVersion {self.tag} v{self.version}>"
@@ -0,0 +1,7 @@
+"""
+services package: clients and helpers for external services used by MovieWeb.
+"""
+
+from .http_client import HttpClient, get_http_client
+
+__all__ = ["HttpClient", "get_http_client"]
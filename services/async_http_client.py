@@ -0,0 +1,170 @@
+"""
+services/async_http_client.py
+Outbound HTTP client for the ASGI entry point (aiohttp).
+
+One aiohttp session per event loop keeps a pool of keep-alive connections,
+so hundreds of OMDb/OpenRouter requests can be in flight on a single worker
+without a thread each. Responses come back as requests.Response objects and
+failures as requests exceptions, so callers handle them exactly like
+results from services.http_client. Configured from the same HTTP_* env vars,
+plus HTTP_ASYNC_MAX_CONNECTIONS.
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from services.http_client import (
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_BACKOFF_JITTER,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    RETRY_STATUS_CODES,
+    retry_after_seconds,
+)
+from services.metrics import record_upstream_call
+
+DEFAULT_MAX_CONNECTIONS = 200
+
+
+class AsyncHttpClient:
+    """
+    Pooled keep-alive async HTTP client with retries. Must be used and
+    closed on one event loop; the session is opened on first use.
+
+    Args:
+        max_connections: Maximum concurrent connections across hosts.
+        connect_timeout: Default connect timeout in seconds.
+        read_timeout: Default read timeout in seconds.
+        retries: Retries for connection errors and retryable status codes.
+        backoff_factor: Base of the exponential backoff between retries.
+        backoff_jitter: Maximum random seconds added to each backoff.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        backoff_jitter: float = DEFAULT_BACKOFF_JITTER,
+    ):
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self.requests = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=self.timeout,
+            )
+        return self._session
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[float] = None,
+        upstream: Optional[str] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request through the pooled session and read the whole body.
+        kwargs are passed to aiohttp (params, headers, data, json).
+        Raises requests.exceptions.Timeout or ConnectionError on failure.
+        Its latency is recorded under 'upstream' (default: the URL's host).
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            resp = await self._request(method, url, timeout, **kwargs)
+            outcome = str(resp.status_code)
+            return resp
+        finally:
+            record_upstream_call(
+                upstream or urlsplit(url).hostname or "unknown",
+                time.perf_counter() - started,
+                outcome,
+            )
+
+    async def _request(
+        self, method: str, url: str, timeout: Optional[float], **kwargs
+    ) -> requests.Response:
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                self.requests += 1
+                async with self._get_session().request(method, url, **kwargs) as resp:
+                    if resp.status in RETRY_STATUS_CODES and not last_attempt:
+                        retry_after = retry_after_seconds(resp.headers.get("Retry-After"))
+                        await self._backoff(attempt, retry_after)
+                        continue
+                    return _to_requests_response(resp, await resp.read())
+            except asyncio.TimeoutError as e:
+                if last_attempt:
+                    raise requests.exceptions.Timeout(f"{method} {url} timed out") from e
+            except aiohttp.ClientError as e:
+                if last_attempt:
+                    raise requests.exceptions.ConnectionError(f"{method} {url} failed: {e}") from e
+            await self._backoff(attempt)
+
+    async def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> None:
+        if retry_after is not None:
+            await asyncio.sleep(retry_after)
+            return
+        await asyncio.sleep(
+            self.backoff_factor * (2 ** attempt) + random.uniform(0, self.backoff_jitter)
+        )
+
+    async def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request."""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request."""
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+
+
+def _to_requests_response(resp: aiohttp.ClientResponse, body: bytes) -> requests.Response:
+    """Wrap an aiohttp response and its body as a requests.Response."""
+    result = requests.Response()
+    result.status_code = resp.status
+    result.reason = resp.reason
+    result.headers = CaseInsensitiveDict(resp.headers)
+    result.url = str(resp.url)
+    result.encoding = resp.get_encoding() if body else None
+    result._content = body
+    return result
+
+
+def create_async_http_client() -> AsyncHttpClient:
+    """Return a new AsyncHttpClient configured from HTTP_* env vars."""
+    return AsyncHttpClient(
+        max_connections=int(os.getenv("HTTP_ASYNC_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+        read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+        retries=int(os.getenv("HTTP_RETRIES", DEFAULT_RETRIES)),
+        backoff_factor=float(os.getenv("HTTP_BACKOFF_FACTOR", DEFAULT_BACKOFF_FACTOR)),
+        backoff_jitter=float(os.getenv("HTTP_BACKOFF_JITTER", DEFAULT_BACKOFF_JITTER)),
+    )
@@ -0,0 +1,127 @@
+"""
+services/cooccurrence.py
+Background maintenance of the "saved together" co-occurrence index.
+
+List changes are queued as (user_id, movie_id) entries. A single worker
+thread waits for the first one, keeps collecting for a short coalescing
+window, then applies each distinct entry once: +1 or -1 to its pairs with
+the other movies in that user's list. A batch that fails is kept and
+retried with the next one. When more than max_queue entries are pending,
+further changes only mark their user, whose whole list is then reconciled
+with the index; nothing is dropped and nothing needs a full rebuild.
+"""
+
+import threading
+import time
+from typing import Callable, List
+
+from flask import Flask, current_app
+
+# Seconds to wait before retrying a failed batch.
+RETRY_DELAY = 5.0
+
+
+class CooccurrenceIndexer:
+    """
+    Coalescing consumer of list-change events.
+
+    Args:
+        refresh: Applies a list of changed (user_id, movie_id) entries and
+            reconciles the whole lists of a list of user IDs; returns success.
+        max_queue: Pending entries kept before falling back to per-user
+            reconciliation.
+        window: Seconds to keep collecting events after the first one.
+        retry_delay: Seconds to wait before retrying a failed batch.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[List[tuple[int, int]], List[int]], bool],
+        max_queue: int = 10000,
+        window: float = 2.0,
+        retry_delay: float = RETRY_DELAY,
+    ):
+        self.refresh = refresh
+        self.max_queue = max_queue
+        self.window = window
+        self.retry_delay = retry_delay
+        self.events = 0
+        self.batches = 0
+        self.overflows = 0
+        self.failures = 0
+        self._entries: set[tuple[int, int]] = set()
+        self._users: set[int] = set()
+        self._worker = None
+        self._cond = threading.Condition()
+
+    def submit(self, user_id: int, movie_id: int) -> None:
+        """
+        Queue a list entry that was saved or removed. Must be called inside
+        an app context; the worker is started on first use.
+        """
+        self._ensure_worker(current_app._get_current_object())
+        with self._cond:
+            self.events += 1
+            if user_id not in self._users:
+                if len(self._entries) < self.max_queue or (user_id, movie_id) in self._entries:
+                    self._entries.add((user_id, movie_id))
+                else:
+                    self._users.add(user_id)
+                    self.overflows += 1
+            self._cond.notify()
+
+    def _ensure_worker(self, app: Flask) -> None:
+        with self._cond:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, args=(app,), name="cooccurrence-indexer", daemon=True
+                )
+                self._worker.start()
+
+    def _next_batch(self) -> tuple[set[tuple[int, int]], set[int]]:
+        """Block for one event, let more arrive until the window closes, take them all."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._entries or self._users)
+        time.sleep(self.window)
+        with self._cond:
+            entries, self._entries = self._entries, set()
+            users, self._users = self._users, set()
+        return {e for e in entries if e[0] not in users}, users
+
+    def _requeue(self, entries: set[tuple[int, int]], users: set[int]) -> None:
+        """Put a failed batch back, merged with whatever arrived meanwhile."""
+        with self._cond:
+            self._users |= users
+            self._entries = {e for e in self._entries | entries if e[0] not in self._users}
+
+    def _run(self, app: Flask) -> None:
+        while True:
+            entries, users = self._next_batch()
+            with self._cond:
+                self.batches += 1
+            try:
+                with app.app_context():
+                    ok = self.refresh(sorted(entries), sorted(users))
+            except Exception as e:
+                app.logger.error(f"Co-occurrence worker error: {e}")
+                ok = False
+            if not ok:
+                app.logger.error(
+                    f"Co-occurrence update failed for {len(entries)} entries and "
+                    f"{len(users)} users; retrying in {self.retry_delay}s"
+                )
+                with self._cond:
+                    self.failures += 1
+                self._requeue(entries, users)
+                time.sleep(self.retry_delay)
+
+    def stats(self) -> dict:
+        """Return queue depth and event/batch/overflow/failure counters."""
+        with self._cond:
+            return {
+                "queued": len(self._entries) + len(self._users),
+                "events": self.events,
+                "batches": self.batches,
+                "overflows": self.overflows,
+                "failures": self.failures,
+            }
@@ -0,0 +1,178 @@
+"""
+services/http_client.py
+Shared outbound HTTP client for OMDb and OpenRouter.
+
+One requests.Session per process keeps a pool of keep-alive connections per
+host, so repeated lookups reuse an open TCP/TLS connection instead of paying
+the handshake each time. Transient failures (connection errors, 429 and
+5xx gateway answers) are retried with jittered exponential backoff, POSTs
+included: OpenRouter completions have no side effects besides their cost.
+A Retry-After header is honoured, up to MAX_RETRY_AFTER seconds.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InvalidHeader
+from urllib3.util.retry import Retry
+
+from services.metrics import record_upstream_call
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 20
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_BACKOFF_JITTER = 0.2
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+RETRY_METHODS = Retry.DEFAULT_ALLOWED_METHODS | {"POST"}
+# Longest Retry-After (s) waited for; a worker is blocked while it waits.
+MAX_RETRY_AFTER = 5.0
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Return the wait of a Retry-After header value, capped at MAX_RETRY_AFTER."""
+    if not value:
+        return None
+    try:
+        return min(Retry().parse_retry_after(value), MAX_RETRY_AFTER)
+    except InvalidHeader:
+        return None
+
+
+class _Retry(Retry):
+    """Retry that waits at most MAX_RETRY_AFTER for a Retry-After header."""
+
+    def get_retry_after(self, response) -> Optional[float]:
+        return retry_after_seconds(response.headers.get("Retry-After"))
+
+
+class HttpClient:
+    """
+    Pooled keep-alive HTTP client with retries and connection-reuse counters.
+
+    Args:
+        pool_connections: Number of per-host pools to keep.
+        pool_maxsize: Maximum open connections per host pool.
+        connect_timeout: Default connect timeout in seconds.
+        read_timeout: Default read timeout in seconds.
+        retries: Retries for connection errors and retryable status codes.
+        backoff_factor: Base of the exponential backoff between retries.
+        backoff_jitter: Maximum random seconds added to each backoff.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        backoff_jitter: float = DEFAULT_BACKOFF_JITTER,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        retry = _Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+    def request(
+        self, method: str, url: str, upstream: Optional[str] = None, **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the pooled session. Its latency is recorded
+        under 'upstream' (default: the URL's host).
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            resp = self.session.request(method, url, **kwargs)
+            outcome = str(resp.status_code)
+            return resp
+        finally:
+            record_upstream_call(
+                upstream or urlsplit(url).hostname or "unknown",
+                time.perf_counter() - started,
+                outcome,
+            )
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request."""
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        """
+        Return per-host request and connection counters.
+        'pool_hits' counts requests served on an already open connection.
+        """
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "requests": pool.num_requests,
+                "connections": pool.num_connections,
+                "pool_hits": max(pool.num_requests - pool.num_connections, 0),
+            }
+        return {
+            "requests": sum(h["requests"] for h in hosts.values()),
+            "connections": sum(h["connections"] for h in hosts.values()),
+            "pool_hits": sum(h["pool_hits"] for h in hosts.values()),
+            "hosts": hosts,
+        }
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HttpClient, configured from HTTP_* env vars."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(
+                    pool_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", DEFAULT_POOL_CONNECTIONS)),
+                    pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE)),
+                    connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+                    read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+                    retries=int(os.getenv("HTTP_RETRIES", DEFAULT_RETRIES)),
+                    backoff_factor=float(os.getenv("HTTP_BACKOFF_FACTOR", DEFAULT_BACKOFF_FACTOR)),
+                    backoff_jitter=float(os.getenv("HTTP_BACKOFF_JITTER", DEFAULT_BACKOFF_JITTER)),
+                )
+    return _client
@@ -0,0 +1,154 @@
+"""
+services/memo.py
+In-process memo cache with TTL, LRU bound and request coalescing.
+
+Concurrent calls for the same key while a value is being computed wait for
+that single computation instead of starting their own ("single flight"),
+whether they run in threads or on an event loop.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _InFlight:
+    """A computation other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def result(self) -> Any:
+        """Return the value of the finished computation, or raise its error."""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class MemoCache:
+    """
+    Thread-safe memo cache.
+
+    Args:
+        max_entries: Least recently used entries beyond this are evicted.
+        ttl: Seconds an entry stays valid.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        cache_if: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        Return the cached value for key, or compute it once.
+        Only values for which cache_if(value) is true are stored; callers
+        coalesced onto a computation get its result either way.
+        """
+        hit, call, leader = self._claim(key)
+        if hit:
+            return call
+        if not leader:
+            call.done.wait()
+            return call.result()
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call, cache_if)
+        return call.value
+
+    async def get_or_compute_async(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        cache_if: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        get_or_compute() for the event loop: compute() is awaited, and
+        callers coalesced onto a computation, async or not, wait for it
+        without blocking the loop.
+        """
+        hit, call, leader = self._claim(key)
+        if hit:
+            return call
+        if not leader:
+            await asyncio.get_running_loop().run_in_executor(None, call.done.wait)
+            return call.result()
+        try:
+            call.value = await compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call, cache_if)
+        return call.value
+
+    def _claim(self, key: Hashable) -> tuple[bool, Any, bool]:
+        """
+        Return (True, value, False) for a fresh cached value, else
+        (False, the in-flight computation, whether the caller leads it).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1], False
+            call = self._inflight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return False, call, False
+            call = self._inflight[key] = _InFlight()
+            self.misses += 1
+            return False, call, True
+
+    def _finish(self, key: Hashable, call: _InFlight, cache_if: Callable[[Any], bool]) -> None:
+        """Store a finished computation if wanted and wake its waiters."""
+        with self._lock:
+            del self._inflight[key]
+            if call.error is None and cache_if(call.value):
+                self._entries[key] = (time.monotonic() + self.ttl, call.value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        call.done.set()
+
+    def peek(self, key: Hashable) -> Any:
+        """Return the cached value for key if fresh, else None; never computes."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            return None
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return size and hit/miss/coalesced counters."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
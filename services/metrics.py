@@ -0,0 +1,305 @@
+"""
+services/metrics.py
+Request, SQL and upstream instrumentation exported in Prometheus text format.
+
+- Route latency histograms per (route, method, status), recorded by Flask
+  before/after request hooks.
+- SQL query counts and time per request and query latency per statement
+  kind and bind, recorded by SQLAlchemy before/after_cursor_execute hooks.
+- Outbound OMDb/OpenRouter latency per upstream and outcome, recorded by the
+  HTTP clients.
+- Requests slower than SLOW_REQUEST_SECONDS are logged with the SQL
+  statements and upstream calls they ran.
+
+Metrics are kept per process; scrape each worker (or run one) to get totals.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Iterable, Optional
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+QUERIES_PER_REQUEST_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50, 100)
+UPSTREAM_SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20)
+
+DEFAULT_SLOW_REQUEST_SECONDS = 1.0
+# Statements kept per request for the slow-request log.
+MAX_LOGGED_STATEMENTS = 50
+MAX_STATEMENT_LENGTH = 500
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: Optional[dict]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values: dict[Labels, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the counter of these labels by amount."""
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, labels, value
+
+
+class Histogram:
+    """Histogram with fixed upper bounds, cumulative like Prometheus expects."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._lock = threading.Lock()
+        # labels -> [count per bucket..., sum, count]
+        self._values: dict[Labels, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation for these labels."""
+        key = _labels(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        with self._lock:
+            items = [(labels, list(row)) for labels, row in self._values.items()]
+        for labels, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                yield f"{self.name}_bucket", labels + (("le", le),), cumulative
+            yield f"{self.name}_sum", labels, row[-2]
+            yield f"{self.name}_count", labels, row[-1]
+
+
+class _Collected:
+    """Gauges or counters read from a callback at scrape time."""
+
+    def __init__(self, name: str, kind: str, help_text: str, collect: Callable):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self._collect = collect
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        for labels, value in self._collect():
+            yield self.name, _labels(labels), value
+
+
+class MetricsRegistry:
+    """Named metrics of this process, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, object] = {}
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """Return the counter 'name', creating it on first use."""
+        return self._register(Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple) -> Histogram:
+        """Return the histogram 'name', creating it on first use."""
+        return self._register(Histogram(name, help_text, buckets))
+
+    def collector(self, name: str, kind: str, help_text: str, collect: Callable) -> None:
+        """
+        Export 'name' from collect(), called at scrape time, which returns
+        (labels dict, value) pairs; kind is "gauge" or "counter".
+        """
+        with self._lock:
+            self._metrics[name] = _Collected(name, kind, help_text, collect)
+
+    def render(self) -> str:
+        """Return all metrics in Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+request_seconds = registry.histogram(
+    "movieweb_request_duration_seconds",
+    "Time to handle a request, by route, method and status.",
+    REQUEST_SECONDS_BUCKETS,
+)
+request_queries = registry.histogram(
+    "movieweb_request_db_queries",
+    "SQL statements executed per request, by route.",
+    QUERIES_PER_REQUEST_BUCKETS,
+)
+request_db_seconds = registry.histogram(
+    "movieweb_request_db_seconds",
+    "Time spent in SQL statements per request, by route.",
+    REQUEST_SECONDS_BUCKETS,
+)
+slow_requests = registry.counter(
+    "movieweb_slow_requests_total",
+    "Requests slower than SLOW_REQUEST_SECONDS, by route.",
+)
+query_seconds = registry.histogram(
+    "movieweb_db_query_duration_seconds",
+    "SQL statement latency, by statement kind and database bind.",
+    QUERY_SECONDS_BUCKETS,
+)
+upstream_seconds = registry.histogram(
+    "movieweb_upstream_request_duration_seconds",
+    "Outbound HTTP request latency including retries, by upstream and outcome.",
+    UPSTREAM_SECONDS_BUCKETS,
+)
+
+
+def _statement_kind(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[:1]
+    kind = word[0].upper() if word else ""
+    return kind if kind in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+def install_sql_hooks(engine: Engine, bind: str = "primary") -> None:
+    """
+    Time every statement the engine executes; statements run during a
+    request also count towards that request's totals.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        query_seconds.observe(elapsed, kind=_statement_kind(statement), bind=bind)
+        if has_request_context() and "sql_queries" in g:
+            g.sql_queries += 1
+            g.sql_seconds += elapsed
+            if len(g.sql_statements) < MAX_LOGGED_STATEMENTS:
+                g.sql_statements.append((elapsed, bind, statement[:MAX_STATEMENT_LENGTH]))
+
+    @event.listens_for(engine, "handle_error")
+    def drop_query_timer(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def record_upstream_call(upstream: str, elapsed: float, outcome: str) -> None:
+    """Record an outbound HTTP call; outcome is the status code or "error"."""
+    upstream_seconds.observe(elapsed, upstream=upstream, outcome=outcome)
+    if has_request_context() and "upstream_calls" in g:
+        g.upstream_calls.append((elapsed, upstream, outcome))
+
+
+def _route_label() -> str:
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def init_app(app: Flask, slow_request_seconds: float = DEFAULT_SLOW_REQUEST_SECONDS) -> None:
+    """
+    Record request metrics for app, log slow requests and serve /metrics.
+    Call install_sql_hooks() for each engine to include SQL metrics.
+    """
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.sql_queries = 0
+        g.sql_seconds = 0.0
+        g.sql_statements = []
+        g.upstream_calls = []
+
+    @app.after_request
+    def record_request(response):
+        started = g.get("request_started")
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = _route_label()
+        request_seconds.observe(
+            elapsed, route=route, method=request.method, status=response.status_code
+        )
+        request_queries.observe(g.sql_queries, route=route)
+        request_db_seconds.observe(g.sql_seconds, route=route)
+        if elapsed >= slow_request_seconds:
+            slow_requests.inc(route=route)
+            _log_slow_request(app, elapsed, response.status_code)
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _log_slow_request(app: Flask, elapsed: float, status: int) -> None:
+    lines = [
+        f"Slow request {request.method} {request.full_path.rstrip('?')} -> {status}: "
+        f"{elapsed:.3f}s, {g.sql_queries} SQL queries ({g.sql_seconds:.3f}s), "
+        f"{len(g.upstream_calls)} upstream calls"
+    ]
+    for seconds, upstream, outcome in g.upstream_calls:
+        lines.append(f"  upstream {upstream} {outcome} {seconds * 1000:.1f} ms")
+    for seconds, bind, statement in g.sql_statements:
+        lines.append(f"  sql [{bind}] {seconds * 1000:.1f} ms: {' '.join(statement.split())}")
+    if g.sql_queries > len(g.sql_statements):
+        lines.append(f"  ... {g.sql_queries - len(g.sql_statements)} more statements")
+    app.logger.warning("\n".join(lines))
@@ -0,0 +1,318 @@
+"""
+services/omdb.py
+OMDb lookups with a persistent response cache.
+
+Responses are stored in the omdb_cache table keyed by imdbID or by
+normalized title/year, so repeated lookups do not spend OMDb quota.
+Found movies and "not found" answers have separate TTLs. With
+stale-while-revalidate enabled, an expired entry is still returned
+during a grace window while a background thread refreshes it.
+"""
+
+import json
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import OmdbCacheEntry, db
+from services.http_client import HttpClient, get_http_client
+from services.prefetch import MISSING, UpstreamCall, take_prefetched
+
+OMDB_URL = os.getenv("OMDB_URL", "http://www.omdbapi.com/")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_NEGATIVE_TTL = 3600
+DEFAULT_STALE_TTL = 24 * 3600
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a title for cache keys: accents folded, case-folded,
+    punctuation dropped and whitespace collapsed.
+    """
+    text = unicodedata.normalize("NFKD", title)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _NON_WORD.sub(" ", text.casefold())
+    return _SPACES.sub(" ", text).strip()
+
+
+def make_cache_key(
+    title: Optional[str] = None,
+    imdb_id: Optional[str] = None,
+    year: Optional[str] = None,
+    plot: str = "short",
+) -> str:
+    """Return the omdb_cache key for a lookup; imdbID takes precedence."""
+    if imdb_id:
+        return f"id:{imdb_id.strip().lower()}:{plot}"
+    return f"t:{normalize_title(title or '')}:{(year or '').strip()}:{plot}"
+
+
+def _is_cacheable_miss(data: dict) -> bool:
+    """Only cache definite 'not found' answers, not key or quota errors."""
+    return "not found" in data.get("Error", "").lower()
+
+
+class OmdbClient:
+    """
+    OMDb client backed by the omdb_cache table.
+
+    Args:
+        api_key: OMDb API key.
+        http_client: Pooled HTTP client used for upstream requests.
+        ttl: Seconds a found movie stays fresh.
+        negative_ttl: Seconds a "not found" answer stays fresh.
+        stale_ttl: Extra seconds an expired entry may be served while it is
+            refreshed in the background; 0 disables stale serving.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        http_client: HttpClient,
+        ttl: int = DEFAULT_TTL,
+        negative_ttl: int = DEFAULT_NEGATIVE_TTL,
+        stale_ttl: int = DEFAULT_STALE_TTL,
+    ):
+        self.api_key = api_key
+        self.http_client = http_client
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        title: Optional[str] = None,
+        imdb_id: Optional[str] = None,
+        year: Optional[str] = None,
+        plot: str = "short",
+        timeout: float = 10,
+    ) -> dict:
+        """
+        Return the OMDb response for a title or imdbID lookup.
+        Raises requests exceptions if OMDb must be queried and fails.
+        """
+        key = make_cache_key(title, imdb_id, year, plot)
+        prefetched = take_prefetched(("omdb", key))
+        if prefetched is not MISSING:
+            return prefetched
+
+        cached = self._cached(key)
+        if cached is not None:
+            data, is_stale = cached
+            if is_stale:
+                self._refresh_in_background(key, title, imdb_id, year, plot, timeout)
+            return data
+
+        current_app.logger.debug(f"OMDb cache miss for '{key}'")
+        return self._fetch_and_store(key, title, imdb_id, year, plot, timeout)
+
+    async def lookup_async(
+        self,
+        http_client,
+        run_sync: Callable[..., Awaitable],
+        title: Optional[str] = None,
+        imdb_id: Optional[str] = None,
+        year: Optional[str] = None,
+        plot: str = "short",
+        timeout: float = 10,
+    ) -> dict:
+        """
+        lookup() for the ASGI entry point: the OMDb request is awaited on
+        the event loop through an AsyncHttpClient, and cache reads and writes
+        go through run_sync(func, *args), which runs them in a worker thread
+        with an app context. Raises requests exceptions if OMDb fails.
+        """
+        key = make_cache_key(title, imdb_id, year, plot)
+        cached = await run_sync(self._cached, key)
+        if cached is not None:
+            data, is_stale = cached
+            if is_stale:
+                await run_sync(
+                    self._refresh_in_background, key, title, imdb_id, year, plot, timeout
+                )
+            return data
+
+        resp = await http_client.get(
+            OMDB_URL,
+            params=self._params(title, imdb_id, year, plot),
+            timeout=timeout,
+            upstream="omdb",
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        await run_sync(self._store_response, key, plot, data)
+        return data
+
+    @staticmethod
+    def upstream_call(
+        title: Optional[str] = None,
+        imdb_id: Optional[str] = None,
+        year: Optional[str] = None,
+        plot: str = "short",
+    ) -> UpstreamCall:
+        """Describe a lookup() a view will make, for prefetching under ASGI."""
+        return UpstreamCall(
+            "omdb",
+            ("omdb", make_cache_key(title, imdb_id, year, plot)),
+            title=title, imdb_id=imdb_id, year=year, plot=plot,
+        )
+
+    def _cached(self, key: str) -> Optional[tuple[dict, bool]]:
+        """
+        Return (data, is_stale) for a usable cache entry, or None when OMDb
+        must be queried. Stale entries are inside the stale_ttl grace window.
+        """
+        entry = self._load(key)
+        if entry is None:
+            return None
+        data, is_found, age = entry
+        ttl = self.ttl if is_found else self.negative_ttl
+        if age < ttl:
+            current_app.logger.debug(f"OMDb cache hit for '{key}'")
+            return data, False
+        if age < ttl + self.stale_ttl:
+            current_app.logger.debug(f"OMDb cache stale hit for '{key}'")
+            return data, True
+        return None
+
+    def _load(self, key: str) -> Optional[tuple[dict, bool, float]]:
+        """Return (data, is_found, age_seconds) for key, or None."""
+        table = OmdbCacheEntry.__table__
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(table.c.payload, table.c.is_found, table.c.fetched_at)
+                .where(table.c.cache_key == key)
+            ).first()
+        if row is None:
+            return None
+        age = (datetime.utcnow() - row.fetched_at).total_seconds()
+        return json.loads(row.payload), row.is_found, age
+
+    def _store(self, keys: list[str], data: dict, is_found: bool) -> None:
+        """Upsert data under every key in one transaction."""
+        table = OmdbCacheEntry.__table__
+        now = datetime.utcnow()
+        payload = json.dumps(data)
+        with db.engine.begin() as conn:
+            upsert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+            for key in keys:
+                stmt = upsert(table).values(
+                    cache_key=key, payload=payload, is_found=is_found, fetched_at=now
+                )
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=[table.c.cache_key],
+                    set_={"payload": payload, "is_found": is_found, "fetched_at": now},
+                ))
+
+    def _fetch_and_store(
+        self,
+        key: str,
+        title: Optional[str],
+        imdb_id: Optional[str],
+        year: Optional[str],
+        plot: str,
+        timeout: float,
+    ) -> dict:
+        """Query OMDb, cache the answer if cacheable and return it."""
+        resp = self.http_client.get(
+            OMDB_URL,
+            params=self._params(title, imdb_id, year, plot),
+            timeout=timeout,
+            upstream="omdb",
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        self._store_response(key, plot, data)
+        return data
+
+    def _params(
+        self,
+        title: Optional[str],
+        imdb_id: Optional[str],
+        year: Optional[str],
+        plot: str,
+    ) -> dict:
+        """Return OMDb query parameters for a lookup."""
+        params = {"apikey": self.api_key, "plot": plot}
+        if title:
+            params["t"] = title
+        if imdb_id:
+            params["i"] = imdb_id
+        if year:
+            params["y"] = year
+        return params
+
+    def _store_response(self, key: str, plot: str, data: dict) -> None:
+        """
+        Cache a found movie under key and its imdbID key, or a definite
+        "not found" under key; other errors are not cached.
+        """
+        if data.get("Response") == "True":
+            keys = [key]
+            if data.get("imdbID"):
+                keys.append(make_cache_key(imdb_id=data["imdbID"], plot=plot))
+            self._store(list(dict.fromkeys(keys)), data, True)
+        elif _is_cacheable_miss(data):
+            self._store([key], data, False)
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        title: Optional[str],
+        imdb_id: Optional[str],
+        year: Optional[str],
+        plot: str,
+        timeout: float,
+    ) -> None:
+        """Start one refresh thread per key; later calls are ignored until it ends."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    self._fetch_and_store(key, title, imdb_id, year, plot, timeout)
+            except Exception as e:
+                app.logger.warning(f"OMDb background refresh failed for '{key}': {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"omdb-refresh-{key}", daemon=True).start()
+
+
+_client: Optional[OmdbClient] = None
+_client_lock = threading.Lock()
+
+
+def get_omdb_client() -> OmdbClient:
+    """Return the process-wide OmdbClient, configured from OMDB_* env vars."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                stale = os.getenv("OMDB_CACHE_STALE_WHILE_REVALIDATE", "true").lower() == "true"
+                _client = OmdbClient(
+                    api_key=os.getenv("OMDB_API_KEY"),
+                    http_client=get_http_client(),
+                    ttl=int(os.getenv("OMDB_CACHE_TTL", DEFAULT_TTL)),
+                    negative_ttl=int(os.getenv("OMDB_CACHE_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL)),
+                    stale_ttl=int(os.getenv("OMDB_CACHE_STALE_TTL", DEFAULT_STALE_TTL)) if stale else 0,
+                )
+    return _client
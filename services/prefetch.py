@@ -0,0 +1,91 @@
+"""
+services/prefetch.py
+Hand-off of upstream results fetched ahead of a sync view.
+
+Under the ASGI entry point (asgi.py), views that call OMDb or OpenRouter
+first have their upstream calls planned and awaited on the event loop.
+The results travel to the Flask view in the WSGI environ, and the sync
+clients take them from there instead of blocking a worker on the network.
+Under a plain WSGI server nothing is prefetched and the clients call
+upstream as usual.
+
+Planner and view make their branch decisions through planned(), so the
+view follows the branch that was prefetched for without repeating the
+queries behind it.
+"""
+
+from typing import Any, Callable, Optional
+
+from flask import has_request_context, request
+
+from services.memo import MemoCache
+
+PREFETCH_ENVIRON_KEY = "movieweb.prefetched"
+PLANNED_ENVIRON_KEY = "movieweb.planned"
+MISSING = object()
+
+# endpoint name -> planner returning the upstream calls its view will make.
+UPSTREAM_PLANNERS: dict[str, Callable[..., list["UpstreamCall"]]] = {}
+
+
+class UpstreamCall:
+    """
+    One OMDb lookup or OpenRouter completion a view is about to make.
+
+    Args:
+        kind: "omdb" or "openrouter".
+        key: Key under which the sync client looks for the result.
+        memo: MemoCache whose single flight concurrent identical calls
+            share, so they make one upstream request.
+        kwargs: Arguments of the upstream call.
+    """
+
+    def __init__(self, kind: str, key: tuple, memo: Optional[MemoCache] = None, **kwargs):
+        self.kind = kind
+        self.key = key
+        self.memo = memo
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return f"<UpstreamCall {self.kind} {self.kwargs}>"
+
+
+def plans_upstream_calls(endpoint: str):
+    """
+    Register a planner for an endpoint. The planner gets the view arguments,
+    runs inside the request context and returns the UpstreamCalls the view
+    will make for this request.
+    """
+    def decorator(planner):
+        UPSTREAM_PLANNERS[endpoint] = planner
+        return planner
+    return decorator
+
+
+def planned(name: str, decide: Callable[[], Any]) -> Any:
+    """
+    Return this request's decision called name, made by decide() on first
+    use. Under ASGI the planner makes it and it reaches the view with the
+    prefetched results. Decisions must be plain data, not ORM objects: the
+    planner runs in another session.
+    """
+    decisions = request.environ.setdefault(PLANNED_ENVIRON_KEY, {})
+    if name not in decisions:
+        decisions[name] = decide()
+    return decisions[name]
+
+
+def take_prefetched(key: tuple):
+    """
+    Return the prefetched result for key and forget it, or MISSING.
+    A prefetched exception is raised as if the upstream call had failed here.
+    """
+    if not has_request_context():
+        return MISSING
+    prefetched = request.environ.get(PREFETCH_ENVIRON_KEY)
+    if not prefetched or key not in prefetched:
+        return MISSING
+    result = prefetched.pop(key)
+    if isinstance(result, BaseException):
+        raise result
+    return result
@@ -0,0 +1,394 @@
+"""
+services/rating_queue.py
+Write-behind queue for rating changes (RATING_WRITE_BEHIND).
+
+submit() appends a change, stamped with its submit time, to a local
+append-only log, flushed (and by default fsynced) before it returns. A
+single worker thread collects changes for a short window and applies them
+with one data manager call: one transaction, one community rating update
+per movie. A burst of ratings on one movie then takes the database writer
+lock once per batch instead of once per request. submit() does not wait for
+the batch; pending_for() returns a user's changes not yet committed, so
+pages can show the writing client its own ratings.
+
+Each process appends to its own log in the queue directory and holds an
+exclusive lock on it. Logs nobody holds, left by a stopped or crashed
+process, are replayed when the queue starts (or, without write-behind, by
+replay_orphaned_logs() at startup). Changes older than the stored rating's
+rated_at are skipped, so a replay never overwrites a newer write, and
+replaying changes that were already applied is harmless. A log is
+truncated once everything in it has been applied, and the queue is drained
+when the process exits. A failed batch is retried, no larger than
+max_batch; after max_attempts failures its changes are applied one at a
+time, and those that still fail are logged and dropped.
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional
+
+from flask import Flask, current_app
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, run a single process.
+    fcntl = None
+
+# (user_id, movie_id, rating, submit time in epoch seconds or None).
+RatingChange = tuple[int, int, Optional[float], Optional[float]]
+# What the apply callback gets: the submit time as naive UTC datetime.
+RatingUpdate = tuple[int, int, Optional[float], Optional[datetime]]
+
+LOG_PREFIX = "ratings-"
+LOG_SUFFIX = ".log"
+# Seconds to wait at exit for queued changes to be applied.
+EXIT_DRAIN_TIMEOUT = 10.0
+
+
+def _try_lock(f) -> bool:
+    """Take an exclusive lock on an open file without waiting."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _parse_log(f) -> List[RatingChange]:
+    """
+    Read the changes of a log; a torn last line (crash mid-write) is
+    dropped. Lines from before submit times were logged get None.
+    """
+    changes = []
+    for line in f:
+        try:
+            user_id, movie_id, rating, *submitted_at = json.loads(line)
+        except ValueError:
+            continue
+        changes.append((int(user_id), int(movie_id), rating, (submitted_at or [None])[0]))
+    return changes
+
+
+def _as_updates(changes: List[RatingChange]) -> List[RatingUpdate]:
+    """Convert submit times to the naive UTC datetimes the data manager stores."""
+    return [
+        (
+            user_id, movie_id, rating,
+            datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None) if ts is not None else None,
+        )
+        for user_id, movie_id, rating, ts in changes
+    ]
+
+
+def _orphaned_logs(directory: str, own_path: Optional[str] = None) -> Iterator[tuple[str, object]]:
+    """
+    Yield (path, open file) for each log in directory that no process holds,
+    locked while the caller handles it. The caller truncates and removes it.
+    """
+    pattern = os.path.join(directory, f"{LOG_PREFIX}*{LOG_SUFFIX}")
+    for path in sorted(glob.glob(pattern)):
+        if path == own_path:
+            continue
+        try:
+            with open(path, "r+", encoding="utf-8") as f:
+                if _try_lock(f):
+                    yield path, f
+        except FileNotFoundError:
+            # Taken over by another process meanwhile.
+            continue
+
+
+def _discard_log(path: str, f) -> None:
+    """Empty and remove a replayed log (emptied first: another process may have opened it)."""
+    f.truncate(0)
+    os.remove(path)
+
+
+def replay_orphaned_logs(
+    directory: str, apply: Callable[[List[RatingUpdate]], bool], app: Flask
+) -> int:
+    """
+    Apply the changes of orphaned logs synchronously, for processes that run
+    without write-behind. A log is removed once applied; one that fails is
+    left for the next start. Returns the number of changes replayed.
+    """
+    replayed = 0
+    for path, f in _orphaned_logs(directory):
+        try:
+            changes = _parse_log(f)
+            if changes:
+                app.logger.warning(f"Replaying {len(changes)} queued ratings from {path}")
+                with app.app_context():
+                    if not apply(_as_updates(changes)):
+                        app.logger.error(f"Replaying {path} failed; kept for the next start")
+                        continue
+            _discard_log(path, f)
+            replayed += len(changes)
+        except OSError as e:
+            app.logger.error(f"Could not replay rating queue log {path}: {e}")
+    return replayed
+
+
+class RatingWriteQueue:
+    """
+    Durable write-behind queue of rating changes with a batching worker.
+
+    Args:
+        apply: Applies a list of (user_id, movie_id, rating, submitted_at)
+            changes in one transaction; returns success.
+        directory: Where the append-only logs are kept.
+        window: Seconds to keep collecting changes after the first one.
+        max_pending: Unapplied changes accepted before submit() refuses.
+        max_batch: Changes applied per transaction.
+        fsync: fsync the log on every submit (off: flush to the OS only).
+        retry_delay: Seconds to wait before retrying a failed batch.
+        max_attempts: Failed attempts after which a batch is applied one
+            change at a time; changes that still fail are logged and dropped.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[List[RatingUpdate]], bool],
+        directory: str,
+        window: float = 0.05,
+        max_pending: int = 10000,
+        max_batch: int = 500,
+        fsync: bool = True,
+        retry_delay: float = 1.0,
+        max_attempts: int = 5,
+    ):
+        self.apply = apply
+        self.directory = directory
+        self.window = window
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.submitted = 0
+        self.applied = 0
+        self.rejected = 0
+        self.replayed = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+        self._pending: List[RatingChange] = []
+        # The batch the worker is applying, until it commits.
+        self._in_flight: List[RatingChange] = []
+        # Changes in our log not yet committed (queued or in the current batch).
+        self._unapplied = 0
+        # Changes ever queued and ever applied (or dropped); batches apply them in order.
+        self._queued_total = 0
+        self._applied_total = 0
+        self._log = None
+        self._log_path = None
+        self._worker = None
+        self._app = None
+        self._cond = threading.Condition()
+
+    def start(self, app: Flask) -> None:
+        """
+        Open our log, replay orphaned logs, start the worker and drain the
+        queue at exit. Call at startup; submit() also starts the queue.
+        """
+        with self._cond:
+            self._ensure_started(app)
+
+    def submit(self, user_id: int, movie_id: int, rating: Optional[float]) -> bool:
+        """
+        Queue a rating change (None removes the rating). Returns False if it
+        was not queued (queue full, log not writable); the caller should then
+        write synchronously. Must be called inside an app context.
+        """
+        app = current_app._get_current_object()
+        change = (user_id, movie_id, rating, time.time())
+        with self._cond:
+            try:
+                self._ensure_started(app)
+                if self._unapplied >= self.max_pending:
+                    self.rejected += 1
+                    return False
+                self._append([json.dumps(change) + "\n"])
+            except OSError as e:
+                app.logger.error(f"Rating queue log not writable: {e}")
+                self.rejected += 1
+                return False
+            self._enqueue([change])
+            self.submitted += 1
+        return True
+
+    def _enqueue(self, changes: List[RatingChange]) -> None:
+        """Queue logged changes for the worker (lock held)."""
+        self._pending.extend(changes)
+        self._unapplied += len(changes)
+        self._queued_total += len(changes)
+        self._cond.notify_all()
+
+    def _append(self, lines: List[str]) -> None:
+        self._log.write("".join(lines))
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+    def _ensure_started(self, app: Flask) -> None:
+        """Open our log, take over orphaned logs and start the worker (lock held)."""
+        if self._log is None:
+            os.makedirs(self.directory, exist_ok=True)
+            name = f"{LOG_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}{LOG_SUFFIX}"
+            # Lock before the log becomes visible, so no one takes it for an orphan.
+            tmp_path = os.path.join(self.directory, f".{name}.tmp")
+            log = open(tmp_path, "a", encoding="utf-8")
+            _try_lock(log)
+            self._log_path = os.path.join(self.directory, name)
+            os.replace(tmp_path, self._log_path)
+            self._log = log
+            self._app = app
+            self._replay_orphans(app)
+            atexit.register(self._drain_at_exit)
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, args=(app,), name="rating-queue", daemon=True
+            )
+            self._worker.start()
+
+    def _replay_orphans(self, app: Flask) -> None:
+        """Move the changes of unlocked logs into our log and queue them."""
+        for path, f in _orphaned_logs(self.directory, self._log_path):
+            try:
+                changes = _parse_log(f)
+                if changes:
+                    self._append([json.dumps(list(c)) + "\n" for c in changes])
+                _discard_log(path, f)
+            except OSError as e:
+                app.logger.error(f"Could not replay rating queue log {path}: {e}")
+                continue
+            if changes:
+                app.logger.warning(f"Replaying {len(changes)} queued ratings from {path}")
+                self._enqueue(changes)
+                self.replayed += len(changes)
+
+    def _next_batch(self, batch: List[RatingChange]) -> List[RatingChange]:
+        """Wait for changes (unless retrying batch), then fill it up to max_batch."""
+        with self._cond:
+            while not self._pending and not batch:
+                self._cond.wait()
+        if self.window > 0 and not batch:
+            time.sleep(self.window)
+        with self._cond:
+            room = max(self.max_batch - len(batch), 0)
+            taken = self._pending[:room]
+            del self._pending[:room]
+            self._in_flight = batch + taken
+            return self._in_flight
+
+    def _apply(self, app: Flask, batch: List[RatingChange]) -> bool:
+        try:
+            with app.app_context():
+                return self.apply(_as_updates(batch))
+        except Exception as e:
+            app.logger.error(f"Rating queue worker error: {e}")
+            return False
+
+    def _apply_one_by_one(self, app: Flask, batch: List[RatingChange]) -> int:
+        """Apply each change alone; log and drop those that fail. Returns the number dropped."""
+        dropped = 0
+        for change in batch:
+            if not self._apply(app, [change]):
+                app.logger.error(f"Dropping queued rating {list(change)}: it cannot be applied")
+                dropped += 1
+        return dropped
+
+    def _run(self, app: Flask) -> None:
+        batch: List[RatingChange] = []
+        attempts = 0
+        dropped = 0
+        while True:
+            batch = self._next_batch(batch)
+            if not self._apply(app, batch):
+                attempts += 1
+                with self._cond:
+                    self.failures += 1
+                if attempts < self.max_attempts:
+                    # Keep the batch (topped up to max_batch) and retry.
+                    app.logger.error(f"Applying {len(batch)} queued ratings failed, retrying")
+                    time.sleep(self.retry_delay)
+                    continue
+                # One change may keep failing (e.g. its movie was deleted):
+                # let the others through.
+                app.logger.error(
+                    f"Applying {len(batch)} queued ratings failed {attempts} times, "
+                    f"applying them one by one"
+                )
+                dropped = self._apply_one_by_one(app, batch)
+            with self._cond:
+                self._in_flight = []
+                self._unapplied -= len(batch)
+                self._applied_total += len(batch)
+                self.applied += len(batch) - dropped
+                self.dropped += dropped
+                self.batches += 1
+                if self._unapplied == 0:
+                    try:
+                        self._log.truncate(0)
+                    except OSError as e:
+                        app.logger.error(f"Could not truncate rating queue log: {e}")
+                self._cond.notify_all()
+            batch = []
+            attempts = dropped = 0
+
+    def pending_for(self, user_id: int) -> dict[int, Optional[float]]:
+        """
+        Return {movie_id: rating} of the user's changes not yet committed,
+        the latest per movie. Read it before the stored ratings: a change
+        leaves it only once the database has it.
+        """
+        with self._cond:
+            return {
+                movie_id: rating
+                for change_user_id, movie_id, rating, _ in self._in_flight + self._pending
+                if change_user_id == user_id
+            }
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """
+        Wait until every change submitted so far is applied or dropped
+        (later ones may still be queued); returns False on timeout. The
+        changes stay queued either way.
+        """
+        with self._cond:
+            target = self._queued_total
+            return self._cond.wait_for(lambda: self._applied_total >= target, timeout)
+
+    def drain(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued change is applied; returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._unapplied, timeout)
+
+    def _drain_at_exit(self) -> None:
+        if not self.drain(EXIT_DRAIN_TIMEOUT):
+            self._app.logger.warning(
+                f"{self._unapplied} queued ratings not applied before exit; "
+                f"they are replayed on the next start"
+            )
+
+    def stats(self) -> dict:
+        """Return queue depth and submit/apply/batch counters."""
+        with self._cond:
+            return {
+                "pending": self._unapplied,
+                "submitted": self.submitted,
+                "applied": self.applied,
+                "rejected": self.rejected,
+                "replayed": self.replayed,
+                "batches": self.batches,
+                "failures": self.failures,
+                "dropped": self.dropped,
+            }
@@ -0,0 +1,167 @@
+"""
+services/recommender.py
+Item-item collaborative filtering over the user x movie rating matrix.
+
+The rating matrix from user_movies is sparse, so similarities are computed
+the way a sparse A^T A product is: row by row over each user's list, adding
+the products of every pair of that user's movies. Cosine similarities are
+shrunk towards zero when few users share both movies, and the top-K
+neighbours of every movie are kept in memory. Lookups are dict reads.
+The index is always built in a background thread; until the first build
+finishes, lookups find no neighbours and callers use their fallback.
+Changes are noticed through mark_stale() (writes of this process) and a
+data version shared by all processes (writes of the others).
+"""
+
+import heapq
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Iterable, Optional
+
+from flask import current_app
+
+# Weight of a movie saved to a list without a rating (ratings are 0-5).
+IMPLICIT_SAVE_WEIGHT = 2.5
+DEFAULT_TOP_K = 20
+DEFAULT_SHRINKAGE = 5.0
+# Users with longer lists are truncated to bound the quadratic pair count.
+DEFAULT_MAX_ITEMS_PER_USER = 500
+
+
+class ItemSimilarityEngine:
+    """
+    In-memory item-item similarity index.
+
+    Args:
+        top_k: Neighbours kept per movie.
+        shrinkage: Similarity is scaled by n / (n + shrinkage), where n is
+            the number of users who have both movies.
+        rebuild_interval: Minimum seconds between rebuilds after data changes.
+        max_items_per_user: Movies of a user's list taken into account; the
+            rest of longer lists is ignored (logged per build).
+    """
+
+    def __init__(
+        self,
+        top_k: int = DEFAULT_TOP_K,
+        shrinkage: float = DEFAULT_SHRINKAGE,
+        rebuild_interval: float = 300,
+        max_items_per_user: int = DEFAULT_MAX_ITEMS_PER_USER,
+    ):
+        self.top_k = top_k
+        self.shrinkage = shrinkage
+        self.rebuild_interval = rebuild_interval
+        self.max_items_per_user = max_items_per_user
+        self._neighbours: dict[int, list[tuple[int, float]]] = {}
+        self._built_at: Optional[float] = None
+        self._stale = True
+        # Data version the current index was built from (see refresh()).
+        self._version: Optional[str] = None
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_built(self) -> bool:
+        """True once the index has been built at least once."""
+        return self._built_at is not None
+
+    def build(self, ratings: Iterable[tuple[int, int, Optional[float]]]) -> None:
+        """
+        Rebuild the index from (user_id, movie_id, rating) rows.
+        A None rating counts as IMPLICIT_SAVE_WEIGHT. Must run inside an app
+        context.
+        """
+        user_items: dict[int, list[tuple[int, float]]] = defaultdict(list)
+        truncated: dict[int, int] = defaultdict(int)
+        for user_id, movie_id, rating in ratings:
+            items = user_items[user_id]
+            if len(items) < self.max_items_per_user:
+                value = IMPLICIT_SAVE_WEIGHT if rating is None else float(rating)
+                # A 0 rating still means the user has the movie.
+                items.append((movie_id, max(value, 0.5)))
+            else:
+                truncated[user_id] += 1
+        if truncated:
+            current_app.logger.warning(
+                f"Recommender ignored {sum(truncated.values())} movies of {len(truncated)} "
+                f"users with more than {self.max_items_per_user} movies in their list"
+            )
+
+        norms: dict[int, float] = defaultdict(float)
+        dots: dict[int, dict[int, float]] = defaultdict(lambda: defaultdict(float))
+        common: dict[int, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        for items in user_items.values():
+            for idx, (movie_i, value_i) in enumerate(items):
+                norms[movie_i] += value_i * value_i
+                for movie_j, value_j in items[idx + 1:]:
+                    a, b = (movie_i, movie_j) if movie_i < movie_j else (movie_j, movie_i)
+                    dots[a][b] += value_i * value_j
+                    common[a][b] += 1
+
+        scored: dict[int, list[tuple[float, int]]] = defaultdict(list)
+        for a, row in dots.items():
+            for b, dot in row.items():
+                n = common[a][b]
+                sim = dot / math.sqrt(norms[a] * norms[b]) * n / (n + self.shrinkage)
+                scored[a].append((sim, b))
+                scored[b].append((sim, a))
+
+        neighbours = {
+            movie_id: [(other, round(sim, 4)) for sim, other in heapq.nlargest(self.top_k, pairs)]
+            for movie_id, pairs in scored.items()
+        }
+        with self._lock:
+            self._neighbours = neighbours
+            self._built_at = time.monotonic()
+
+    def neighbours(self, movie_id: int, limit: int = 5) -> list[tuple[int, float]]:
+        """Return up to 'limit' (movie_id, similarity) pairs, most similar first."""
+        return self._neighbours.get(movie_id, [])[:limit]
+
+    def mark_stale(self) -> None:
+        """Note that ratings changed; the next refresh may rebuild the index."""
+        self._stale = True
+
+    def refresh(
+        self,
+        load_ratings: Callable[[], Iterable[tuple[int, int, Optional[float]]]],
+        run_in_background: Callable[[Callable[[], None]], None],
+        data_version: Optional[Callable[[], Optional[str]]] = None,
+    ) -> None:
+        """
+        Start a background build if the index was never built, or a rebuild
+        when it is stale and rebuild_interval has passed. Lookups keep using
+        the current index (empty before the first build) meanwhile.
+        data_version returns a version of the ratings shared by all processes
+        (None if unknown); once it differs from the one the index was built
+        from, the index is stale even without mark_stale(), e.g. after
+        writes by another worker. It is only read when a rebuild is due.
+        """
+        with self._lock:
+            if self._rebuilding:
+                return
+            first = self._built_at is None
+            if not first and time.monotonic() - self._built_at < self.rebuild_interval:
+                return
+            stale = first or self._stale
+        version = data_version() if data_version is not None else None
+        with self._lock:
+            if self._rebuilding:
+                return
+            if not stale and (version is None or version == self._version):
+                return
+            self._stale = False
+            self._rebuilding = True
+
+        def rebuild():
+            try:
+                self.build(load_ratings())
+                # Read before loading: writes in between trigger another rebuild.
+                self._version = version
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+
+        run_in_background(rebuild)
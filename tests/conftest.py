@@ -0,0 +1,53 @@
+"""
+tests/conftest.py
+Shared fixtures.
+
+app.py reads its configuration at import, so DATABASE_URI is pointed at a
+throwaway SQLite file before any test imports it. Data manager tests build
+their own small app per backend with create_test_app().
+"""
+
+import os
+import shutil
+import tempfile
+
+from flask import Flask
+from sqlalchemy import text
+
+_TMP_DIR = tempfile.mkdtemp(prefix="movieweb-tests-")
+os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(_TMP_DIR, 'app.db')}"
+os.environ["DATABASE_REPLICA_URIS"] = ""
+os.environ["RATING_WRITE_BEHIND"] = "off"
+os.environ["RATING_QUEUE_DIR"] = os.path.join(_TMP_DIR, "rating_queue")
+os.environ["RESPONSE_CACHE_BACKEND"] = "memory"
+
+from datamanager.sqlite_tuning import engine_options, install_sqlite_pragmas  # noqa: E402
+from models import db  # noqa: E402
+
+
+def create_test_app(uri: str) -> Flask:
+    """Return a bare Flask app bound to the database at uri."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(uri)
+    app.config["TESTING"] = True
+    db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine)
+    return app
+
+
+def reset_schema() -> None:
+    """Drop and recreate every table of the current app's database."""
+    db.session.remove()
+    db.drop_all()
+    if db.engine.dialect.name == "sqlite":
+        # The FTS5 table is not part of the metadata; its triggers went with movies.
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS movies_fts"))
+    db.create_all()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TMP_DIR, ignore_errors=True)
@@ -0,0 +1,35 @@
+"""
+tests/test_batch_api.py
+Malformed items of a batch add are reported per item, not as a failed batch.
+"""
+
+import pytest
+
+from app import app
+from models import User, UserMovie, db
+from tests.conftest import reset_schema
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(app.config, "WTF_CSRF_ENABLED", False)
+    with app.app_context():
+        reset_schema()
+        db.session.add(User(name="owner"))
+        db.session.commit()
+        yield app.test_client()
+        db.session.remove()
+
+
+def test_non_string_fields_are_invalid_items(client):
+    resp = client.post("/api/users/1/movies:batch", json=[
+        {"title": 5, "year": 1999},
+        {"title": ["Heat"]},
+        {"title": "Heat", "imdb_id": {"id": "tt0113277"}},
+        {"title": "Heat", "year": 1995, "imdb_id": "tt0113277", "rating": 4},
+    ])
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert [r["status"] for r in body["results"]] == ["invalid", "invalid", "invalid", "added"]
+    assert body["results"][0]["message"] == "Title must be a string"
+    assert db.session.query(UserMovie).count() == 1
@@ -0,0 +1,98 @@
+"""
+tests/test_cooccurrence.py
+Incremental updates of the saved-together index match a full rebuild and
+count every list change exactly once.
+"""
+
+import pytest
+
+from app import app, data_manager
+from datamanager.query_counter import QueryCounter
+from models import Movie, MovieCooccurrence, User, UserMovie, db
+from tests.conftest import reset_schema
+
+
+@pytest.fixture
+def lists():
+    """Three users and five movies, with a few list entries already indexed."""
+    with app.app_context():
+        reset_schema()
+        users = [User(name=f"user {n}") for n in range(3)]
+        movies = [Movie(title=f"Movie {n}") for n in range(5)]
+        db.session.add_all([*users, *movies])
+        db.session.flush()
+        user_ids = [u.id for u in users]
+        movie_ids = [m.id for m in movies]
+        for u, m in [(0, 0), (0, 1), (1, 0), (1, 2), (2, 3)]:
+            db.session.add(UserMovie(user_id=user_ids[u], movie_id=movie_ids[m]))
+        db.session.commit()
+        assert data_manager.rebuild_cooccurrence()
+        yield user_ids, movie_ids
+        db.session.remove()
+
+
+def _pairs() -> dict[tuple[int, int], int]:
+    return {
+        (row.movie_id, row.other_movie_id): row.together_count
+        for row in db.session.scalars(db.select(MovieCooccurrence))
+    }
+
+
+def _save(user_id: int, movie_id: int) -> None:
+    db.session.add(UserMovie(user_id=user_id, movie_id=movie_id))
+    db.session.commit()
+
+
+def _remove(user_id: int, movie_id: int) -> None:
+    db.session.execute(
+        db.delete(UserMovie).where(UserMovie.user_id == user_id, UserMovie.movie_id == movie_id)
+    )
+    db.session.commit()
+
+
+def test_incremental_updates_match_rebuild(lists):
+    (u0, u1, u2), (m0, m1, m2, m3, m4) = lists
+    _save(u0, m2)
+    _save(u0, m4)
+    _remove(u0, m1)
+    _save(u2, m0)
+    assert data_manager.refresh_cooccurrence([(u0, m2), (u0, m4), (u0, m1), (u2, m0)])
+    incremental = _pairs()
+    assert incremental[(m0, m2)] == 2
+    assert (m0, m1) not in incremental
+
+    assert data_manager.rebuild_cooccurrence()
+    assert _pairs() == incremental
+
+
+def test_repeated_changes_are_counted_once(lists):
+    (u0, _, _), (m0, m1, _, _, m4) = lists
+    _save(u0, m4)
+    assert data_manager.refresh_cooccurrence([(u0, m4)])
+    once = _pairs()
+    assert once[(m4, m0)] == once[(m4, m1)] == 1
+
+    # A retried batch, or the same entry queued twice, changes nothing.
+    assert data_manager.refresh_cooccurrence([(u0, m4), (u0, m4)])
+    assert _pairs() == once
+
+
+def test_user_resync_catches_unqueued_changes(lists):
+    (u0, u1, _), (m0, _, m2, m3, _) = lists
+    _save(u1, m3)
+    _remove(u1, m0)
+    assert data_manager.refresh_cooccurrence([], user_ids=[u1])
+    resynced = _pairs()
+    assert resynced[(m2, m3)] == 1
+
+    assert data_manager.rebuild_cooccurrence()
+    assert _pairs() == resynced
+
+
+def test_refresh_takes_the_write_lock_first(lists):
+    (u0, _, _), (_, _, m2, _, _) = lists
+    _save(u0, m2)
+    # SQLite ignores FOR UPDATE: the refresh starts with the write lock.
+    with QueryCounter(db.engine) as queries:
+        assert data_manager.refresh_cooccurrence([(u0, m2)])
+    assert queries.statements[0] == "BEGIN IMMEDIATE"
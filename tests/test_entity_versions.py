@@ -0,0 +1,60 @@
+"""
+tests/test_entity_versions.py
+Writes bump the versions of the entities they touch and of their
+collections; conditional GETs follow them.
+"""
+
+import pytest
+
+from app import app, data_manager
+from models import EntityVersion, db
+from tests.conftest import reset_schema
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        reset_schema()
+        yield app.test_client()
+        db.session.remove()
+
+
+def _versions() -> dict[str, int]:
+    return dict(db.session.execute(db.select(EntityVersion.tag, EntityVersion.version)).all())
+
+
+def test_writes_bump_entities_and_their_collections(client):
+    ann = data_manager.add_user("ann")
+    heat = data_manager.add_movie(ann.id, "Heat", "Michael Mann", 1995, 4.0, imdb_id="tt0113277")
+    ronin = data_manager.add_movie(ann.id, "Ronin", None, 1998, None, imdb_id="tt0122690")
+    before = _versions()
+    assert "*" not in before
+
+    assert data_manager.update_user_rating_for_movie(ann.id, heat.id, 3.0)
+    after = _versions()
+    assert after[f"movie:{heat.id}"] == before[f"movie:{heat.id}"] + 1
+    assert after[f"movie:{ronin.id}"] == before[f"movie:{ronin.id}"]
+    assert after["movies"] == before["movies"] + 1
+    assert after["users"] == before["users"] + 1
+    assert data_manager.get_version(["movies"])[0] == f"movies={after['movies']}"
+
+    assert data_manager.recompute_all_community_ratings()
+    recomputed = _versions()
+    assert recomputed[f"movie:{ronin.id}"] == after[f"movie:{ronin.id}"] + 1
+    assert recomputed[f"user:{ann.id}"] == after[f"user:{ann.id}"]
+    assert recomputed["movies"] == after["movies"] + 1
+
+
+def test_movie_list_revalidates_after_a_movie_changes(client):
+    ann = data_manager.add_user("ann")
+    heat = data_manager.add_movie(ann.id, "Heat", "Michael Mann", 1995, 4.0, imdb_id="tt0113277")
+    first = client.get("/api/movies")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get("/api/movies", headers={"If-None-Match": etag}).status_code == 304
+
+    assert data_manager.update_user_rating_for_movie(ann.id, heat.id, 2.0)
+    changed = client.get("/api/movies", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.get_json()["movies"][0]["community_rating"] == 2.0
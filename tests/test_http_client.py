@@ -0,0 +1,74 @@
+"""
+tests/test_http_client.py
+Retries of the sync and async upstream clients against a local server.
+"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.async_http_client import AsyncHttpClient
+from services.http_client import MAX_RETRY_AFTER, HttpClient, retry_after_seconds
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 429 with Retry-After: 0 to the first request, then 200."""
+
+    def _answer(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.server.calls.append(self.command)
+        if len(self.server.calls) == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    server.calls = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_sync_client_retries_429(flaky_server, method):
+    client = HttpClient(backoff_factor=0, backoff_jitter=0)
+    url = f"http://127.0.0.1:{flaky_server.server_port}/"
+    resp = client.request(method, url, data="{}")
+    assert resp.status_code == 200
+    assert flaky_server.calls == [method, method]
+
+
+def test_async_client_retries_post_429(flaky_server):
+    async def post():
+        client = AsyncHttpClient(backoff_factor=0, backoff_jitter=0)
+        try:
+            return await client.post(f"http://127.0.0.1:{flaky_server.server_port}/", data="{}")
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(post()).status_code == 200
+    assert flaky_server.calls == ["POST", "POST"]
+
+
+def test_retry_after_is_capped():
+    assert retry_after_seconds("2") == 2
+    assert retry_after_seconds("3600") == MAX_RETRY_AFTER
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
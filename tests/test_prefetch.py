@@ -0,0 +1,78 @@
+"""
+tests/test_prefetch.py
+Upstream planners share their decisions with the views and the memo
+cache's single flight, and never start background work.
+"""
+
+import asyncio
+
+import pytest
+
+import app as app_module
+from app import app, plan_add_movie_upstream_calls, plan_ai_recommendation_upstream_calls
+from datamanager.query_counter import QueryCounter
+from models import Movie, db
+from services.memo import MemoCache
+from services.prefetch import PLANNED_ENVIRON_KEY
+from tests.conftest import reset_schema
+
+
+@pytest.fixture
+def movie_id():
+    with app.app_context():
+        reset_schema()
+        movie = Movie(title="Heat", year=1995, director="Michael Mann")
+        db.session.add(movie)
+        db.session.commit()
+        yield movie.id
+        db.session.remove()
+
+
+def test_view_reuses_add_movie_decision(movie_id):
+    with app.test_request_context("/users/1/add_movie?user_search_input=Heat") as ctx:
+        assert plan_add_movie_upstream_calls(1) == []
+        decisions = ctx.request.environ[PLANNED_ENVIRON_KEY]
+    assert decisions["add_movie"] == (
+        "matches", [{"id": movie_id, "title": "Heat", "year": 1995, "director": "Michael Mann"}]
+    )
+
+    # The view's request gets the planner's decisions and runs no search.
+    environ = {PLANNED_ENVIRON_KEY: decisions}
+    with app.test_request_context("/users/1/add_movie?user_search_input=Heat", environ_base=environ):
+        with QueryCounter() as counter:
+            assert app_module.planned("add_movie", app_module._add_movie_lookup)[0] == "matches"
+    assert counter.count == 0
+
+
+def test_unmatched_input_plans_one_shared_ai_call(movie_id):
+    with app.test_request_context("/users/1/add_movie?user_search_input=zzqx&skip_local=1"):
+        calls = plan_add_movie_upstream_calls(1)
+    assert [call.kind for call in calls] == ["openrouter"]
+    assert calls[0].memo is app_module.ai_title_cache
+
+
+def test_recommendation_planner_does_not_start_build(movie_id, monkeypatch):
+    started = []
+    monkeypatch.setattr(app_module, "_run_in_app_thread", started.append)
+    with app.test_request_context(f"/movie/{movie_id}/ai_recommendations"):
+        plan_ai_recommendation_upstream_calls(movie_id)
+    assert started == []
+
+
+def test_async_callers_share_one_computation():
+    cache = MemoCache()
+    computed = []
+
+    async def compute():
+        computed.append(1)
+        await asyncio.sleep(0.05)
+        return "Heat"
+
+    async def both():
+        return await asyncio.gather(
+            cache.get_or_compute_async("k", compute), cache.get_or_compute_async("k", compute)
+        )
+
+    assert asyncio.run(both()) == ["Heat", "Heat"]
+    assert computed == [1]
+    assert cache.stats()["coalesced"] == 1
@@ -0,0 +1,101 @@
+"""
+tests/test_query_counts.py
+The movie page and the user list cost a fixed number of SQL queries,
+however many movies, comments or commenters they show.
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app import app
+from datamanager.query_counter import QueryCounter, assert_max_queries
+from models import Comment, Movie, User, UserMovie, db
+from tests.conftest import reset_schema
+
+MOVIE_PAGE_QUERIES = 4
+USER_LIST_QUERIES = 2
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        reset_schema()
+        yield app.test_client()
+        db.session.remove()
+
+
+def _seed(rows: int) -> tuple[int, int]:
+    """Create a user with 'rows' movies in their list and a movie with 'rows' comments."""
+    owner = User(name="owner")
+    movies = [Movie(title=f"Movie {n}", year=2000 + n % 20) for n in range(rows)]
+    db.session.add_all([owner, *movies])
+    db.session.flush()
+    for n, movie in enumerate(movies):
+        db.session.add(UserMovie(user_id=owner.id, movie_id=movie.id, user_rating=n % 6))
+    for n in range(rows):
+        commenter = User(name=f"commenter {n}")
+        db.session.add(commenter)
+        db.session.flush()
+        db.session.add(Comment(movie_id=movies[0].id, user_id=commenter.id, text=f"Comment {n}"))
+    db.session.commit()
+    return owner.id, movies[0].id
+
+
+def _log_in(client, user_id: int) -> None:
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["user"] = {"id": user_id, "name": "owner"}
+
+
+def _queries(client, url: str) -> int:
+    with QueryCounter() as counter:
+        resp = client.get(url)
+    assert resp.status_code == 200
+    return counter.count
+
+
+@pytest.mark.parametrize("rows", [1, 40])
+def test_movie_page_queries_are_fixed(client, rows):
+    user_id, movie_id = _seed(rows)
+    _log_in(client, user_id)
+    with assert_max_queries(MOVIE_PAGE_QUERIES):
+        resp = client.get(f"/movie/{movie_id}/page")
+    assert resp.status_code == 200
+    assert f"Comment {rows - 1}".encode() in resp.data
+
+
+@pytest.mark.parametrize("rows", [1, 40])
+def test_user_list_queries_are_fixed(client, rows):
+    user_id, _ = _seed(rows)
+    with assert_max_queries(USER_LIST_QUERIES):
+        resp = client.get(f"/users/{user_id}")
+    assert resp.status_code == 200
+    assert f"Movie {rows - 1}".encode() in resp.data
+
+
+def test_query_count_does_not_grow_with_rows(client):
+    user_id, movie_id = _seed(3)
+    _log_in(client, user_id)
+    small = (_queries(client, f"/movie/{movie_id}/page"), _queries(client, f"/users/{user_id}"))
+    reset_schema()
+    user_id, movie_id = _seed(60)
+    _log_in(client, user_id)
+    large = (_queries(client, f"/movie/{movie_id}/page"), _queries(client, f"/users/{user_id}"))
+    assert small == large
+
+
+def test_per_thread_counter_ignores_other_threads(client):
+    def query():
+        with app.app_context():
+            db.session.execute(text("SELECT 1"))
+
+    with QueryCounter(per_thread=True) as counter:
+        query()
+        other = threading.Thread(target=query)
+        other.start()
+        other.join()
+        assert counter.count == 1
+        counter.reset()
+        assert counter.count == 0
@@ -0,0 +1,134 @@
+"""
+tests/test_rating_queue.py
+Write-behind ratings: startup replay, flush, queued ratings and stale
+changes skipped.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app import app, data_manager
+from models import Movie, User, UserMovie, db
+from services.rating_queue import LOG_PREFIX, LOG_SUFFIX, RatingWriteQueue, replay_orphaned_logs
+from tests.conftest import reset_schema
+
+
+def _write_orphan(directory, *changes) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{LOG_PREFIX}crashed{LOG_SUFFIX}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(change) + "\n" for change in changes)
+    return path
+
+
+@pytest.fixture
+def link():
+    """A saved movie rated 5 just now; yields (user_id, movie_id)."""
+    with app.app_context():
+        reset_schema()
+        user, movie = User(name="ann"), Movie(title="Heat")
+        db.session.add_all([user, movie])
+        db.session.flush()
+        db.session.add(UserMovie(user_id=user.id, movie_id=movie.id, user_rating=5.0))
+        db.session.commit()
+        yield user.id, movie.id
+        db.session.remove()
+
+
+def _rating(user_id, movie_id):
+    db.session.expire_all()
+    return db.session.scalars(
+        db.select(UserMovie.user_rating).filter_by(user_id=user_id, movie_id=movie_id)
+    ).one()
+
+
+def test_replay_skips_changes_older_than_the_stored_rating(link, tmp_path):
+    user_id, movie_id = link
+    an_hour_ago = time.time() - 3600
+    path = _write_orphan(tmp_path, [user_id, movie_id, 2.0, an_hour_ago])
+    assert replay_orphaned_logs(str(tmp_path), data_manager.apply_rating_updates, app) == 1
+    assert _rating(user_id, movie_id) == 5.0
+    assert not os.path.exists(path)
+
+    _write_orphan(tmp_path, [user_id, movie_id, 3.0, time.time() + 1])
+    replay_orphaned_logs(str(tmp_path), data_manager.apply_rating_updates, app)
+    assert _rating(user_id, movie_id) == 3.0
+
+
+def test_later_change_in_a_batch_wins(link):
+    user_id, movie_id = link
+    now = datetime.utcnow() + timedelta(seconds=1)
+    assert data_manager.apply_rating_updates([
+        (user_id, movie_id, 1.0, now + timedelta(seconds=1)),
+        (user_id, movie_id, 4.0, now),
+    ])
+    assert _rating(user_id, movie_id) == 1.0
+
+
+def test_queue_replays_at_start_and_flushes(tmp_path):
+    applied = []
+    queue = RatingWriteQueue(lambda batch: applied.extend(batch) or True, str(tmp_path), window=0)
+    _write_orphan(tmp_path, [1, 2, 4.0, time.time()], [1, 3, None])
+    bare = Flask(__name__)
+
+    queue.start(bare)
+    assert queue.drain(timeout=5)
+    assert [change[:3] for change in applied] == [(1, 2, 4.0), (1, 3, None)]
+    assert applied[1][3] is None
+    assert queue.stats()["replayed"] == 2
+
+    with bare.app_context():
+        assert queue.submit(1, 2, 1.5)
+    assert queue.flush(timeout=5)
+    assert applied[-1][:3] == (1, 2, 1.5)
+    assert isinstance(applied[-1][3], datetime)
+
+
+def test_pending_for_covers_changes_until_committed(tmp_path):
+    committing = threading.Event()
+    release = threading.Event()
+
+    def apply(batch):
+        committing.set()
+        return release.wait(timeout=5)
+
+    queue = RatingWriteQueue(apply, str(tmp_path), window=0)
+    bare = Flask(__name__)
+    with bare.app_context():
+        assert queue.submit(1, 2, 4.0)
+        assert queue.submit(1, 2, 3.5)
+        assert queue.submit(2, 2, 1.0)
+    assert committing.wait(timeout=5)
+    assert queue.pending_for(1) == {2: 3.5}
+
+    release.set()
+    assert queue.drain(timeout=5)
+    assert queue.pending_for(1) == {}
+
+
+def test_failing_change_is_dropped_without_growing_the_batch(tmp_path):
+    poisoned = (1, 99)
+    batches = []
+
+    def apply(batch):
+        batches.append(len(batch))
+        return all(change[:2] != poisoned for change in batch)
+
+    queue = RatingWriteQueue(apply, str(tmp_path), window=0, max_batch=3, retry_delay=0, max_attempts=3)
+    bare = Flask(__name__)
+    with bare.app_context():
+        assert queue.submit(*poisoned, 4.0)
+        for movie_id in range(2, 8):
+            assert queue.submit(1, movie_id, 3.0)
+    assert queue.drain(timeout=5)
+
+    assert max(batches) <= 3
+    stats = queue.stats()
+    assert stats["dropped"] == 1
+    assert stats["applied"] == 6
@@ -0,0 +1,69 @@
+"""
+tests/test_recommender.py
+Item-item recommender: background builds, rebuilds after other processes
+wrote, and per-user list truncation.
+"""
+
+import pytest
+from flask import Flask
+
+from services.recommender import ItemSimilarityEngine
+
+RATINGS = [
+    (1, 10, 5.0), (1, 11, 4.0), (1, 12, None),
+    (2, 10, 4.0), (2, 11, 5.0),
+    (3, 11, 3.0), (3, 12, 2.0),
+]
+
+
+@pytest.fixture
+def app_context():
+    with Flask(__name__).app_context():
+        yield
+
+
+def test_first_refresh_builds_in_background(app_context):
+    engine = ItemSimilarityEngine(top_k=5, shrinkage=0)
+    started = []
+    engine.refresh(lambda: iter(RATINGS), started.append)
+    assert len(started) == 1
+    assert not engine.is_built
+    assert engine.neighbours(10) == []
+
+    # A build already under way is not started twice.
+    engine.refresh(lambda: iter(RATINGS), started.append)
+    assert len(started) == 1
+
+    started[0]()
+    assert engine.is_built
+    assert engine.neighbours(10)[0][0] == 11
+
+
+def test_long_lists_are_truncated_and_logged(app_context, caplog):
+    engine = ItemSimilarityEngine(top_k=5, max_items_per_user=2)
+    engine.build(iter(RATINGS))
+    # User 1's third movie is ignored, so 12 only neighbours 11 (via user 3).
+    assert [other for other, _ in engine.neighbours(12)] == [11]
+    assert "ignored 1 movies of 1 users with more than 2 movies" in caplog.text
+
+
+def test_rebuilds_when_another_process_changed_the_data(app_context):
+    engine = ItemSimilarityEngine(top_k=5, rebuild_interval=0)
+    version = ["v1"]
+    started = []
+
+    def refresh():
+        engine.refresh(lambda: iter(RATINGS), started.append, lambda: version[0])
+
+    refresh()
+    started.pop()()
+    # No local mark_stale(), same shared version: nothing to do.
+    refresh()
+    assert started == []
+
+    version[0] = "v2"
+    refresh()
+    assert len(started) == 1
+    started.pop()()
+    refresh()
+    assert started == []
@@ -0,0 +1,94 @@
+"""
+tests/test_unit_of_work.py
+add_movie is all or nothing: a failure leaves no movie, list entry,
+version bump or aggregate change behind and announces nothing. Nested
+units of work commit once.
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import app, data_manager
+from datamanager.signals import data_changed, rating_changed
+from models import EntityVersion, Movie, RoutingSession, User, UserMovie, db
+from tests.conftest import reset_schema
+
+
+@pytest.fixture
+def users():
+    """ann and bob; bob has Heat in his list, rated 4."""
+    with app.app_context():
+        reset_schema()
+        ann, bob = data_manager.add_user("ann"), data_manager.add_user("bob")
+        assert data_manager.add_movie(bob.id, "Heat", None, 1995, 4.0, imdb_id="tt0113277")
+        yield ann.id, bob.id
+        db.session.remove()
+
+
+@pytest.fixture
+def sent():
+    """Signals sent while the test runs."""
+    signals = []
+
+    def record(sender, **kwargs):
+        signals.append(kwargs)
+
+    data_changed.connect(record)
+    rating_changed.connect(record)
+    yield signals
+    data_changed.disconnect(record)
+    rating_changed.disconnect(record)
+
+
+def _snapshot():
+    db.session.expire_all()
+    return {
+        "movies": db.session.execute(db.select(
+            Movie.id, Movie.imdb_id, Movie.rating_sum, Movie.community_rating_count,
+            Movie.save_count, Movie.community_rating,
+        ).order_by(Movie.id)).all(),
+        "links": db.session.execute(db.select(
+            UserMovie.user_id, UserMovie.movie_id, UserMovie.user_rating
+        ).order_by(UserMovie.id)).all(),
+        "versions": db.session.execute(db.select(
+            EntityVersion.tag, EntityVersion.version
+        ).order_by(EntityVersion.tag)).all(),
+    }
+
+
+def _fail(*args, **kwargs):
+    raise SQLAlchemyError("simulated failure")
+
+
+@pytest.mark.parametrize("step", ["_apply_community_rating_delta", "_notify_rating_changed"])
+@pytest.mark.parametrize("title, imdb_id", [("Heat", "tt0113277"), ("Ronin", "tt0122690")])
+def test_failed_add_movie_leaves_nothing_behind(users, sent, monkeypatch, step, title, imdb_id):
+    ann_id, _ = users
+    before = _snapshot()
+    monkeypatch.setattr(data_manager, step, _fail)
+
+    assert data_manager.add_movie(ann_id, title, None, 1995, 2.0, imdb_id=imdb_id) is None
+    assert _snapshot() == before
+    assert sent == []
+
+
+def test_nested_units_of_work_commit_once(users, sent):
+    ann_id, bob_id = users
+    commits = []
+
+    def count_commit(session):
+        commits.append(session)
+
+    event.listen(RoutingSession, "after_commit", count_commit)
+    try:
+        with data_manager._unit_of_work():
+            with data_manager._unit_of_work():
+                db.session.add(User(name="cy"))
+            assert data_manager.add_movie(ann_id, "Ronin", None, 1998, None, imdb_id="tt0122690")
+            assert commits == [] and sent == []
+    finally:
+        event.remove(RoutingSession, "after_commit", count_commit)
+    assert len(commits) == 1
+    assert [s.get("action") for s in sent if "action" in s] == ["saved"]
+    assert db.session.query(User).filter_by(name="cy").count() == 1